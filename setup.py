@@ -87,6 +87,9 @@ setup(
             "pytest-cov>=2.10.0",
             "moto>=4.0.0",  # AWS service mocking for tests
         ],
+        "watch": [
+            "watchdog>=2.1.0",  # Filesystem notifications for e2mc-converter --watch
+        ],
     },
     
     # Command line tools
@@ -107,7 +110,7 @@ setup(
     },
     
     # Python version requirements
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     
     # Package metadata
     keywords=[
@@ -129,7 +132,6 @@ setup(
         
         # Programming language
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
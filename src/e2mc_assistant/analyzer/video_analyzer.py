@@ -12,11 +12,17 @@ import sys
 import time
 import argparse
 import subprocess
-import boto3
 import random
 from botocore.exceptions import ClientError
 from typing import Dict, Any, List, Tuple, Optional
 
+try:
+    from .. import aws_clients
+except ImportError:
+    # Running the analyzer directly as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import aws_clients
+
 
 class VideoAnalyzer:
     """
@@ -32,10 +38,7 @@ class VideoAnalyzer:
             region: AWS region for Bedrock service
         """
         self.region = region
-        self.bedrock_client = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=region
-        )
+        self.bedrock_client = aws_clients.get_client("bedrock-runtime", region=region)
 
     def extract_video_info(self, s3_path: str) -> Dict[str, Any]:
         """
@@ -61,7 +64,7 @@ class VideoAnalyzer:
             temp_file.close()  # Close the file handle but keep the file
             
             # Download the video from S3
-            s3_client = boto3.client('s3')
+            s3_client = aws_clients.get_client('s3')
             s3_client.download_file(bucket_name, object_key, temp_path)
             
             # Extract video information using ffprobe
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Shared, tuned boto3 clients
+
+Creating a boto3 client is expensive, and every client brings its own
+connection pool of 10 connections by default. The workflow, the job submitter
+and the video analyzer used to create their own clients (the analyzer one per
+download), so thread pools that share a stage quickly ran out of connections.
+
+get_client() hands out one client per service, region and endpoint, created
+from a single shared session with:
+
+- a connection pool sized for the thread pools using it (max_pool_connections)
+- adaptive retries, which back off client-side when the service throttles
+  (callers with their own rate limiter ask for a different retry mode and
+  attempt count, and get a separate client)
+- TCP keep-alive on pooled connections
+
+boto3 clients are thread-safe, so the returned clients can be shared by any
+number of threads. The cache is per process: a forked child creates its own
+clients on first use.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+DEFAULT_MAX_ATTEMPTS = 10
+DEFAULT_RETRY_MODE = 'adaptive'
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pid = None
+_session = None
+# (service, region, endpoint_url, retry_mode, max_attempts) -> (client, max_pool_connections)
+_clients: Dict[Tuple, Tuple[Any, int]] = {}
+_settings = {
+    'max_pool_connections': DEFAULT_MAX_POOL_CONNECTIONS,
+    'max_attempts': DEFAULT_MAX_ATTEMPTS,
+    'retry_mode': DEFAULT_RETRY_MODE,
+    'tcp_keepalive': True,
+}
+
+
+def _reset_after_fork() -> None:
+    """Drop the session and clients inherited from a parent process (called with _lock held)"""
+    global _pid, _session
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _session = None
+        _clients.clear()
+
+
+def configure(max_pool_connections: Optional[int] = None, max_attempts: Optional[int] = None,
+              retry_mode: Optional[str] = None, tcp_keepalive: Optional[bool] = None) -> None:
+    """
+    Change the settings of the clients created from now on
+
+    Clients already handed out keep their settings; call clear() to rebuild them.
+
+    Args:
+        max_pool_connections: Default connection pool size per client
+        max_attempts: Maximum attempts per request, including the first
+        retry_mode: botocore retry mode ('adaptive', 'standard' or 'legacy')
+        tcp_keepalive: Enable TCP keep-alive on pooled connections
+    """
+    with _lock:
+        for name, value in (('max_pool_connections', max_pool_connections), ('max_attempts', max_attempts),
+                            ('retry_mode', retry_mode), ('tcp_keepalive', tcp_keepalive)):
+            if value is not None:
+                _settings[name] = value
+
+
+def get_session() -> boto3.session.Session:
+    """Return the session shared by all clients of this process"""
+    global _session
+    with _lock:
+        _reset_after_fork()
+        if _session is None:
+            _session = boto3.session.Session()
+        return _session
+
+
+def client_config(max_pool_connections: Optional[int] = None, retry_mode: Optional[str] = None,
+                  max_attempts: Optional[int] = None) -> Config:
+    """
+    Return the botocore Config used for shared clients
+
+    Args:
+        max_pool_connections: Connection pool size (default: the configured default)
+        retry_mode: botocore retry mode (default: the configured mode)
+        max_attempts: Maximum attempts per request, including the first (default: the configured number)
+    """
+    return Config(
+        max_pool_connections=max_pool_connections or _settings['max_pool_connections'],
+        # total_max_attempts counts the first attempt; botocore's max_attempts does not
+        retries={'total_max_attempts': max_attempts or _settings['max_attempts'],
+                 'mode': retry_mode or _settings['retry_mode']},
+        tcp_keepalive=_settings['tcp_keepalive'],
+    )
+
+
+def get_client(service: str, region: Optional[str] = None, endpoint_url: Optional[str] = None,
+               max_pool_connections: Optional[int] = None, retry_mode: Optional[str] = None,
+               max_attempts: Optional[int] = None):
+    """
+    Return the shared client of a service
+
+    A client is created on first use and reused afterwards. If a caller needs a
+    larger connection pool than the cached client has (e.g. a wider thread pool),
+    a larger client replaces it; earlier holders keep working with the old one.
+
+    Args:
+        service: boto3 service name, e.g. 's3', 'mediaconvert' or 'bedrock-runtime'
+        region: AWS region (default: the session's region)
+        endpoint_url: Optional endpoint URL, e.g. the MediaConvert account endpoint
+        max_pool_connections: Connection pool size the caller needs; the configured
+            default is used if it is larger
+        retry_mode: botocore retry mode, e.g. 'standard' for callers that pace and retry
+            throttled calls themselves (default: the configured mode)
+        max_attempts: Maximum attempts per request (default: the configured number)
+
+    Returns:
+        A boto3 client
+    """
+    global _session
+    pool_size = max(max_pool_connections or 0, _settings['max_pool_connections'])
+    key = (service, region, endpoint_url, retry_mode, max_attempts)
+    with _lock:
+        _reset_after_fork()
+        cached = _clients.get(key)
+        if cached is not None and cached[1] >= pool_size:
+            return cached[0]
+
+        if _session is None:
+            _session = boto3.session.Session()
+        # Session.client() is not thread-safe, hence the lock around it
+        client = _session.client(service, region_name=region, endpoint_url=endpoint_url,
+                                 config=client_config(pool_size, retry_mode, max_attempts))
+        _clients[key] = (client, pool_size)
+        logger.debug(f"Created shared {service} client for {region or 'default region'} "
+                     f"with {pool_size} pooled connections")
+        return client
+
+
+def clear() -> None:
+    """Forget the shared session and clients"""
+    global _session
+    with _lock:
+        _session = None
+        _clients.clear()
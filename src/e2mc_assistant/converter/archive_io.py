@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Streaming access to profile export bundles
+
+Encoding.com profile exports arrive as tar(.gz) or zip bundles holding
+*.format.xml (or *.xml) profiles next to their optional <name>-setting.json
+MediaConvert templates, the same layout batch_convert() expects in a directory.
+This module reads such bundles member by member without extracting them and
+writes converted files to a directory or straight into another archive.
+
+Zip bundles are read through their central directory, so each profile is paired
+with its template directly. Tar bundles are read as a stream: templates are kept
+as they go by, and a profile that arrives before its template waits for it (or
+for the end of the archive, in which case it has no template).
+"""
+
+import io
+import json
+import logging
+import os
+import posixpath
+import tarfile
+import time
+import zipfile
+from typing import Dict, Iterator, Optional, Tuple
+
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+_TAR_WRITE_MODES = (
+    (('.tar.gz', '.tgz'), 'w:gz'),
+    (('.tar.bz2', '.tbz2'), 'w:bz2'),
+    (('.tar.xz', '.txz'), 'w:xz'),
+    (('.tar',), 'w'),
+)
+
+logger = logging.getLogger('ArchiveIO')
+
+
+def is_archive(path: str) -> bool:
+    """Return True if the path names a tar or zip bundle"""
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def profile_names(member_name: str) -> Optional[Tuple[str, str]]:
+    """
+    Return the output and companion template names of a profile member
+
+    Args:
+        member_name: Name of the archive member, e.g. exports/27.format.xml
+
+    Returns:
+        Tuple of (output_name, template_name), e.g. (exports/27.json, exports/27-setting.json),
+        or None if the member is not a profile
+    """
+    directory, filename = posixpath.split(member_name)
+    if filename.endswith('.format.xml'):
+        stem = filename[:-len('.format.xml')]
+    elif filename.endswith('.xml'):
+        stem = filename[:-len('.xml')]
+    else:
+        return None
+    return posixpath.join(directory, f"{stem}.json"), posixpath.join(directory, f"{stem}-setting.json")
+
+
+def _load_template(data: bytes, name: str) -> Optional[Dict]:
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable template {name}: {e}")
+        return None
+
+
+def iter_archive_profiles(archive_path: str) -> Iterator[Tuple[str, str, bytes, Optional[Dict]]]:
+    """
+    Read the profiles of a bundle, each paired with its companion template
+
+    Args:
+        archive_path: Path to a tar (optionally compressed) or zip bundle
+
+    Yields:
+        Tuples of (member_name, output_name, document, template) where document is the
+        raw profile and template the parsed <name>-setting.json, or None if the bundle
+        has no template for the profile
+    """
+    if archive_path.lower().endswith('.zip'):
+        yield from _iter_zip_profiles(archive_path)
+    else:
+        yield from _iter_tar_profiles(archive_path)
+
+
+def _iter_zip_profiles(archive_path: str):
+    with zipfile.ZipFile(archive_path) as archive:
+        members = archive.namelist()
+        available = set(members)
+        for name in members:
+            names = profile_names(name)
+            if names is None:
+                continue
+            output_name, template_name = names
+            template = None
+            if template_name in available:
+                template = _load_template(archive.read(template_name), template_name)
+            yield name, output_name, archive.read(name), template
+
+
+def _iter_tar_profiles(archive_path: str):
+    templates = {}
+    waiting = {}
+    # Stream mode reads the members in order without seeking
+    with tarfile.open(archive_path, 'r|*') as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            name = member.name
+            if name.endswith('-setting.json'):
+                template = _load_template(archive.extractfile(member).read(), name)
+                templates[name] = template
+                for member_name, output_name, document in waiting.pop(name, []):
+                    yield member_name, output_name, document, template
+                continue
+
+            names = profile_names(name)
+            if names is None:
+                continue
+            output_name, template_name = names
+            document = archive.extractfile(member).read()
+            if template_name in templates:
+                yield name, output_name, document, templates[template_name]
+            else:
+                waiting.setdefault(template_name, []).append((name, output_name, document))
+
+    # Profiles whose template never appeared
+    for profiles in waiting.values():
+        for member_name, output_name, document in profiles:
+            yield member_name, output_name, document, None
+
+
+class ArchiveWriter:
+    """
+    Write converted files to a directory, a zip file or a tar file
+
+    The kind of output is chosen from the path: names ending in one of
+    ARCHIVE_SUFFIXES create an archive, anything else is a directory.
+    """
+
+    def __init__(self, output: str):
+        self.output = output
+        self._zip = None
+        self._tar = None
+        lower = output.lower()
+        if lower.endswith('.zip'):
+            self._zip = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED)
+        elif is_archive(output):
+            mode = next(mode for suffixes, mode in _TAR_WRITE_MODES if lower.endswith(suffixes))
+            self._tar = tarfile.open(output, mode)
+        else:
+            os.makedirs(output, exist_ok=True)
+
+    @staticmethod
+    def _safe_name(name: str) -> str:
+        """Keep member names inside the output, dropping absolute and parent components"""
+        name = posixpath.normpath(name.replace('\\', '/')).lstrip('/')
+        if name == '..' or name.startswith('../'):
+            name = posixpath.basename(name)
+        return name
+
+    def write(self, name: str, data: bytes) -> str:
+        """
+        Write one file
+
+        Args:
+            name: Relative name of the file, with / separators
+            data: File content
+
+        Returns:
+            Where the file was written, for log messages
+        """
+        name = self._safe_name(name)
+        if self._zip is not None:
+            self._zip.writestr(name, data)
+            return f"{self.output}:{name}"
+        if self._tar is not None:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._tar.addfile(info, io.BytesIO(data))
+            return f"{self.output}:{name}"
+
+        path = os.path.join(self.output, *name.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def close(self) -> None:
+        """Finish the archive, if one is being written"""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,18 +1,38 @@
 #!/usr/bin/env python3
 import argparse
+import bisect
+import hashlib
 import json
 import os
+import posixpath
 import re
 import xml.etree.ElementTree as ET
 import yaml
-from typing import Dict, Any, List, Union, Callable
+from typing import Dict, Any, Iterable, Iterator, List, Tuple, Union, Callable
 import logging
+import pickle
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 # Add the project root to the Python path to import validator
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 from utils.mc_config_validator.validator import MediaConvertConfigValidator
 
+try:
+    from .archive_io import ArchiveWriter, is_archive, iter_archive_profiles, profile_names
+    from .profile_watcher import ProfileWatcher
+    from .rule_conflicts import build_target_index, contested_paths, find_rule_conflicts
+    from .source_profile import SourceProfile, StreamSpec, parse_bitrate, parse_size
+except ImportError:
+    # Running the converter directly as a script
+    from archive_io import ArchiveWriter, is_archive, iter_archive_profiles, profile_names
+    from profile_watcher import ProfileWatcher
+    from rule_conflicts import build_target_index, contested_paths, find_rule_conflicts
+    from source_profile import SourceProfile, StreamSpec, parse_bitrate, parse_size
+
 
 class ConfigConverter:
     def _format_log_header(self, message, width=80, fill_char='-'):
@@ -52,8 +72,19 @@ class ConfigConverter:
         self.logger.info(self._format_log_header(message, width, fill_char))
         self.logger.info("")  # Empty line after header
     
-    def __init__(self, rules_file: str):
-        """Initialize converter with mapping rules"""
+    def __init__(self, rules_file: str, stream_workers: int = 1, write_schema: str = None,
+                 reject_invalid_writes: bool = False):
+        """
+        Initialize converter with mapping rules
+        
+        Args:
+            rules_file: Mapping rules file (YAML)
+            stream_workers: Number of worker processes used to apply the rules to the
+                streams of a large multi-stream profile; 1 processes streams serially
+            write_schema: Optional JSON schema file; when given, every value written to the
+                Settings object is validated as it is written (see _check_write)
+            reject_invalid_writes: Drop invalid writes instead of only recording them
+        """
         with open(rules_file, 'r') as f:
             self.config = yaml.safe_load(f)
         self.rules = self.config.get('rules', [])
@@ -61,6 +92,39 @@ class ConfigConverter:
         self.custom_functions = {}
         self.logger = logging.getLogger('ConfigConverter')
         
+        # Reverse index of target paths to the rules writing them, and the writes that can collide
+        self.rule_target_index = build_target_index(self.rules)
+        self.rule_conflicts = find_rule_conflicts(self.rule_target_index)
+        self._contested_paths = contested_paths(self.rule_conflicts)
+        if self.rule_conflicts:
+            self.logger.debug(f"Found {len(self.rule_conflicts)} potential rule conflicts on "
+                              f"{len(self._contested_paths)} target paths in {rules_file}")
+            for conflict in self.rule_conflicts:
+                self.logger.debug(f"Potential rule conflict: {conflict.describe()}")
+        
+        # Parsed templates keyed by absolute path, see _load_template
+        self._template_cache = {}
+        
+        # Rule results shared by the streams of one ladder, see _apply_rules
+        self._rule_memo = None
+        
+        # Worker processes for parallel stream processing, started on first use
+        self.stream_workers = max(1, stream_workers or 1)
+        self._stream_pool = None
+        
+        # Validation of writes against the schema, see _check_write
+        self.write_schema = write_schema
+        self.reject_invalid_writes = reject_invalid_writes
+        self.write_validator = MediaConvertConfigValidator(write_schema) if write_schema else None
+        self.write_violations = []
+        self.write_validation_clean = None
+        self._write_origin = None
+        self._write_stream = None
+        self._template_validity = {}
+        
+        # (stream_index, mapped count, unmapped count) at each stream boundary, see parameter_outcomes
+        self.stream_outcome_marks = []
+        
         # Register built-in custom functions
         self.register_custom_function('process_alternate_sources', self._process_alternate_sources)
         self.register_custom_function('generate_outputs_from_streams', self._generate_outputs_from_streams)
@@ -70,6 +134,46 @@ class ConfigConverter:
         """Register a custom transformation function"""
         self.custom_functions[name] = func
         
+        # Running workers hold a copy of the converter without this function
+        if getattr(self, '_stream_pool', None) is not None:
+            self.close()
+        
+    def _load_template(self, template_file: str) -> Dict:
+        """
+        Return a fresh copy of a MediaConvert template
+        
+        Templates are parsed once and cached by path. The cache entry is keyed on the
+        file's modification time and size so an edited template is picked up again,
+        and every call returns an independent clone that the conversion can mutate.
+        
+        Args:
+            template_file: Path to the template JSON file
+            
+        Returns:
+            Template dictionary owned by the caller
+        """
+        template_path = os.path.abspath(template_file)
+        stat = os.stat(template_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        
+        cached = self._template_cache.get(template_path)
+        if cached is None or cached[0] != signature:
+            with open(template_path, 'r') as f:
+                cached = (signature, json.load(f))
+            self._template_cache[template_path] = cached
+            self.logger.debug(f"Loaded template {template_path} into cache")
+        
+        return self._clone_json(cached[1])
+        
+    @staticmethod
+    def _clone_json(node: Any) -> Any:
+        """Structurally clone a JSON tree (dicts, lists and immutable scalars)"""
+        if isinstance(node, dict):
+            return {key: ConfigConverter._clone_json(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [ConfigConverter._clone_json(item) for item in node]
+        return node
+        
     def _process_set_aspect_ratio(self, aspect_ratio_str: str, context: Dict) -> Dict:
         """
         Process set_aspect_ratio parameter to calculate ParNumerator and ParDenominator
@@ -112,10 +216,7 @@ class ConfigConverter:
             
             # Try to find width and height in the source data
             if 'size' in source_data:
-                size_parts = source_data['size'].split('x')
-                if len(size_parts) == 2:
-                    width = int(size_parts[0])
-                    height = int(size_parts[1])
+                width, height = parse_size(source_data['size'])
             
             # If size not found, try width and height separately
             if width is None and 'width' in source_data:
@@ -170,10 +271,13 @@ class ConfigConverter:
         """
         Generate outputs from streams and apply both rate control and audio settings
         
-        This function combines _generate_outputs_from_streams with _process_rate_control_settings
-        and _process_audio_settings to create outputs with proper settings, while respecting
-        video-only and audio-only outputs. It also applies stream-specific rules from
-        the rules file provided during initialization.
+        This is the ladder engine for multi-stream profiles. Each stream is handled
+        in a single pass: its output structure is generated, rate control and audio
+        settings are applied, the stream-specific rules from the rules file provided
+        during initialization are applied, and finally video-only and audio-only
+        outputs are stripped of the descriptions they must not carry. All writes go
+        straight to the output that is returned, so the cost grows linearly with the
+        number of rungs.
         
         Args:
             streams: List of stream dictionaries from Encoding.com format
@@ -196,172 +300,29 @@ class ConfigConverter:
             # First, generate basic outputs from streams
             self.logger.debug("Generating basic outputs from streams")
             outputs = self._generate_outputs_from_streams(streams, context)
+            specs = self._stream_specs(streams, context)
+            if self.write_schema is not None:
+                for i, output in enumerate(outputs):
+                    self._check_write(f"Settings.OutputGroups[0].Outputs[{i}]", output,
+                                      origin="stream output generator", can_reject=False)
             source_data = context.get('source_data', {})
             
-            # Track processed parameters
-            processed_params = set()
-            
-            # Process each output to apply rate control and audio settings
-            for i, output in enumerate(outputs):
-                # Create a temporary target data structure to use with processing methods
-                temp_target = {"Settings": {"OutputGroups": [{"Outputs": [output]}]}}
-                
-                # Add audio_selectors to temp_target if available in context
-                if 'audio_selectors' in context:
-                    temp_target["Settings"]["Inputs"] = [{"AudioSelectors": context['audio_selectors']}]
-                    self.logger.debug(f"Added AudioSelectors to temp_target for output {i}")
-                
-                # Check if this is a video-only output (no AudioDescriptions)
-                is_video_only = "AudioDescriptions" not in output
-                
-                # Check if this is an audio-only output (no VideoDescription)
-                is_audio_only = "VideoDescription" not in output
-                
-                # Get the corresponding stream data to use as source_data for processing
-                # This ensures we use stream-specific settings rather than global settings
-                stream_data = streams[i] if i < len(streams) else {}
-                
-                # Apply rate control settings for video (skip for audio-only outputs)
-                if not is_audio_only and "VideoDescription" in output:
-                    # Use stream data as source_data instead of global source_data
-                    # This ensures we get stream-specific settings like cbr, bitrate, etc.
-                    rate_control_processed = self._process_rate_control_settings(stream_data, temp_target)
-                    if rate_control_processed:
-                        processed_params.update(rate_control_processed)
-                    self.logger.debug(f"Applied rate control settings for output {i} using stream-specific data")
-                    self.logger.debug(f"Processed parameters for output {i} are: {processed_params}")
-                elif is_audio_only:
-                    self.logger.debug(f"Skipping rate control settings for audio-only output {i}")
-                
-                # Apply audio settings (skip for video-only outputs)
-                if not is_video_only and ("AudioDescriptions" in output or is_audio_only):
-                    # Use stream data for audio settings as well
-                    audio_processed = self._process_audio_settings(stream_data, temp_target)
-                    if audio_processed:
-                        processed_params.update(audio_processed)
-                    self.logger.debug(f"Applied audio settings for output {i} using stream-specific data")
-                elif is_video_only:
-                    self.logger.debug(f"Skipping audio settings for video-only output {i}")
-                    
-                # Extract the processed output back
-                processed_output = temp_target["Settings"]["OutputGroups"][0]["Outputs"][0]
-                
-                # Update the original output with processed settings
-                for key, value in processed_output.items():
-                    output[key] = value
+            if not hasattr(self, 'mapped_parameters'):
+                self.mapped_parameters = []
+            if not hasattr(self, 'unmapped_parameters'):
+                self.unmapped_parameters = []
             
-            # Use the rules that were loaded during initialization
-            # Create a rule lookup dictionary for faster access
-            rule_lookup = {}
-            dummy_rules = []
+            # Large ladders can be spread over worker processes when stream_workers > 1
+            parallel_result = None
+            if self.stream_workers > 1 and len(specs) >= 2 * self.stream_workers:
+                parallel_result = self._apply_stream_settings_parallel(outputs, specs, context)
             
-            self.logger.debug(f"Processed parameters before rule matching are: {processed_params}")
-
-            # Organize rules by their source path for easier lookup, but skip stream rules
-            for rule in self.rules:
-                # Skip rules that target stream path to avoid recursion
-                if rule['source'].get('path') == 'stream':
-                    self.logger.info("Skipping stream rule to avoid recursion")
-                    continue
-                    
-                if rule['source'].get('type') == 'dummy':
-                    dummy_rules.append(rule)
-                    continue
-                    
-                source_path = rule['source']['path']
-                if source_path not in rule_lookup:
-                    rule_lookup[source_path] = []
-                rule_lookup[source_path].append(rule)
+            if parallel_result is not None:
+                outputs, group_settings, processed_params = parallel_result
+            else:
+                group_settings, processed_params = self._apply_stream_settings(outputs, specs, 0, len(specs), context)
             
-            # Now process each stream individually with the rules
-            for i, stream in enumerate(streams):
-                # Create a temporary target data structure for this stream's output
-                temp_target = {"Settings": {"OutputGroups": [{"Outputs": [outputs[i]]}]}}
-                
-                # Initialize OutputGroupSettings if needed
-                if 'OutputGroupSettings' not in temp_target["Settings"]["OutputGroups"][0]:
-                    temp_target["Settings"]["OutputGroups"][0]["OutputGroupSettings"] = {}
-                
-                # 创建一个新的stream_processed_params
-                stream_processed_params = set()
-                
-                # logging for processing start of a stream
-                self._log_top_header(f"Applying rules to stream {i+1}/{len(streams)}", fill_char='=')
-                self.logger.debug(f"The structure of stream is {stream}")
-
-                self._log_top_header(f"Processing dummy rule")
-                # 处理当前stream的dummy规则
-                for rule in dummy_rules:
-                    source_path = rule['source']['path']
-                    # 使用当前stream作为source_data，而不是全局source_data
-                    source_value = self.get_value_by_path(stream, source_path)
-                    
-                    # 只有当 source_value 不是 None 时才进行处理
-                    if source_value is not None:
-                        stream_processed_params.add(source_path)
-                        # Log the dummy rule match
-                        self.logger.info(f"Mapped parameter: {source_path}={source_value} → [DUMMY RULE]")
-                        # 添加到mapped_parameters列表
-                        if not hasattr(self, 'mapped_parameters'):
-                            self.mapped_parameters = []
-                        self.mapped_parameters.append((source_path, source_value, [("DUMMY_RULE", None)]))
-                self._log_bottom_header(f"Finished dummy rule processing")
-                
-                # 添加已经通过_process_rate_control_settings和_process_audio_settings处理过的参数
-                # 这些参数在前面的代码中已经被处理，但没有添加到stream_processed_params中
-                rate_control_params = ['cbr', 'hard_cbr', 'cabr', 'bitrate', 'maxrate', 'minrate']
-                audio_params = ['audio_codec', 'audio_bitrate', 'audio_sample_rate', 'audio_maxrate', 'audio_minrate']
-                
-                # 检查stream中的每个参数，如果是rate_control_params或audio_params中的参数，则添加到stream_processed_params中
-                for param in rate_control_params + audio_params:
-                    if param in stream:
-                        stream_processed_params.add(param)
-                        self.logger.debug(f"Added pre-processed parameter {param} to stream_processed_params for stream {i}")
-                
-                # insert stream data into context for processing rule
-                if context:
-                    context["current_stream"] = stream
-                
-                # Process the stream with rules, but avoid recursive processing
-                # by not processing 'stream' paths
-                # Pass the complete stream as both source_data and current_dict to maintain full context
-                self._process_source_data(stream, "", rule_lookup, temp_target, stream_processed_params, context, stream)
-                
-                # Extract the processed output back
-                processed_output = temp_target["Settings"]["OutputGroups"][0]["Outputs"][0]
-                
-                # Update the original output with processed settings
-                for key, value in processed_output.items():
-                    if key not in outputs[i]:
-                        outputs[i][key] = value
-                    elif isinstance(outputs[i][key], dict) and isinstance(value, dict):
-                        # Merge dictionaries for nested settings
-                        outputs[i][key].update(value)
-                
-                # Add the stream's processed parameters to the global set
-                processed_params.update(stream_processed_params)
-                
-                # Extract OutputGroupSettings from the temp_target if it exists
-                if i == 0:  # Only need to do this once
-                    if ('OutputGroupSettings' in temp_target["Settings"]["OutputGroups"][0] and 
-                        temp_target["Settings"]["OutputGroups"][0]["OutputGroupSettings"]):
-                        group_settings = temp_target["Settings"]["OutputGroups"][0]["OutputGroupSettings"]
-                        self.logger.info(f"Extracted OutputGroupSettings from temp_target: {group_settings}")
-                    else:
-                        group_settings = {}
-            
-            # Clean up outputs based on video_only and audio_only flags
-            for i, stream in enumerate(streams):
-                if i < len(outputs):
-                    # Check if this stream has video_only=yes
-                    if stream.get('video_only') == 'yes' and 'AudioDescriptions' in outputs[i]:
-                        self.logger.info(f"Removing AudioDescriptions from output {i} because video_only=yes is set")
-                        outputs[i].pop('AudioDescriptions', None)
-                    
-                    # Check if this stream has audio_only=yes
-                    if stream.get('audio_only') == 'yes' and 'VideoDescription' in outputs[i]:
-                        self.logger.info(f"Removing VideoDescription from output {i} because audio_only=yes is set")
-                        outputs[i].pop('VideoDescription', None)
+            self.logger.debug(f"Processed parameters for the ladder are: {processed_params}")
             
             # Get output format from source data to determine OutputGroupSettings.Type
             output_format = self.get_value_by_path(source_data, 'output')
@@ -399,13 +360,38 @@ class ConfigConverter:
             # 确保无论如何都清除处理标记
             if 'processing_streams' in context:
                 del context['processing_streams']
+            self._rule_memo = None
         
         
     def parse_xml(self, xml_file: str) -> Dict:
         """Parse Encoding.com XML configuration file, returning only the format element content"""
         tree = ET.parse(xml_file)
-        root = tree.getroot()
+        return self._parse_format(tree.getroot())
+    
+    def parse_xml_string(self, xml: Union[str, bytes]) -> Dict:
+        """Parse an Encoding.com XML configuration held in memory, returning only the format element content"""
+        return self._parse_format(ET.fromstring(xml))
+    
+    def _load_document(self, document: Union[str, bytes, Dict]) -> Dict:
+        """
+        Turn an in-memory profile into the parsed dictionary convert_data() expects
         
+        Args:
+            document: XML or JSON text (str or bytes), or an already parsed profile
+                dictionary, which is copied so the caller's object is left untouched
+        """
+        if isinstance(document, dict):
+            return self._clone_json(document)
+        if isinstance(document, bytes):
+            text = document.lstrip(b'\xef\xbb\xbf \t\r\n')
+        else:
+            text = document.lstrip('\ufeff \t\r\n')
+        if text[:1] in ('<', b'<'):
+            return self.parse_xml_string(document)
+        return json.loads(text)
+    
+    def _parse_format(self, root) -> Dict:
+        """Convert the <format> element under an XML root into the profile dictionary"""
         # Find the format element
         format_element = root.find('.//format')
         if format_element is None:
@@ -925,24 +911,19 @@ class ConfigConverter:
             container = "MP4"  # Default
             container_settings_key = "Mp4Settings"
         
+        specs = self._stream_specs(streams, context)
+        
         # Process each stream in the original order
-        for i, stream in enumerate(streams):
-            has_video = False
-            has_audio = False
-            
-            # Check for video parameters
-            if 'size' in stream or 'bitrate' in stream:
-                has_video = True
-            
-            # Check for audio parameters
-            if 'audio_bitrate' in stream or 'audio_sample_rate' in stream:
-                has_audio = True
+        for i, spec in enumerate(specs):
+            # Detect the stream type from the parameters that are present
+            has_video = spec.has_video_params
+            has_audio = spec.has_audio_params
             
             # Override detection with explicit flags
-            if stream.get('audio_only') == 'yes':
+            if spec.audio_only:
                 has_video = False
                 has_audio = True
-            elif stream.get('video_only') == 'yes':
+            elif spec.video_only:
                 has_video = True
                 has_audio = False
             
@@ -983,23 +964,19 @@ class ConfigConverter:
             if has_video and has_audio:
                 # Combined video+audio stream
                 name_modifier = f"_video_audio_{i+1}"
-                if 'size' in stream:
-                    name_modifier = f"_{stream['size']}"
-                if 'bitrate' in stream:
-                    bitrate_match = re.match(r'(\d+)k', stream['bitrate'])
-                    if bitrate_match:
-                        name_modifier += f"_{bitrate_match.group(1)}K"
-                if 'audio_bitrate' in stream:
-                    audio_bitrate_match = re.match(r'(\d+)k', stream['audio_bitrate'])
-                    if audio_bitrate_match:
-                        name_modifier += f"_audio_{audio_bitrate_match.group(1)}K"
-                if 'audio_codec' in stream:
-                    if stream['audio_codec'] == "eac3":
+                if spec.size is not None:
+                    name_modifier = f"_{spec.size}"
+                if spec.name_bitrate('bitrate'):
+                    name_modifier += f"_{spec.name_bitrate('bitrate')}K"
+                if spec.name_bitrate('audio_bitrate'):
+                    name_modifier += f"_audio_{spec.name_bitrate('audio_bitrate')}K"
+                if spec.audio_codec is not None:
+                    if spec.audio_codec == "eac3":
                         name_modifier += "_eac3"
-                    elif stream['audio_codec'] in ["dolby_aac", "dolby_heaac", "libfaac"]:
+                    elif spec.audio_codec in ["dolby_aac", "dolby_heaac", "libfaac"]:
                         name_modifier += "_aac"
-                if 'audio_channels_number' in stream:
-                    channels = int(stream['audio_channels_number'])
+                if spec.audio_channels is not None:
+                    channels = spec.audio_channels
                     if channels == 6:
                         name_modifier += "_surround"
                     elif channels == 2:
@@ -1012,33 +989,29 @@ class ConfigConverter:
             elif has_video:
                 # Video-only stream
                 name_modifier = f"_video_{i+1}"
-                if 'size' in stream:
-                    name_modifier = f"_{stream['size']}"
-                if 'bitrate' in stream:
-                    bitrate_match = re.match(r'(\d+)k', stream['bitrate'])
-                    if bitrate_match:
-                        name_modifier += f"_{bitrate_match.group(1)}K"
+                if spec.size is not None:
+                    name_modifier = f"_{spec.size}"
+                if spec.name_bitrate('bitrate'):
+                    name_modifier += f"_{spec.name_bitrate('bitrate')}K"
                 
                 self.logger.debug(f"Generated video-only output structure with name modifier: {name_modifier}")
             
             elif has_audio:
                 # Audio-only stream
                 name_modifier = f"_audio_{i+1}"
-                if 'audio_bitrate' in stream:
-                    audio_bitrate_match = re.match(r'(\d+)k', stream['audio_bitrate'])
-                    if audio_bitrate_match:
-                        name_modifier = f"_audio_{audio_bitrate_match.group(1)}K"
+                if spec.name_bitrate('audio_bitrate'):
+                    name_modifier = f"_audio_{spec.name_bitrate('audio_bitrate')}K"
                 
                 # Add codec info to name modifier
-                if 'audio_codec' in stream:
-                    if stream['audio_codec'] == "eac3":
+                if spec.audio_codec is not None:
+                    if spec.audio_codec == "eac3":
                         name_modifier += "_eac3"
-                    elif stream['audio_codec'] in ["dolby_aac", "dolby_heaac", "libfaac"]:
+                    elif spec.audio_codec in ["dolby_aac", "dolby_heaac", "libfaac"]:
                         name_modifier += "_aac"
                 
                 # Add channels info to name modifier
-                if 'audio_channels_number' in stream:
-                    channels = int(stream['audio_channels_number'])
+                if spec.audio_channels is not None:
+                    channels = spec.audio_channels
                     if channels == 6:
                         name_modifier += "_surround"
                     elif channels == 2:
@@ -1047,14 +1020,14 @@ class ConfigConverter:
                         name_modifier += "_mono"
 
                 # Add language info to name modifier if available
-                if 'language' in stream:
-                    language = stream['language'].lower()
+                if spec.language is not None:
+                    language = str(spec.language).lower()
                     name_modifier += f"_{language}"
         
                 
                 # Add language info from alternate_source_mapping if use_alternate_id is present
-                if 'use_alternate_id' in stream and 'alternate_source_mapping' in context:
-                    alternate_id = stream['use_alternate_id']
+                if spec.use_alternate_id is not None and 'alternate_source_mapping' in context:
+                    alternate_id = spec.use_alternate_id
                     mapping = context['alternate_source_mapping']
                     
                     # Convert to string key for dictionary lookup if needed
@@ -1097,8 +1070,16 @@ class ConfigConverter:
             else:
                 target[key] = value
                 
-    def _set_nested_value(self, target_dict: Dict, path: str, value: Any) -> None:
-        """Helper method to properly set nested values, handling array indices correctly"""
+    def _set_nested_value(self, target_dict: Dict, path: str, value: Any) -> bool:
+        """
+        Helper method to properly set nested values, handling array indices correctly
+        
+        Returns:
+            False if write validation rejected the value, True otherwise
+        """
+        if self.write_schema is not None and not self._check_write(path, value):
+            return False
+        
         parts = path.split('.')
         current = target_dict
         
@@ -1141,8 +1122,8 @@ class ConfigConverter:
                     if isinstance(value, dict) and part in current and isinstance(current[part], dict):
                         self._merge_dicts(current[part], value)
                     else:
-                        # Check if we're overwriting an existing value and log it
-                        if part in current and current[part] != value:
+                        # Only paths that several rules can write are checked for overwrites
+                        if path in self._contested_paths and part in current and current[part] != value:
                             self.logger.debug(f"Overwriting existing value at {path}: {current[part]} -> {value}")
                         
                         # Add special logging for OutputGroupSettings
@@ -1154,6 +1135,89 @@ class ConfigConverter:
                     if part not in current:
                         current[part] = {}
                     current = current[part]
+        return True
+    
+    def _check_write(self, path: str, value: Any, origin: str = None, can_reject: bool = True) -> bool:
+        """
+        Validate a value written to the Settings object against the schema
+        
+        The path is resolved through the validator's allowed-keys index and the value
+        is checked against the schema node found there, so a bad write is caught
+        when it happens and attributed to the rule (or converter step) making it.
+        Invalid writes are logged and recorded in write_violations.
+        
+        Args:
+            path: Target path, e.g. Settings.OutputGroups[0].Outputs[0].VideoDescription.Width
+            value: Value being written
+            origin: Description of the writer; defaults to the rule currently being applied
+            can_reject: Whether reject_invalid_writes applies to this write
+            
+        Returns:
+            False if the write is invalid and must be dropped, True otherwise
+        """
+        # Only the Settings object is described by the schema
+        if path == 'Settings':
+            settings_path = ''
+        elif path.startswith('Settings.'):
+            settings_path = path[len('Settings.'):]
+        else:
+            return True
+        
+        # Worker processes receive the converter without its validator
+        if self.write_validator is None:
+            self.write_validator = MediaConvertConfigValidator(self.write_schema)
+        
+        errors = self.write_validator.validate_value(settings_path, value)
+        if not errors:
+            return True
+        
+        origin = origin or self._describe_write_origin()
+        rejected = can_reject and self.reject_invalid_writes
+        self.write_violations.append({
+            'path': path,
+            'value': value,
+            'origin': origin,
+            'stream': self._write_stream,
+            'errors': errors,
+            'rejected': rejected,
+        })
+        stream_note = f" (stream {self._write_stream + 1})" if self._write_stream is not None else ""
+        self.logger.warning(f"{'Rejected' if rejected else 'Invalid'} write to {path} by {origin}{stream_note}: "
+                            f"{'; '.join(errors)}")
+        return not rejected
+    
+    def _describe_write_origin(self) -> str:
+        """Describe the rule or converter step making the current write"""
+        origin = self._write_origin
+        if origin is None:
+            return "converter"
+        if isinstance(origin, str):
+            return origin
+        rule_index = next((i for i, rule in enumerate(self.rules) if rule is origin), None)
+        return f"rule #{rule_index} ({origin['source'].get('path')})"
+    
+    def _template_passes_validation(self, template: Union[str, Dict]) -> bool:
+        """Check a template against the schema, once per template file version, for write validation"""
+        if isinstance(template, dict):
+            return self._template_settings_valid(template, "in-memory template")
+        
+        template_path = os.path.abspath(template)
+        stat = os.stat(template_path)
+        key = (template_path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._template_validity:
+            self._template_validity[key] = self._template_settings_valid(self._template_cache[template_path][1], template)
+        return self._template_validity[key]
+    
+    def _template_settings_valid(self, template: Dict, name: str) -> bool:
+        """Return True if the Settings of a template pass schema validation"""
+        if self.write_validator is None:
+            self.write_validator = MediaConvertConfigValidator(self.write_schema)
+        schema_errors, unknown_errors = self.write_validator.collect_errors(template.get('Settings', {}), fail_fast=True)
+        if schema_errors or unknown_errors:
+            self.logger.warning(f"Template {name} does not pass schema validation; "
+                                f"conversions using it still need the full validation pass")
+            return False
+        return True
                     
     def _ensure_path_exists(self, data: Dict, path: str) -> None:
         """Ensure that a nested path exists in the dictionary"""
@@ -1211,50 +1275,348 @@ class ConfigConverter:
         if not bitrate_str:
             return 0
             
-        # Convert to string if it's not already
-        bitrate_str = str(bitrate_str).lower().strip()
+        bitrate = parse_bitrate(bitrate_str)
+        if bitrate is None:
+            self.logger.warning(f"Failed to parse bitrate: {bitrate_str}")
+            return 0
+        return bitrate
+    
+    def _stream_spec(self, source: Union[Dict, StreamSpec]) -> StreamSpec:
+        """Return the typed view of a stream, building it if a raw dictionary is passed"""
+        if isinstance(source, StreamSpec):
+            return source
+        return StreamSpec(source, self.logger)
+    
+    def _apply_stream_settings(self, outputs: List, specs: List[StreamSpec], start_index: int,
+                               total_streams: int, context: Dict):
+        """
+        Apply rate control, audio settings and stream rules to consecutive rungs of a ladder
         
-        # Check for common formats
-        if bitrate_str.endswith('k'):
-            try:
-                return int(float(bitrate_str[:-1]) * 1000)
-            except (ValueError, TypeError):
-                self.logger.warning(f"Failed to parse bitrate: {bitrate_str}")
-                return 0
-        elif bitrate_str.endswith('m'):
-            try:
-                return int(float(bitrate_str[:-1]) * 1000000)
-            except (ValueError, TypeError):
-                self.logger.warning(f"Failed to parse bitrate: {bitrate_str}")
-                return 0
-        else:
-            # Assume it's already in bits per second
-            try:
-                return int(float(bitrate_str))
-            except (ValueError, TypeError):
-                self.logger.warning(f"Failed to parse bitrate: {bitrate_str}")
-                return 0
+        Each output is updated in place. This runs in the converting process for
+        serial conversions and inside the worker processes for parallel ones.
+        
+        Args:
+            outputs: Basic outputs generated for the streams, updated in place
+            specs: StreamSpec of each stream, in the same order as outputs
+            start_index: Position of the first stream within the whole ladder
+            total_streams: Number of streams in the whole ladder, used for logging
+            context: Context dictionary with source_data and other information
+            
+        Returns:
+            Tuple of (group_settings, processed_params); group_settings holds the
+            OutputGroupSettings written by the rules of stream 0 and is empty for
+            any other range
+        """
+        # Streams of a ladder often repeat the same parameters, so rule results are
+        # memoized while the rungs are processed
+        self._rule_memo = {}
+        rule_lookup, dummy_rules = self._build_stream_rule_lookup()
+        processed_params = set()
+        group_settings = {}
+        
+        # 已经通过_process_rate_control_settings和_process_audio_settings处理过的参数
+        rate_control_params = ['cbr', 'hard_cbr', 'cabr', 'bitrate', 'maxrate', 'minrate']
+        audio_params = ['audio_codec', 'audio_bitrate', 'audio_sample_rate', 'audio_maxrate', 'audio_minrate']
+        
+        for i, (output, spec) in enumerate(zip(outputs, specs), start_index):
+            stream = spec.raw
+            self.stream_outcome_marks.append((i, len(self.mapped_parameters), len(self.unmapped_parameters)))
+            
+            # View of the job settings whose only output is the final output of this rung
+            output_group = {"Outputs": [output], "OutputGroupSettings": {}}
+            stream_target = {"Settings": {"OutputGroups": [output_group]}}
+            
+            # Add audio_selectors to the view if available in context
+            if 'audio_selectors' in context:
+                stream_target["Settings"]["Inputs"] = [{"AudioSelectors": context['audio_selectors']}]
+                self.logger.debug(f"Added AudioSelectors to stream target for output {i}")
+            
+            # logging for processing start of a stream
+            self._log_top_header(f"Applying rules to stream {i+1}/{total_streams}", fill_char='=')
+            self.logger.debug(f"The structure of stream is {stream}")
+            
+            # Apply rate control settings for video (skip for audio-only outputs)
+            # Stream data is used instead of global source_data so that
+            # stream-specific settings like cbr, bitrate, etc. are picked up
+            self._write_stream = i
+            if "VideoDescription" in output:
+                self._write_origin = "rate control settings"
+                rate_control_processed = self._process_rate_control_settings(spec, stream_target)
+                if rate_control_processed:
+                    processed_params.update(rate_control_processed)
+                self.logger.debug(f"Applied rate control settings for output {i} using stream-specific data")
+            else:
+                self.logger.debug(f"Skipping rate control settings for audio-only output {i}")
+            
+            # Apply audio settings (skip for video-only outputs)
+            if "AudioDescriptions" in output:
+                self._write_origin = "audio settings"
+                audio_processed = self._process_audio_settings(spec, stream_target)
+                if audio_processed:
+                    processed_params.update(audio_processed)
+                self.logger.debug(f"Applied audio settings for output {i} using stream-specific data")
+            else:
+                self.logger.debug(f"Skipping audio settings for video-only output {i}")
+            self._write_origin = None
+            
+            stream_processed_params = set()
+            
+            self._log_top_header(f"Processing dummy rule")
+            # 处理当前stream的dummy规则
+            for rule in dummy_rules:
+                source_path = rule['source']['path']
+                # 使用当前stream作为source_data，而不是全局source_data
+                source_value = self.get_value_by_path(stream, source_path)
+                
+                # 只有当 source_value 不是 None 时才进行处理
+                if source_value is not None:
+                    stream_processed_params.add(source_path)
+                    # Log the dummy rule match
+                    self.logger.info(f"Mapped parameter: {source_path}={source_value} → [DUMMY RULE]")
+                    # 添加到mapped_parameters列表
+                    if not hasattr(self, 'mapped_parameters'):
+                        self.mapped_parameters = []
+                    self.mapped_parameters.append((source_path, source_value, [("DUMMY_RULE", None)]))
+            self._log_bottom_header(f"Finished dummy rule processing")
+            
+            # 检查stream中的每个参数，如果是rate_control_params或audio_params中的参数，则添加到stream_processed_params中
+            for param in rate_control_params + audio_params:
+                if param in stream:
+                    stream_processed_params.add(param)
+                    self.logger.debug(f"Added pre-processed parameter {param} to stream_processed_params for stream {i}")
+            
+            # insert stream data into context for processing rule
+            context["current_stream"] = stream
+            
+            # Process the stream with rules; 'stream' rules are excluded from the
+            # lookup so this cannot recurse. The complete stream is passed as both
+            # source_data and current_dict to maintain full context
+            self._process_source_data(stream, "", rule_lookup, stream_target, stream_processed_params, context, stream)
+            
+            # A rule may have replaced the output object itself; fold it back in
+            processed_output = output_group["Outputs"][0]
+            if processed_output is not output:
+                for key, value in processed_output.items():
+                    if key not in output:
+                        output[key] = value
+                    elif isinstance(output[key], dict) and isinstance(value, dict):
+                        output[key].update(value)
+            
+            # Video-only and audio-only rungs must not carry the other kind of description
+            self._strip_disabled_descriptions(output, spec, i)
+            
+            # Add the stream's processed parameters to the global set
+            processed_params.update(stream_processed_params)
+            
+            # Group settings are taken from the first rung only
+            if i == 0 and output_group.get("OutputGroupSettings"):
+                group_settings = output_group["OutputGroupSettings"]
+                self.logger.info(f"Extracted OutputGroupSettings from first stream: {group_settings}")
+        
+        self._write_stream = None
+        self.stream_outcome_marks.append((None, len(self.mapped_parameters), len(self.unmapped_parameters)))
+        return group_settings, processed_params
+    
+    def _apply_stream_settings_parallel(self, outputs: List, specs: List[StreamSpec], context: Dict):
+        """
+        Apply stream settings with a pool of worker processes
+        
+        The ladder is split into contiguous chunks, one per worker. Every worker
+        runs _apply_stream_settings() on its chunk with its own copy of the
+        converter, and the results are merged back in stream order, so outputs,
+        mapped/unmapped parameters and the group settings of stream 0 are the same
+        as for a serial conversion.
+        
+        Returns:
+            Tuple of (outputs, group_settings, processed_params), or None if the
+            work could not be sent to the worker processes, in which case the
+            caller falls back to serial processing
+        """
+        workers = self.stream_workers
+        chunk_size = -(-len(specs) // workers)
+        chunks = [(start, outputs[start:start + chunk_size], specs[start:start + chunk_size])
+                  for start in range(0, len(specs), chunk_size)]
+        
+        # Only the parts of the context the stream rules read are sent to the workers
+        worker_context = {key: context[key] for key in ('source_data', 'alternate_source_mapping', 'audio_selectors')
+                          if key in context}
+        worker_context['processing_streams'] = True
+        
+        try:
+            pool = self._get_stream_pool()
+            futures = [pool.submit(_apply_stream_settings_chunk, start, chunk_outputs, chunk_specs,
+                                   len(specs), worker_context)
+                       for start, chunk_outputs, chunk_specs in chunks]
+            results = [future.result() for future in futures]
+        except (pickle.PicklingError, AttributeError, TypeError, BrokenProcessPool) as e:
+            self.logger.warning(f"Parallel stream processing unavailable ({e}), processing streams serially")
+            self.close()
+            return None
+        
+        self.logger.info(f"Applied stream settings to {len(specs)} streams using {len(chunks)} worker processes")
+        
+        merged_outputs = []
+        group_settings = {}
+        processed_params = set()
+        for (start, _, _), (chunk_outputs, chunk_group_settings, chunk_processed, mapped, unmapped,
+                            violations, marks) in zip(chunks, results):
+            merged_outputs.extend(chunk_outputs)
+            processed_params.update(chunk_processed)
+            self.stream_outcome_marks.extend(
+                (stream_index, mapped_count + len(self.mapped_parameters), unmapped_count + len(self.unmapped_parameters))
+                for stream_index, mapped_count, unmapped_count in marks)
+            self.mapped_parameters.extend(mapped)
+            self.unmapped_parameters.extend(unmapped)
+            self.write_violations.extend(violations)
+            
+            # Group settings are taken from the first rung only
+            if start == 0 and chunk_group_settings:
+                group_settings = chunk_group_settings
+                self.logger.info(f"Extracted OutputGroupSettings from first stream: {group_settings}")
+        
+        context['current_stream'] = specs[-1].raw
+        return merged_outputs, group_settings, processed_params
+    
+    def _get_stream_pool(self) -> ProcessPoolExecutor:
+        """Return the worker pool used for parallel stream processing, starting it if needed"""
+        if self._stream_pool is None:
+            self._stream_pool = ProcessPoolExecutor(max_workers=self.stream_workers,
+                                                    initializer=_init_stream_worker,
+                                                    initargs=(self,))
+        return self._stream_pool
+    
+    def parameter_outcomes(self) -> List[Tuple]:
+        """
+        Return the mapping outcome of every parameter of the last conversion
+        
+        Returns:
+            List of (stream_index, path, value, outcome, detail) tuples: outcome is
+            'mapped' (detail: the target paths) or 'unmapped' (detail: the reason).
+            stream_index is None for profile-level parameters; stream parameter paths
+            are relative to their stream.
+        """
+        marks = getattr(self, 'stream_outcome_marks', [])
+        
+        def stream_of(position, counts):
+            # The last stream boundary at or before the entry
+            mark = bisect.bisect_right(counts, position) - 1
+            return marks[mark][0] if mark >= 0 else None
+        
+        mapped_counts = [mark[1] for mark in marks]
+        unmapped_counts = [mark[2] for mark in marks]
+        outcomes = []
+        for position, (path, value, targets) in enumerate(getattr(self, 'mapped_parameters', [])):
+            target_paths = [target for target, _ in targets if target != "DUMMY_RULE"]
+            outcomes.append((stream_of(position, mapped_counts), path, value, 'mapped', target_paths))
+        for position, (path, value, reason) in enumerate(getattr(self, 'unmapped_parameters', [])):
+            outcomes.append((stream_of(position, unmapped_counts), path, value, 'unmapped', reason))
+        return outcomes
+    
+    def close(self) -> None:
+        """Shut down the worker processes used for parallel stream processing"""
+        if self._stream_pool is not None:
+            self._stream_pool.shutdown()
+            self._stream_pool = None
+    
+    def __getstate__(self):
+        # Worker processes get the rules and custom functions, not the pool or the caches
+        state = self.__dict__.copy()
+        state['_stream_pool'] = None
+        state['_template_cache'] = {}
+        state['_rule_memo'] = None
+        state['write_validator'] = None
+        state['_template_validity'] = {}
+        return state
+    
+    def _build_stream_rule_lookup(self):
+        """
+        Index the rules that apply to individual streams by source path
+        
+        Rules that target the 'stream' path itself are skipped to avoid recursion,
+        and dummy rules are returned separately.
+        
+        Returns:
+            Tuple of (rule_lookup, dummy_rules)
+        """
+        rule_lookup = {}
+        dummy_rules = []
+        
+        for rule in self.rules:
+            # Skip rules that target stream path to avoid recursion
+            if rule['source'].get('path') == 'stream':
+                self.logger.info("Skipping stream rule to avoid recursion")
+                continue
+                
+            if rule['source'].get('type') == 'dummy':
+                dummy_rules.append(rule)
+                continue
+                
+            source_path = rule['source']['path']
+            if source_path not in rule_lookup:
+                rule_lookup[source_path] = []
+            rule_lookup[source_path].append(rule)
+        
+        return rule_lookup, dummy_rules
+    
+    def _strip_disabled_descriptions(self, output: Dict, stream: Union[Dict, StreamSpec], index: int) -> None:
+        """
+        Remove AudioDescriptions from video_only outputs and VideoDescription from audio_only outputs
+        
+        Args:
+            output: MediaConvert output generated for the stream
+            stream: Stream dictionary or its StreamSpec
+            index: Position of the output, used for logging
+        """
+        spec = self._stream_spec(stream)
+        
+        # Handle video_only streams - they should not have AudioDescriptions
+        if spec.video_only and 'AudioDescriptions' in output:
+            self.logger.info(f"Removing AudioDescriptions from output {index} because video_only=yes is set")
+            output.pop('AudioDescriptions', None)
+        
+        # Handle audio_only streams - they should not have VideoDescription
+        if spec.audio_only and 'VideoDescription' in output:
+            self.logger.info(f"Removing VideoDescription from output {index} because audio_only=yes is set")
+            output.pop('VideoDescription', None)
+    
+    def _stream_specs(self, streams: List, context: Dict) -> List[StreamSpec]:
+        """
+        Return the typed views for a list of streams
+        
+        Reuses the views convert() stored in context['stream_specs'] when they
+        belong to the same stream dictionaries, otherwise builds them.
+        """
+        specs = context.get('stream_specs') if context else None
+        if specs is not None and len(specs) == len(streams) and all(
+                spec.raw is stream for spec, stream in zip(specs, streams)):
+            return specs
+        specs = [self._stream_spec(stream) for stream in streams]
+        if context is not None:
+            context['stream_specs'] = specs
+        return specs
     
-    def _process_rate_control_settings(self, source_data: Dict, target_data: Dict) -> set:
+    def _process_rate_control_settings(self, source_data: Union[Dict, StreamSpec], target_data: Dict) -> set:
         """
         Process rate control settings (CBR/VBR/QVBR) based on complex rules
         
         Args:
-            source_data: Source data dictionary
+            source_data: Source data dictionary or its pre-parsed StreamSpec
             target_data: Target data dictionary to update
             
         Returns:
             Set of processed parameter names
         """
+        spec = self._stream_spec(source_data)
+        
         # Check if output is mp4, otherwise log warning and return
-        output_format = self.get_value_by_path(source_data, 'output')
+        output_format = spec.output
         # if output_format != 'mp4':
         #     self.logger.warning(f"Rate control settings processing is only supported for MP4 output, got {output_format}. "
         #                        "Need to add independent processing function for this format.")
         #     return False
         
         # Determine the target path based on video_codec
-        video_codec = self.get_value_by_path(source_data, 'video_codec')
+        video_codec = spec.video_codec
         
         # Set the target path based on video_codec
         if video_codec in ['libx264', 'mpeg4'] or not video_codec:
@@ -1275,18 +1637,18 @@ class ConfigConverter:
             target_path = "Settings.OutputGroups[0].Outputs[0].VideoDescription.CodecSettings.H264Settings"
             self.logger.warning(f"Unknown video_codec={video_codec}, defaulting to H264Settings")
         
-        # Get relevant source parameters
-        cbr = self.get_value_by_path(source_data, 'cbr')
-        hard_cbr = self.get_value_by_path(source_data, 'hard_cbr')
-        cabr = self.get_value_by_path(source_data, 'cabr')
-        bitrate_str = self.get_value_by_path(source_data, 'bitrate')
-        maxrate_str = self.get_value_by_path(source_data, 'maxrate')
-        minrate_str = self.get_value_by_path(source_data, 'minrate')
-        
-        # Parse bitrate values
-        bitrate = self._parse_bitrate(bitrate_str)
-        maxrate = self._parse_bitrate(maxrate_str)
-        minrate = self._parse_bitrate(minrate_str)
+        # Get relevant source parameters (flags are True/False, or None if absent or not yes/no)
+        cbr = spec.cbr
+        hard_cbr = spec.hard_cbr
+        cabr = spec.cabr
+        bitrate_str = spec.text('bitrate')
+        maxrate_str = spec.text('maxrate')
+        minrate_str = spec.text('minrate')
+        
+        # Bitrates are already parsed to bits per second
+        bitrate = spec.bitrate
+        maxrate = spec.maxrate
+        minrate = spec.minrate
         
         # Track if we've processed these parameters
         processed_params = set()
@@ -1295,18 +1657,18 @@ class ConfigConverter:
         use_cbr = False
         
         # Case 1: If either <cbr> or <hard_cbr> exists and is set to "yes"
-        if (cbr is not None and cbr == 'yes') or (hard_cbr is not None and hard_cbr == 'yes'):
+        if cbr is True or hard_cbr is True:
             use_cbr = True
             
             # Mark both parameters as processed if they exist
-            if cbr is not None:
+            if spec.has('cbr'):
                 processed_params.add('cbr')
-            if hard_cbr is not None:
+            if spec.has('hard_cbr'):
                 processed_params.add('hard_cbr')
                 
             # Set CBR mode
             self._set_nested_value(target_data, f"{target_path}.RateControlMode", "CBR")
-            self.logger.info(f"Set RateControlMode to CBR because {'<cbr>=yes' if cbr == 'yes' else ''} {'<hard_cbr>=yes' if hard_cbr == 'yes' else ''}")
+            self.logger.info(f"Set RateControlMode to CBR because {'<cbr>=yes' if cbr is True else ''} {'<hard_cbr>=yes' if hard_cbr is True else ''}")
             
             # Set bitrate if available
             if bitrate_str:
@@ -1323,15 +1685,15 @@ class ConfigConverter:
                 processed_params.add('minrate')
         
         # Case 2: If both <cbr> and <hard_cbr> are explicitly set to "no"
-        elif (cbr is not None and cbr == 'no') and (hard_cbr is not None and hard_cbr == 'no'):
+        elif cbr is False and hard_cbr is False:
             processed_params.add('cbr')
             processed_params.add('hard_cbr')
             
             # Check for cabr parameter
-            if cabr is not None:
+            if spec.has('cabr'):
                 processed_params.add('cabr')
                 
-                if cabr == 'yes':
+                if cabr is True:
                     # Case 2.a: cbr=no, hard_cbr=no, cabr=yes
                     self._set_nested_value(target_data, f"{target_path}.RateControlMode", "QVBR")
                     self.logger.info(f"Set RateControlMode to QVBR because <cbr>=no, <hard_cbr>=no, and <cabr>=yes")
@@ -1348,7 +1710,7 @@ class ConfigConverter:
                         self.logger.info(f"Ignoring <bitrate>={bitrate_str} in QVBR mode (using MaxBitrate instead)")
                         processed_params.add('bitrate')
                         
-                elif cabr == 'no':
+                elif cabr is False:
                     # Case 2.b: cbr=no, hard_cbr=no, cabr=no
                     self._set_nested_value(target_data, f"{target_path}.RateControlMode", "VBR")
                     self.logger.info(f"Set RateControlMode to VBR because <cbr>=no, <hard_cbr>=no, and <cabr>=no")
@@ -1385,21 +1747,21 @@ class ConfigConverter:
                         processed_params.add('minrate')
         
         # Case 3: If <cbr> is set to "no" but <hard_cbr> is not specified or vice versa
-        elif (cbr is not None and cbr == 'no') or (hard_cbr is not None and hard_cbr == 'no'):
+        elif cbr is False or hard_cbr is False:
             # Mark the parameter that exists as processed
-            if cbr is not None:
+            if spec.has('cbr'):
                 processed_params.add('cbr')
-            if hard_cbr is not None:
+            if spec.has('hard_cbr'):
                 processed_params.add('hard_cbr')
                 
             # Check for cabr parameter
-            if cabr is not None:
+            if spec.has('cabr'):
                 processed_params.add('cabr')
                 
-                if cabr == 'yes':
+                if cabr is True:
                     # Case 3.a: Either cbr=no or hard_cbr=no, cabr=yes
                     self._set_nested_value(target_data, f"{target_path}.RateControlMode", "QVBR")
-                    self.logger.info(f"Set RateControlMode to QVBR because {'<cbr>=no' if cbr == 'no' else ''} {'<hard_cbr>=no' if hard_cbr == 'no' else ''} and <cabr>=yes")
+                    self.logger.info(f"Set RateControlMode to QVBR because {'<cbr>=no' if cbr is False else ''} {'<hard_cbr>=no' if hard_cbr is False else ''} and <cabr>=yes")
                     
                     if maxrate_str:
                         self._set_nested_value(target_data, f"{target_path}.MaxBitrate", maxrate)
@@ -1413,10 +1775,10 @@ class ConfigConverter:
                         self.logger.info(f"Ignoring <bitrate>={bitrate_str} in QVBR mode (using MaxBitrate instead)")
                         processed_params.add('bitrate')
                         
-                elif cabr == 'no':
+                elif cabr is False:
                     # Case 3.b: Either cbr=no or hard_cbr=no, cabr=no
                     self._set_nested_value(target_data, f"{target_path}.RateControlMode", "VBR")
-                    self.logger.info(f"Set RateControlMode to VBR because {'<cbr>=no' if cbr == 'no' else ''} {'<hard_cbr>=no' if hard_cbr == 'no' else ''} and <cabr>=no")
+                    self.logger.info(f"Set RateControlMode to VBR because {'<cbr>=no' if cbr is False else ''} {'<hard_cbr>=no' if hard_cbr is False else ''} and <cabr>=no")
                     
                     if bitrate_str:
                         self._set_nested_value(target_data, f"{target_path}.Bitrate", bitrate)
@@ -1432,7 +1794,7 @@ class ConfigConverter:
                 if bitrate_str:
                     # Set RateControlMode to VBR
                     self._set_nested_value(target_data, f"{target_path}.RateControlMode", "VBR")
-                    self.logger.info(f"Set RateControlMode to VBR because {'<cbr>=no' if cbr == 'no' else ''} {'<hard_cbr>=no' if hard_cbr == 'no' else ''} and <cabr> doesn't exist")
+                    self.logger.info(f"Set RateControlMode to VBR because {'<cbr>=no' if cbr is False else ''} {'<hard_cbr>=no' if hard_cbr is False else ''} and <cabr> doesn't exist")
                     
                     # Set Bitrate
                     self._set_nested_value(target_data, f"{target_path}.Bitrate", bitrate)
@@ -1531,23 +1893,25 @@ class ConfigConverter:
         
         return processed_params
     
-    def _process_audio_settings(self, source_data: Dict, target_data: Dict) -> bool:
+    def _process_audio_settings(self, source_data: Union[Dict, StreamSpec], target_data: Dict) -> set:
         """
         Process audio codec settings based on complex rules
         
         Args:
-            source_data: Source data dictionary
+            source_data: Source data dictionary or its pre-parsed StreamSpec
             target_data: Target data dictionary to update
             
         Returns:
-            True if audio settings were processed, False otherwise
+            Set of processed parameter names
         """
+        spec = self._stream_spec(source_data)
+        
         # Get relevant source parameters
-        audio_codec = self.get_value_by_path(source_data, 'audio_codec')
-        audio_bitrate_str = self.get_value_by_path(source_data, 'audio_bitrate')
-        audio_sample_rate = self.get_value_by_path(source_data, 'audio_sample_rate')
-        audio_maxrate_str = self.get_value_by_path(source_data, 'audio_maxrate')
-        audio_minrate_str = self.get_value_by_path(source_data, 'audio_minrate')
+        audio_codec = spec.audio_codec
+        audio_bitrate_str = spec.text('audio_bitrate')
+        audio_sample_rate = spec.audio_sample_rate
+        audio_maxrate_str = spec.audio_maxrate
+        audio_minrate_str = spec.audio_minrate
         
         # Track if we've processed these parameters
         processed_params = set()
@@ -1555,18 +1919,10 @@ class ConfigConverter:
         # Get the target path for AudioDescriptions
         target_path = "Settings.OutputGroups[0].Outputs[0].AudioDescriptions[0]"
         
-        # Parse audio bitrate value
-        audio_bitrate = None
+        # Audio bitrate is already parsed to bits per second (0 if it failed to parse)
+        audio_bitrate = spec.audio_bitrate
         if audio_bitrate_str:
             processed_params.add('audio_bitrate')
-            bitrate_match = re.match(r'(\d+)k', audio_bitrate_str)
-            if bitrate_match:
-                audio_bitrate = int(bitrate_match.group(1)) * 1000
-            else:
-                try:
-                    audio_bitrate = int(audio_bitrate_str)
-                except (ValueError, TypeError):
-                    self.logger.warning(f"Failed to parse audio_bitrate: {audio_bitrate_str}")
         
         # Case 1: If <audio_codec> exists and is not empty
         if audio_codec:
@@ -1789,12 +2145,31 @@ class ConfigConverter:
             with open(source_file, 'r') as f:
                 source_data = json.load(f)
         
+        return self.convert_data(source_data, template_file, source_file)
+    
+    def convert_data(self, source_data: Dict, template: Union[str, Dict] = None, source_name: str = "profile") -> Dict:
+        """
+        Convert an already parsed profile
+        
+        Args:
+            source_data: Profile dictionary as returned by parse_xml() or parse_xml_string()
+            template: Template file path, template dictionary (not modified), or None for
+                the default structure
+            source_name: Name of the profile used in log messages
+            
+        Returns:
+            The MediaConvert job settings
+        """
         self.logger.info(f"parsed xml is: {source_data}")
         
+        # Build the typed view of the profile once; the stream generators reuse it
+        profile = SourceProfile.from_dict(source_data, self.logger)
+        
         # Load target template (if provided)
-        if template_file:
-            with open(template_file, 'r') as f:
-                target_data = json.load(f)
+        if isinstance(template, dict):
+            target_data = self._clone_json(template)
+        elif template:
+            target_data = self._load_template(template)
         else:
             target_data = {"Settings": {"OutputGroups": [{}], "Inputs": [{}]}}
         
@@ -1802,6 +2177,12 @@ class ConfigConverter:
         processed_params = set()
         self.mapped_parameters = []  # Track successfully mapped parameters
         self.unmapped_parameters = []  # Track unmapped parameters
+        self.stream_outcome_marks = []  # Stream boundaries within the two lists above
+        self.write_violations = []  # Invalid writes found by write validation
+        self.write_validation_clean = None
+        template_clean = True
+        if self.write_schema is not None and template:
+            template_clean = self._template_passes_validation(template)
 
         # Process alternate_source directly if it exists
         alternate_sources = self.get_value_by_path(source_data, 'alternate_source')
@@ -1823,6 +2204,9 @@ class ConfigConverter:
                     target_data['Settings']['Inputs'] = [{}]
                 
                 # Set AudioSelectors
+                if self.write_schema is not None:
+                    self._check_write('Settings.Inputs[0].AudioSelectors', audio_selectors,
+                                      origin="alternate_source", can_reject=False)
                 target_data['Settings']['Inputs'][0]['AudioSelectors'] = audio_selectors
                 processed_params.add('alternate_source')
                 self.logger.info(f"Added AudioSelectors to Inputs[0] from alternate_source")
@@ -1842,6 +2226,9 @@ class ConfigConverter:
                     alternate_source_mapping = alt_context.get('alternate_source_mapping', {})
                     self.logger.info(f"Retrieved alternate_source_mapping with {len(alternate_source_mapping)} entries, {alternate_source_mapping}")
         
+        # Outputs produced by the ladder engine, re-checked after the top-level rules ran
+        ladder_outputs = []
+        
         # Check if this is a multi-stream configuration from explicit streams
         streams = self.get_value_by_path(source_data, 'stream')
         is_multi_stream = streams is not None and isinstance(streams, list) and len(streams) > 0
@@ -1852,7 +2239,8 @@ class ConfigConverter:
             streams_to_use = streams
             
             # Handle multi-stream scenario using specialized functions
-            context = {'source_data': source_data, 'alternate_source_mapping': alternate_source_mapping}
+            context = {'source_data': source_data, 'alternate_source_mapping': alternate_source_mapping,
+                       'stream_specs': profile.streams}
             
             # Apply settings to the generated outputs
             result = self.generate_outputs_with_settings(streams_to_use, context)
@@ -1881,9 +2269,13 @@ class ConfigConverter:
                     target_data['Settings']['OutputGroups'][0]['Outputs'] = []
                 
                 target_data['Settings']['OutputGroups'][0]['Outputs'].extend(outputs_with_settings)
+                ladder_outputs = outputs_with_settings
                 
                 # Apply group settings if available
                 if group_settings:
+                    if self.write_schema is not None:
+                        self._check_write('Settings.OutputGroups[0].OutputGroupSettings', group_settings,
+                                          origin="ladder group settings", can_reject=False)
                     if 'OutputGroupSettings' not in target_data['Settings']['OutputGroups'][0]:
                         target_data['Settings']['OutputGroups'][0]['OutputGroupSettings'] = {}
                     
@@ -1983,7 +2375,8 @@ class ConfigConverter:
                     self.logger.info("No OutputGroupSettings in non-multi-stream scenario")
             
             # Process rate control settings first (special handling for CBR/VBR/QVBR)
-            if self._process_rate_control_settings(source_data, target_data):
+            self._write_origin = "rate control settings"
+            if self._process_rate_control_settings(profile.format, target_data):
                 # Mark these parameters as processed
                 for param in ['cbr', 'hard_cbr', 'cabr', 'bitrate', 'maxrate', 'minrate']:
                     if self.get_value_by_path(source_data, param) is not None:
@@ -1991,13 +2384,16 @@ class ConfigConverter:
                         self.logger.info(f"Parameter {param} processed by custom rate control handler")
             
             # Process audio settings next (special handling for audio codec and related settings)
-            audio_processed_params = self._process_audio_settings(source_data, target_data)
+            self._write_origin = "audio settings"
+            audio_processed_params = self._process_audio_settings(profile.format, target_data)
             if audio_processed_params:
                 processed_params.update(audio_processed_params)
                 self.logger.info(f"Audio parameters processed by custom audio settings handler")
                 
             # Process video codec settings (set default if needed)
+            self._write_origin = "video codec settings"
             video_processed_params = self._process_video_codec_settings(source_data, target_data)
+            self._write_origin = None
             if video_processed_params:
                 processed_params.update(video_processed_params)
                 self.logger.info(f"Video codec parameters processed by custom video codec handler")
@@ -2051,7 +2447,7 @@ class ConfigConverter:
         self.logger.debug(f"unmapped_ params are: {self.unmapped_parameters}")
 
         # Log summary
-        self.logger.info(f"Conversion summary for {source_file}:")
+        self.logger.info(f"Conversion summary for {source_name}:")
         self.logger.info(f"  - Total parameters: {total_params}")
         if total_params > 0:
             self.logger.info(f"  - Mapped parameters: {mapped_count} ({mapped_count/total_params*100:.1f}%)")
@@ -2078,28 +2474,12 @@ class ConfigConverter:
         # Add NameModifier to FILE_GROUP_SETTINGS outputs if missing
         self._add_missing_name_modifiers(target_data)
         
-        # Check and clean up video_only and audio_only streams
-        streams_to_check = streams if is_multi_stream  else None
-        if streams_to_check and 'Settings' in target_data and 'OutputGroups' in target_data['Settings']:
-            for output_group in target_data['Settings']['OutputGroups']:
-                if 'Outputs' in output_group:
-                    outputs = output_group['Outputs']
-                    for i, output in enumerate(outputs):
-                        # Check if this output corresponds to a stream with video_only or audio_only flag
-                        if i < len(streams_to_check):
-                            stream = streams_to_check[i]
-                            
-                            # Handle video_only streams - they should not have AudioDescriptions
-                            if stream.get('video_only') == 'yes' and 'AudioDescriptions' in output:
-                                self.logger.info(f"Removing AudioDescriptions from output {i} because video_only=yes is set")
-                                output.pop('AudioDescriptions', None)
-                            
-                            # Handle audio_only streams - they should not have VideoDescription
-                            if stream.get('audio_only') == 'yes' and 'VideoDescription' in output:
-                                self.logger.info(f"Removing VideoDescription from output {i} because audio_only=yes is set")
-                                output.pop('VideoDescription', None)
-                                
-                    self.logger.info(f"Cleaned up {len(outputs)} outputs based on video_only/audio_only flags")
+        # Top-level rules may have written descriptions into ladder outputs after the
+        # ladder engine stripped them, so check those outputs once more
+        if ladder_outputs:
+            for i, (output, spec) in enumerate(zip(ladder_outputs, profile.streams)):
+                self._strip_disabled_descriptions(output, spec, i)
+            self.logger.info(f"Cleaned up {len(ladder_outputs)} outputs based on video_only/audio_only flags")
         
         # Add default Extension="m4s" for CMAF_GROUP_SETTINGS outputs without Extension
         if 'Settings' in target_data and 'OutputGroups' in target_data['Settings']:
@@ -2119,7 +2499,80 @@ class ConfigConverter:
                     
                     self.logger.info(f"Checked {len(outputs)} CMAF outputs for missing Extension parameter")
         
+        # With write validation, a profile is known to be valid when no write failed and the
+        # template itself passed, so the full validation pass can be skipped
+        if self.write_schema is not None:
+            self.write_validation_clean = template_clean and not self.write_violations
+            if self.write_violations:
+                rejected = sum(1 for violation in self.write_violations if violation['rejected'])
+                self.logger.warning(f"Write validation found {len(self.write_violations)} invalid writes "
+                                    f"({rejected} rejected) in {source_name}")
+            else:
+                self.logger.info(f"Write validation: all writes for {source_name} conform to the schema")
+        
         return target_data
+    
+    def convert_many(self, documents: Iterable, template: Union[str, Dict] = None,
+                     workers: int = None) -> Iterator[Tuple[int, Dict, Exception]]:
+        """
+        Convert in-memory profiles, yielding each result as soon as it is ready
+        
+        No profile is read from or written to disk. Each document is XML or JSON text
+        (str or bytes) or an already parsed profile dictionary; a (document, template)
+        pair overrides the template for that document. With workers > 1 the documents
+        are converted by a pool of worker processes, each holding a copy of this
+        converter; only a bounded number of documents is in flight, so the input can
+        be a lazy stream.
+        
+        Args:
+            documents: Iterable of documents or (document, template) pairs
+            template: Template file path or dictionary used for every document
+            workers: Number of worker processes; None or 1 converts in this process
+            
+        Yields:
+            Tuples of (index, result, error), in input order. error is the exception
+            raised while converting the document, in which case result is None
+        """
+        def split(item):
+            if isinstance(item, tuple):
+                return item
+            return item, template
+        
+        if not workers or workers <= 1:
+            for index, item in enumerate(documents):
+                document, document_template = split(item)
+                try:
+                    result = self.convert_data(self._load_document(document), document_template, f"document {index}")
+                except Exception as e:
+                    self.logger.error(f"Error converting document {index}: {e}")
+                    yield index, None, e
+                    continue
+                yield index, result, None
+            return
+        
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_stream_worker, initargs=(self,))
+        pending = deque()
+        try:
+            def next_result():
+                index, future = pending.popleft()
+                try:
+                    return index, future.result(), None
+                except Exception as e:
+                    self.logger.error(f"Error converting document {index}: {e}")
+                    return index, None, e
+            
+            for index, item in enumerate(documents):
+                document, document_template = split(item)
+                pending.append((index, executor.submit(_convert_document, index, document, document_template)))
+                if len(pending) >= workers * 2:
+                    yield next_result()
+            while pending:
+                yield next_result()
+        finally:
+            # Documents not yet started when the caller stops early are dropped
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown()
         
     def _add_missing_name_modifiers(self, target_data: Dict) -> None:
         """Add NameModifier to FILE_GROUP_SETTINGS outputs if missing"""
@@ -2222,10 +2675,7 @@ class ConfigConverter:
                 mapped_params_count_before = len(self.mapped_parameters)
                 
                 # Process all rules for this path
-                for rule in rule_lookup[path]:
-                    # self.logger.debug(f"Processing rule with context:{context}")
-                    # Pass the complete source_data to _process_rule to maintain full context
-                    self._process_rule(rule, path, value, source_data, target_data, processed_params, context)
+                self._apply_rules(rule_lookup[path], path, value, source_data, target_data, processed_params, context)
                 
                 # Check if mapped_parameters grew, indicating a rule was successfully applied
                 path_was_processed = len(self.mapped_parameters) > mapped_params_count_before
@@ -2267,6 +2717,113 @@ class ConfigConverter:
                 self._log_bottom_header(f"Finished rule processing for {path}")
                
     
+    def _apply_rules(self, rules, source_path, source_value, source_data, target_data, processed_params, context=None):
+        """
+        Apply the rules for a source path, reusing the result of an identical earlier application within a ladder
+        
+        While generate_outputs_with_settings() runs, the effects of applying the rules of a
+        path (target writes, mapped and unmapped records) are cached under a fingerprint of
+        the path, the mapped value and the stream parameters the rules' conditions and
+        transforms read. A stream that repeats that fingerprint replays the cached effects
+        instead of evaluating the rules again. Outside a ladder the rules are simply
+        processed one by one.
+        """
+        memo = self._rule_memo
+        rate_control_params = ['cbr', 'hard_cbr', 'cabr', 'bitrate', 'maxrate', 'minrate']
+        key = None
+        if memo is not None and not (source_path in rate_control_params and source_path in processed_params):
+            key = self._rule_memo_key(rules, source_path, source_value, source_data)
+        
+        cached = memo.get(key) if key is not None else None
+        if cached is None:
+            if key is not None:
+                mapped_before = len(self.mapped_parameters)
+                unmapped_before = len(self.unmapped_parameters)
+            
+            # Process all rules for this path
+            for rule in rules:
+                # Pass the complete source_data to _process_rule to maintain full context
+                self._process_rule(rule, source_path, source_value, source_data, target_data, processed_params, context)
+            
+            if key is not None:
+                memo[key] = (self._clone_json(self.mapped_parameters[mapped_before:]),
+                             list(self.unmapped_parameters[unmapped_before:]))
+            return
+        
+        # Replay the cached effects on this stream's output
+        processed_params.add(source_path)
+        mapped, unmapped = cached
+        for mapped_path, mapped_value, target_mappings in mapped:
+            target_mappings = self._clone_json(target_mappings)
+            self._write_origin = f"rules for {mapped_path} (cached)"
+            for target_path, target_value in target_mappings:
+                self._set_nested_value(target_data, target_path, target_value)
+            self._write_origin = None
+            self.logger.info(f"Mapped parameter: {mapped_path}={mapped_value} → {target_mappings} (cached)")
+            self.mapped_parameters.append((mapped_path, mapped_value, target_mappings))
+        self.unmapped_parameters.extend(unmapped)
+    
+    def _rule_memo_key(self, rules, source_path, source_value, source_data):
+        """
+        Fingerprint the application of a path's rules for the ladder memo
+        
+        Returns:
+            Hashable key, or None if the rules cannot be memoized
+        """
+        dependencies = self._rule_memo.get(('dependencies', source_path), False)
+        if dependencies is False:
+            dependencies = self._get_rule_dependencies(rules)
+            self._rule_memo[('dependencies', source_path)] = dependencies
+        if dependencies is None:
+            return None
+        try:
+            key = (source_path, self._freeze_value(source_value),
+                   tuple(self._freeze_value(self.get_value_by_path(source_data, path)) for path in dependencies))
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def _get_rule_dependencies(self, rules):
+        """
+        Return the stream parameters, besides the mapped value, that the rules' results depend on
+        
+        These are the source_path entries of their source and target conditions plus the
+        parameters read by transforms such as process_set_aspect_ratio. Rules using custom
+        functions have unknown dependencies, in which case None is returned.
+        """
+        paths = set()
+        for rule in rules:
+            self._collect_condition_paths(rule['source'].get('condition'), paths)
+            targets = rule['target'] if isinstance(rule['target'], list) else [rule['target']]
+            for target in targets:
+                self._collect_condition_paths(target.get('condition'), paths)
+                transform = target.get('transform')
+                if transform in self.custom_functions:
+                    return None
+                if transform == 'process_set_aspect_ratio':
+                    paths.update(['size', 'width', 'height'])
+        return tuple(sorted(paths))
+    
+    def _collect_condition_paths(self, condition, paths: set) -> None:
+        """Collect the source_path entries of a (possibly nested) condition"""
+        if not isinstance(condition, dict):
+            return
+        if 'source_path' in condition:
+            paths.add(condition['source_path'])
+        for subcondition in condition.get('conditions', []):
+            self._collect_condition_paths(subcondition, paths)
+        self._collect_condition_paths(condition.get('condition'), paths)
+    
+    @staticmethod
+    def _freeze_value(value: Any) -> Any:
+        """Turn a parsed source value into a hashable fingerprint that keeps its type"""
+        if isinstance(value, dict):
+            return ('dict', tuple(sorted((key, ConfigConverter._freeze_value(item)) for key, item in value.items())))
+        if isinstance(value, list):
+            return ('list', tuple(ConfigConverter._freeze_value(item) for item in value))
+        return (type(value).__name__, value)
+    
     def _process_rule(self, rule, source_path, source_value, source_data, target_data, processed_params, context=None):
         """Process a single rule for a given source path and value"""
         source_regex = rule['source'].get('regex')
@@ -2413,7 +2970,11 @@ class ConfigConverter:
                     self.logger.info(f"Transformed {original_value} using {transform} to {target_value}")
             
             # Set target value using the improved nested value setter
-            self._set_nested_value(target_data, target_path, target_value)
+            self._write_origin = rule
+            written = self._set_nested_value(target_data, target_path, target_value)
+            self._write_origin = None
+            if not written:
+                continue
             # Log the parameter mapping with more detail
             self.logger.info(f"Mapped parameter: {source_path}={source_value} → {target_path}={target_value}")
             
@@ -2738,12 +3299,57 @@ class ConfigConverter:
                         processed_params.add(path)
 
 
+# Converter copy used by a stream worker process, set by _init_stream_worker
+_stream_worker_converter = None
+
+
+def _init_stream_worker(converter: ConfigConverter):
+    """Initializer of the stream and document worker processes"""
+    global _stream_worker_converter
+    # Workers never start worker processes of their own
+    converter.stream_workers = 1
+    _stream_worker_converter = converter
+
+
+def _apply_stream_settings_chunk(start_index: int, outputs: List, specs: List[StreamSpec],
+                                 total_streams: int, context: Dict):
+    """
+    Apply stream settings to a chunk of a ladder inside a worker process
+    
+    Returns:
+        Tuple of (outputs, group_settings, processed_params, mapped_parameters, unmapped_parameters,
+        write_violations, stream_outcome_marks)
+    """
+    converter = _stream_worker_converter
+    converter.mapped_parameters = []
+    converter.unmapped_parameters = []
+    converter.stream_outcome_marks = []
+    converter.write_violations = []
+    try:
+        group_settings, processed_params = converter._apply_stream_settings(
+            outputs, specs, start_index, total_streams, context)
+    finally:
+        converter._rule_memo = None
+    return (outputs, group_settings, processed_params, converter.mapped_parameters, converter.unmapped_parameters,
+            converter.write_violations, converter.stream_outcome_marks)
+
+
+def _convert_document(index: int, document: Union[str, bytes, Dict], template: Union[str, Dict]) -> Dict:
+    """Convert one in-memory document inside a worker process, see ConfigConverter.convert_many"""
+    converter = _stream_worker_converter
+    return converter.convert_data(converter._load_document(document), template, f"document {index}")
+
+
 def batch_convert(converter: ConfigConverter, source_dir: str, output_dir: str, template_file: str = None, schema_file: str = None):
     """Batch convert all XML files in directory"""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
+    
+    # List the directory once so companion templates are found without a stat per profile
+    source_files = os.listdir(source_dir)
+    available_files = set(source_files)
         
-    for filename in os.listdir(source_dir):
+    for filename in source_files:
         if filename.endswith('.xml') or filename.endswith('.format.xml'):
             source_file = os.path.join(source_dir, filename)
             
@@ -2763,46 +3369,245 @@ def batch_convert(converter: ConfigConverter, source_dir: str, output_dir: str,
             log_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(output_file))[0]}.log")
             setup_file_logging(log_file)
             
-            if os.path.exists(template_path):
+            if template_name in available_files:
                 current_template = template_path
                 logging.info(f"Using template: {template_path}")
             else:
                 current_template = template_file
             
-            try:
-                result = converter.convert(source_file, current_template)
-                with open(output_file, 'w') as f:
-                    json.dump(result, f, indent=2)
-                logging.info(f"Converted {source_file} to {output_file}")
-                print(f"Converted {source_file} to {output_file}")
-                
-                # Validate the converted file if schema is provided
-                if schema_file:
-                    validator = MediaConvertConfigValidator(schema_file)
-                    logging.info(f"Validating {output_file} against schema {schema_file}")
-                    is_valid = validator.validate_config(output_file)
-                    if not is_valid:
-                        error_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(output_file))[0]}.err")
-                        with open(error_file, 'w') as f:
-                            f.write(f"Validation failed for {output_file}\n")
-                            f.write("See log file for details\n")
-                        logging.error(f"Validation failed for {output_file}. Error log written to {error_file}")
-                        print(f"Validation failed for {output_file}. Error log written to {error_file}")
-                    else:
-                        logging.info(f"Validation successful for {output_file}")
-                        print(f"Validation successful for {output_file}")
-                
-            except Exception as e:
-                error_msg = f"Error converting {source_file}: {str(e)}"
-                logging.error(error_msg)
-                print(error_msg)
-                
-                # Write error to .err file
+            convert_profile_file(converter, source_file, output_file, current_template, schema_file)
+
+
+def convert_profile_file(converter: ConfigConverter, source_file: str, output_file: str, template: str = None,
+                         schema_file: str = None, validator: MediaConvertConfigValidator = None) -> bool:
+    """
+    Convert one profile file, validate the output and write a .err file on failure
+    
+    Args:
+        converter: Converter to use
+        source_file: Path to the profile
+        output_file: Path of the converted JSON file; the .err file goes next to it
+        template: Template file for the profile, or None for the default structure
+        schema_file: Optional JSON schema the output is validated against
+        validator: Validator for schema_file to reuse across calls (created if None)
+        
+    Returns:
+        True if the profile converted (and validated, if a schema is given)
+    """
+    output_dir = os.path.dirname(output_file)
+    
+    try:
+        result = converter.convert(source_file, template)
+        with open(output_file, 'w') as f:
+            json.dump(result, f, indent=2)
+        logging.info(f"Converted {source_file} to {output_file}")
+        print(f"Converted {source_file} to {output_file}")
+        
+        # Validate the converted file if schema is provided
+        if schema_file and converter.write_validation_clean:
+            logging.info(f"Skipping validation of {output_file}: every write was validated during conversion")
+            print(f"Validation successful for {output_file} (validated on write)")
+        elif schema_file:
+            if validator is None:
+                validator = MediaConvertConfigValidator(schema_file)
+            logging.info(f"Validating {output_file} against schema {schema_file}")
+            is_valid = validator.validate_config(output_file)
+            if not is_valid:
                 error_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(output_file))[0]}.err")
                 with open(error_file, 'w') as f:
-                    f.write(f"Error converting {source_file}: {str(e)}\n")
+                    f.write(f"Validation failed for {output_file}\n")
+                    f.write("See log file for details\n")
+                logging.error(f"Validation failed for {output_file}. Error log written to {error_file}")
+                print(f"Validation failed for {output_file}. Error log written to {error_file}")
+                return False
+            else:
+                logging.info(f"Validation successful for {output_file}")
+                print(f"Validation successful for {output_file}")
+        return True
+        
+    except Exception as e:
+        error_msg = f"Error converting {source_file}: {str(e)}"
+        logging.error(error_msg)
+        print(error_msg)
+        
+        # Write error to .err file
+        error_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(output_file))[0]}.err")
+        with open(error_file, 'w') as f:
+            f.write(f"Error converting {source_file}: {str(e)}\n")
+        logging.error(f"Error log written to {error_file}")
+        print(f"Error log written to {error_file}")
+    return False
+
+
+def convert_archive(converter: ConfigConverter, archive_path: str, output: str, template_file: str = None,
+                    schema_file: str = None, workers: int = None):
+    """
+    Convert every profile of a tar/zip export bundle without extracting it
+    
+    Profiles are paired with their <name>-setting.json companion from the same bundle
+    (falling back to template_file, as batch_convert does for a directory) and
+    converted with convert_many(). Outputs, and .err files for failures, are written
+    to a directory or, if output names an archive, straight into that archive.
+    
+    Args:
+        converter: Converter to use
+        archive_path: Path to the .zip, .tar or compressed tar bundle
+        output: Output directory or archive path
+        template_file: Template used for profiles without a companion template
+        schema_file: Optional JSON schema the outputs are validated against
+        workers: Number of worker processes used to convert the profiles
+        
+    Returns:
+        Tuple of (converted, failed) counts
+    """
+    validator = MediaConvertConfigValidator(schema_file) if schema_file else None
+    names = {}
+    
+    def documents():
+        for index, (member_name, output_name, document, template) in enumerate(iter_archive_profiles(archive_path)):
+            names[index] = (member_name, output_name)
+            if template is not None:
+                logging.info(f"Using template {posixpath.splitext(output_name)[0]}-setting.json from {archive_path}")
+            yield document, template if template is not None else template_file
+    
+    converted = failed = 0
+    with ArchiveWriter(output) as writer:
+        for index, result, error in converter.convert_many(documents(), workers=workers):
+            member_name, output_name = names.pop(index)
+            source_name = f"{archive_path}:{member_name}"
+            error_name = f"{posixpath.splitext(output_name)[0]}.err"
+            
+            if error is not None:
+                failed += 1
+                error_msg = f"Error converting {source_name}: {str(error)}"
+                logging.error(error_msg)
+                print(error_msg)
+                error_file = writer.write(error_name, f"{error_msg}\n".encode('utf-8'))
                 logging.error(f"Error log written to {error_file}")
-                print(f"Error log written to {error_file}")
+                continue
+            
+            converted += 1
+            output_file = writer.write(output_name, json.dumps(result, indent=2).encode('utf-8'))
+            logging.info(f"Converted {source_name} to {output_file}")
+            print(f"Converted {source_name} to {output_file}")
+            
+            if validator is None:
+                continue
+            if (not workers or workers <= 1) and converter.write_validation_clean:
+                # Serial conversions expose the write validation result of the profile just yielded
+                logging.info(f"Skipping validation of {output_file}: every write was validated during conversion")
+            elif validator.validate_data(result, source_name):
+                logging.info(f"Validation successful for {output_file}")
+            else:
+                error_file = writer.write(error_name, f"Validation failed for {output_file}\nSee log file for details\n".encode('utf-8'))
+                logging.error(f"Validation failed for {output_file}. Error log written to {error_file}")
+                print(f"Validation failed for {output_file}. Error log written to {error_file}")
+    
+    logging.info(f"Converted {converted} profiles from {archive_path} ({failed} failed)")
+    return converted, failed
+
+
+def watch_convert(converter: ConfigConverter, source_dir: str, output_dir: str, template_file: str = None,
+                  schema_file: str = None, debounce: float = 0.5, poll_interval: float = 1.0,
+                  use_notifications: bool = True, stop_event=None) -> int:
+    """
+    Keep output_dir in sync with the profiles of source_dir until stop_event is set
+    
+    The converter and validator stay loaded between edits. Profiles whose output is
+    missing or older than the profile (or its -setting.json template) are converted
+    on start; after that only the profiles that change are reconverted and
+    revalidated. A changed <name>-setting.json reconverts its profile. Saves that
+    leave the profile and its template byte-for-byte unchanged are skipped.
+    
+    Args:
+        converter: Converter to use
+        source_dir: Directory of profiles to watch, as for batch_convert()
+        output_dir: Directory for the converted files, logs and .err files
+        template_file: Template used for profiles without a companion template
+        schema_file: Optional JSON schema the outputs are validated against
+        debounce: Seconds a file must stay unchanged before it is converted
+        poll_interval: Seconds between directory scans when watchdog is not available
+        use_notifications: Use filesystem notifications if watchdog is installed
+        stop_event: threading.Event that ends watching when set (default: run until interrupted)
+        
+    Returns:
+        Number of conversions run
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    validator = MediaConvertConfigValidator(schema_file) if schema_file else None
+    watcher = ProfileWatcher(source_dir, debounce, poll_interval, use_notifications)
+    digests = {}
+    conversions = 0
+    
+    def profiles_for(filename):
+        """Profiles affected by a change to a profile or a companion template"""
+        if not filename.endswith('-setting.json'):
+            return [filename]
+        stem = filename[:-len('-setting.json')]
+        return [name for name in (f"{stem}.format.xml", f"{stem}.xml") if name in watcher_files]
+    
+    def convert_changed(filename, force=False):
+        source_file = os.path.join(source_dir, filename)
+        output_name, template_name = profile_names(filename)
+        output_file = os.path.join(output_dir, output_name)
+        template_path = os.path.join(source_dir, template_name)
+        current_template = template_path if os.path.exists(template_path) else template_file
+        
+        # Editors that save twice, or touch without changing anything, need no reconversion
+        digest = hashlib.sha1()
+        for path in (source_file, current_template):
+            if path:
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        digest = digest.hexdigest()
+        if not force and digests.get(filename) == digest:
+            logging.debug(f"Skipping {source_file}: content unchanged")
+            return False
+        digests[filename] = digest
+        
+        log_file = os.path.join(output_dir, f"{os.path.splitext(output_name)[0]}.log")
+        setup_file_logging(log_file)
+        if current_template == template_path:
+            logging.info(f"Using template: {template_path}")
+        
+        # Drop the error file of a previous failed run; a new one is written if the profile still fails
+        error_file = os.path.join(output_dir, f"{os.path.splitext(output_name)[0]}.err")
+        if os.path.exists(error_file):
+            os.remove(error_file)
+        
+        started = time.perf_counter()
+        ok = convert_profile_file(converter, source_file, output_file, current_template, schema_file, validator)
+        print(f"[watch] {filename}: {'ok' if ok else 'failed'} in {time.perf_counter() - started:.2f}s")
+        return True
+    
+    # Catch up with edits made while nothing was watching
+    watcher_files = set(watcher.scan())
+    for filename in sorted(watcher_files):
+        if filename.endswith('-setting.json'):
+            continue
+        output_name, template_name = profile_names(filename)
+        output_file = os.path.join(output_dir, output_name)
+        inputs = [os.path.join(source_dir, name) for name in (filename, template_name) if name in watcher_files]
+        if os.path.exists(output_file) and all(os.path.getmtime(path) <= os.path.getmtime(output_file) for path in inputs):
+            continue
+        conversions += convert_changed(filename, force=True)
+    
+    print(f"Watching {source_dir} for profile changes ({watcher.mode} mode), press Ctrl+C to stop")
+    for changed in watcher.changes(stop_event):
+        watcher_files = set(watcher.scan())
+        profiles = sorted({profile for filename in changed for profile in profiles_for(filename)})
+        for filename in profiles:
+            if filename not in watcher_files:
+                logging.info(f"{os.path.join(source_dir, filename)} was removed; keeping its converted output")
+                digests.pop(filename, None)
+                continue
+            try:
+                conversions += convert_changed(filename)
+            except OSError as e:
+                # The file was replaced or removed between the change and the conversion
+                logging.warning(f"Could not read {os.path.join(source_dir, filename)}: {e}")
+    
+    return conversions
 
 
 def setup_logging(log_file=None, verbose=False):
@@ -2855,6 +3660,14 @@ def setup_file_logging(log_file, verbose=False):
     logging.info(f"Logging conversion details to: {log_file}")
 
 def main():
+    # "e2mc-converter index ..." builds and queries the parameter index of a profile corpus
+    if sys.argv[1:2] == ['index']:
+        try:
+            from .parameter_index import main as index_main
+        except ImportError:
+            from parameter_index import main as index_main
+        return index_main(sys.argv[2:])
+    
     parser = argparse.ArgumentParser(description='Convert Encoding.com configuration to AWS MediaConvert')
     parser.add_argument('--source', help='Source configuration file (XML) or directory')
     parser.add_argument('--rules', required=True, help='Mapping rules file (YAML)')
@@ -2863,21 +3676,57 @@ def main():
     parser.add_argument('--batch', action='store_true', help='Batch process all XML files in source directory')
     parser.add_argument('--validate', help='JSON Schema file for validation')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--stream-workers', type=int, default=1,
+                        help='Worker processes used to apply rules to the streams of large multi-stream profiles (default: 1)')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes used to convert the profiles of a .zip/.tar(.gz) bundle with --batch')
+    parser.add_argument('--validate-on-write', action='store_true',
+                        help='Validate every write against the --validate schema during conversion and skip the '
+                             'full validation pass for profiles without invalid writes')
+    parser.add_argument('--reject-invalid-writes', action='store_true',
+                        help='With --validate-on-write, drop invalid writes instead of only recording them')
+    parser.add_argument('--watch', metavar='DIR',
+                        help='Watch a directory of profiles and reconvert each profile when it changes, '
+                             'writing to the --output directory')
+    parser.add_argument('--debounce', type=float, default=0.5,
+                        help='With --watch, seconds a file must stay unchanged before it is converted (default: 0.5)')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='With --watch, seconds between directory scans when watchdog is not installed (default: 1.0)')
     
     args = parser.parse_args()
     
     # Set up basic logging first
     setup_logging(verbose=args.verbose)
     
+    if (args.validate_on_write or args.reject_invalid_writes) and not args.validate:
+        parser.error("--validate-on-write and --reject-invalid-writes require --validate")
+    
     # Create converter instance
-    converter = ConfigConverter(args.rules)
+    write_schema = args.validate if args.validate_on_write or args.reject_invalid_writes else None
+    converter = ConfigConverter(args.rules, stream_workers=args.stream_workers, write_schema=write_schema,
+                                reject_invalid_writes=args.reject_invalid_writes)
     
-    if args.batch:
+    if args.watch:
+        if not args.output:
+            parser.error("--watch requires --output (a directory)")
+        
+        try:
+            watch_convert(converter, args.watch, args.output, args.template, args.validate,
+                          args.debounce, args.poll_interval)
+        except KeyboardInterrupt:
+            print("Stopped watching")
+        finally:
+            converter.close()
+    elif args.batch:
         if not args.source or not args.output:
-            parser.error("--batch requires both --source and --output to be directories")
+            parser.error("--batch requires --source (a directory or a .zip/.tar(.gz) bundle) and --output")
         
-        # For batch processing, each file will get its own log
-        batch_convert(converter, args.source, args.output, args.template, args.validate)
+        if os.path.isfile(args.source) and is_archive(args.source):
+            # Export bundles are read as a stream; outputs go to a directory or an archive
+            convert_archive(converter, args.source, args.output, args.template, args.validate, args.workers)
+        else:
+            # For batch processing, each file will get its own log
+            batch_convert(converter, args.source, args.output, args.template, args.validate)
     else:
         if not args.source or not args.output:
             parser.error("--source and --output are required for single file conversion")
@@ -2899,7 +3748,10 @@ def main():
             print(f"Conversion completed. Output saved to {args.output}")
             
             # Validate result if schema is provided
-            if args.validate:
+            if args.validate and converter.write_validation_clean:
+                logging.info(f"Skipping validation of {args.output}: every write was validated during conversion")
+                print(f"Validation successful for {args.output} (validated on write)")
+            elif args.validate:
                 validator = MediaConvertConfigValidator(args.validate)
                 logging.info(f"Validating {args.output} against schema {args.validate}")
                 is_valid = validator.validate_config(args.output)
@@ -2928,4 +3780,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
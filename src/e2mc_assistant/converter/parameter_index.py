@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+SQLite index of the parameters of a profile corpus
+
+Every profile is parsed and converted once, and its parameters are stored as
+(profile_id, path, value, stream_index) rows together with the mapping outcome
+the converter reported for them (mapped with the target paths, or unmapped with
+the reason). Questions such as "which profiles use two_pass with libvpx?" or
+"which parameters are never mapped?" are then answered with SQL instead of
+grepping XML.
+
+Profiles are parsed in parallel worker processes and only the SQLite writes
+happen in the calling process. Re-indexing is incremental: a profile is only
+parsed again when the hash of its file (and of its -setting.json template)
+changes, or when the rules file changes.
+
+Command line (also available as "e2mc-converter index ..."):
+
+    python parameter_index.py build --source profiles/ --rules rules/e2mc_rules.yaml
+    python parameter_index.py query video_codec=libvpx two_pass=yes
+    python parameter_index.py unmapped
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .config_converter_enhanced import ConfigConverter
+except ImportError:
+    # Running the module directly as a script
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from config_converter_enhanced import ConfigConverter
+
+
+DEFAULT_DB = 'profile_index.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    profile_id TEXT PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    profile_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    value TEXT,
+    stream_index INTEGER
+);
+CREATE TABLE IF NOT EXISTS mapping_outcomes (
+    profile_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    value TEXT,
+    stream_index INTEGER,
+    outcome TEXT NOT NULL,
+    reason TEXT,
+    targets TEXT
+);
+CREATE INDEX IF NOT EXISTS parameters_path_value ON parameters (path, value);
+CREATE INDEX IF NOT EXISTS parameters_profile ON parameters (profile_id);
+CREATE INDEX IF NOT EXISTS outcomes_outcome_path ON mapping_outcomes (outcome, path);
+CREATE INDEX IF NOT EXISTS outcomes_profile ON mapping_outcomes (profile_id);
+"""
+
+logger = logging.getLogger('ParameterIndex')
+
+# Converter of the current worker process, see _init_index_worker
+_index_converter = None
+
+
+def format_value(value: Any) -> Optional[str]:
+    """Store scalars as text and lists or dictionaries as JSON"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True)
+    return str(value)
+
+
+def flatten_profile(profile: Dict) -> List[Tuple[str, Optional[str], Optional[int]]]:
+    """
+    Flatten a parsed profile into (path, value, stream_index) rows
+
+    Paths follow the converter's naming: nested elements are joined with dots,
+    list items get [i], and the parameters of each <stream> are relative to the
+    stream and carry its index.
+
+    Args:
+        profile: Profile dictionary as returned by ConfigConverter.parse_xml()
+
+    Returns:
+        List of (path, value, stream_index) tuples
+    """
+    rows = []
+
+    def walk(node, path, stream_index):
+        for key, value in node.items():
+            current = f"{path}.{key}" if path else key
+            if isinstance(value, dict):
+                walk(value, current, stream_index)
+            elif isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+                for i, item in enumerate(value):
+                    walk(item, f"{current}[{i}]", stream_index)
+            else:
+                rows.append((current, format_value(value), stream_index))
+
+    streams = profile.get('stream')
+    walk({key: value for key, value in profile.items() if key != 'stream'}, "", None)
+    if isinstance(streams, dict):
+        streams = [streams]
+    for i, stream in enumerate(streams or []):
+        if isinstance(stream, dict):
+            walk(stream, "", i)
+    return rows
+
+
+def profile_id_for(source_dir: str, source_file: str) -> str:
+    """Profile ID: path relative to the corpus without the .format.xml/.xml suffix"""
+    relative = os.path.relpath(source_file, source_dir).replace(os.sep, '/')
+    for suffix in ('.format.xml', '.xml'):
+        if relative.endswith(suffix):
+            return relative[:-len(suffix)]
+    return relative
+
+
+def companion_template(source_file: str) -> Optional[str]:
+    """Return the <name>-setting.json template next to a profile, if there is one"""
+    for suffix in ('.format.xml', '.xml'):
+        if source_file.endswith(suffix):
+            template = f"{source_file[:-len(suffix)]}-setting.json"
+            return template if os.path.exists(template) else None
+    return None
+
+
+def file_hash(*paths: Optional[str]) -> str:
+    """SHA-256 over the content of the given files, skipping None"""
+    digest = hashlib.sha256()
+    for path in paths:
+        if path:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def iter_profile_files(source_dir: str) -> Iterator[str]:
+    """Yield every *.xml profile under source_dir, recursively, in a stable order"""
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.endswith('.xml'):
+                yield os.path.join(root, filename)
+
+
+def _init_index_worker(rules_file: str):
+    """Load the rules once per worker process; conversion logs are not needed for indexing"""
+    global _index_converter
+    logging.getLogger('ConfigConverter').setLevel(logging.WARNING)
+    _index_converter = ConfigConverter(rules_file)
+
+
+def _index_profile(source_file: str, template: Optional[str]) -> Tuple[List, List, Optional[str]]:
+    """
+    Parse and convert one profile in a worker process
+
+    Returns:
+        Tuple of (parameter rows, outcome rows, error message or None)
+    """
+    converter = _index_converter
+    try:
+        profile = converter.parse_xml(source_file)
+    except Exception as e:
+        return [], [], f"Cannot parse profile: {e}"
+
+    parameters = flatten_profile(profile)
+    outcomes = []
+    error = None
+    try:
+        converter.convert_data(profile, template, source_file)
+        for stream_index, path, value, outcome, detail in converter.parameter_outcomes():
+            if outcome == 'mapped':
+                outcomes.append((path, format_value(value), stream_index, outcome, None, json.dumps(detail)))
+            else:
+                outcomes.append((path, format_value(value), stream_index, outcome, detail, None))
+    except Exception as e:
+        # The parameters are still indexed; only the mapping outcomes are missing
+        error = f"Conversion failed: {e}"
+    return parameters, outcomes, error
+
+
+class ParameterIndex:
+    """
+    Parameter index database of a profile corpus
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        """
+        Open (and create if needed) the index database
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database"""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _remove_profiles(self, profile_ids: List[str]) -> None:
+        for table in ('parameters', 'mapping_outcomes', 'profiles'):
+            self.connection.executemany(f"DELETE FROM {table} WHERE profile_id = ?",
+                                        [(profile_id,) for profile_id in profile_ids])
+
+    def build(self, source_dir: str, rules_file: str, workers: Optional[int] = None,
+              batch_size: int = 200) -> Dict[str, int]:
+        """
+        Index the profiles of a directory, re-parsing only what changed
+
+        Profiles whose file (or -setting.json template) hash is unchanged since the
+        last build are skipped, unless the rules file changed, which invalidates
+        every mapping outcome. Profiles that disappeared are removed.
+
+        Args:
+            source_dir: Directory holding the profiles (searched recursively)
+            rules_file: Mapping rules file used to compute the mapping outcomes
+            workers: Worker processes used to parse the profiles (default: CPU count)
+            batch_size: Number of profiles written per transaction
+
+        Returns:
+            Dictionary with the indexed, unchanged, removed and failed counts
+        """
+        started = time.time()
+        rules_hash = file_hash(rules_file)
+        rules_changed = self._get_meta('rules_hash') != rules_hash
+        if rules_changed:
+            logger.info(f"Rules file {rules_file} changed since the last build, re-indexing every profile")
+
+        known = dict(self.connection.execute("SELECT profile_id, file_hash FROM profiles"))
+        pending = []
+        seen = set()
+        for source_file in iter_profile_files(source_dir):
+            profile_id = profile_id_for(source_dir, source_file)
+            template = companion_template(source_file)
+            digest = file_hash(source_file, template)
+            seen.add(profile_id)
+            if not rules_changed and known.get(profile_id) == digest:
+                continue
+            pending.append((profile_id, source_file, template, digest))
+
+        removed = [profile_id for profile_id in known if profile_id not in seen]
+        if removed:
+            self._remove_profiles(removed)
+            self.connection.commit()
+
+        stats = {'indexed': 0, 'unchanged': len(seen) - len(pending), 'removed': len(removed), 'failed': 0}
+        logger.info(f"Indexing {len(pending)} of {len(seen)} profiles from {source_dir}")
+
+        batch = []
+        for item, result in self._parse_all(pending, rules_file, workers):
+            batch.append((item, result))
+            if len(batch) >= batch_size:
+                self._store(batch, stats)
+                batch = []
+        self._store(batch, stats)
+
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rules_hash', ?)", (rules_hash,))
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rules_file', ?)",
+                                (os.path.abspath(rules_file),))
+        self.connection.commit()
+        logger.info(f"Indexed {stats['indexed']} profiles ({stats['failed']} with errors, {stats['unchanged']} unchanged, "
+                    f"{stats['removed']} removed) in {time.time() - started:.1f}s")
+        return stats
+
+    def _parse_all(self, pending: List[Tuple], rules_file: str, workers: Optional[int]):
+        """Yield (item, result) for each pending profile, parsing them in worker processes"""
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(pending) <= 1:
+            converter_logger = logging.getLogger('ConfigConverter')
+            level = converter_logger.level
+            _init_index_worker(rules_file)
+            try:
+                for item in pending:
+                    yield item, _index_profile(item[1], item[2])
+            finally:
+                converter_logger.setLevel(level)
+            return
+
+        # Keep a bounded number of profiles in flight so huge corpora do not pile up in memory
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_index_worker,
+                                 initargs=(rules_file,)) as pool:
+            in_flight = deque()
+            for item in pending:
+                in_flight.append((item, pool.submit(_index_profile, item[1], item[2])))
+                if len(in_flight) >= workers * 4:
+                    item, future = in_flight.popleft()
+                    yield item, future.result()
+            while in_flight:
+                item, future = in_flight.popleft()
+                yield item, future.result()
+
+    def _store(self, batch: List[Tuple], stats: Dict[str, int]) -> None:
+        """Replace the rows of a batch of profiles in one transaction"""
+        if not batch:
+            return
+        self._remove_profiles([item[0] for item, _ in batch])
+        now = time.time()
+        for (profile_id, source_file, _, digest), (parameters, outcomes, error) in batch:
+            self.connection.execute(
+                "INSERT INTO profiles (profile_id, source_path, file_hash, indexed_at, error) VALUES (?, ?, ?, ?, ?)",
+                (profile_id, source_file, digest, now, error))
+            self.connection.executemany(
+                "INSERT INTO parameters (profile_id, path, value, stream_index) VALUES (?, ?, ?, ?)",
+                [(profile_id,) + row for row in parameters])
+            self.connection.executemany(
+                "INSERT INTO mapping_outcomes (profile_id, path, value, stream_index, outcome, reason, targets) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(profile_id,) + row for row in outcomes])
+            stats['indexed'] += 1
+            if error:
+                stats['failed'] += 1
+                logger.warning(f"{source_file}: {error}")
+        self.connection.commit()
+
+    def find_profiles(self, criteria: Dict[str, Optional[str]]) -> List[str]:
+        """
+        Return the profiles that have every given parameter
+
+        Args:
+            criteria: Parameter path -> value; a value of None matches any value.
+                Each parameter may come from the profile level or any stream.
+
+        Returns:
+            Sorted list of profile IDs
+        """
+        if not criteria:
+            return [row[0] for row in self.connection.execute("SELECT profile_id FROM profiles ORDER BY profile_id")]
+        queries = []
+        params = []
+        for path, value in criteria.items():
+            if value is None:
+                queries.append("SELECT profile_id FROM parameters WHERE path = ?")
+                params.append(path)
+            else:
+                queries.append("SELECT profile_id FROM parameters WHERE path = ? AND value = ?")
+                params.extend((path, value))
+        sql = " INTERSECT ".join(queries) + " ORDER BY profile_id"
+        return [row[0] for row in self.connection.execute(sql, params)]
+
+    def parameters(self, profile_id: str) -> List[Tuple]:
+        """
+        Return the parameters of one profile with their mapping outcome
+
+        Returns:
+            List of (path, value, stream_index, outcome, reason, targets) tuples; outcome
+            is None for parameters the converter handled without reporting them (for
+            example bitrates read by the rate control handler)
+        """
+        return self.connection.execute(
+            """
+            SELECT p.path, p.value, p.stream_index, o.outcome, o.reason, o.targets
+            FROM parameters p
+            LEFT JOIN mapping_outcomes o
+              ON o.profile_id = p.profile_id AND o.path = p.path
+             AND o.stream_index IS p.stream_index AND o.value IS p.value
+            WHERE p.profile_id = ?
+            ORDER BY p.stream_index IS NOT NULL, p.stream_index, p.path
+            """, (profile_id,)).fetchall()
+
+    def unmapped_report(self, path_prefix: Optional[str] = None) -> List[Dict]:
+        """
+        Summarize the unmapped parameters of the corpus
+
+        Args:
+            path_prefix: Only report paths starting with this prefix
+
+        Returns:
+            List of dictionaries with path, reason, occurrences, profiles and example
+            values, most frequent first
+        """
+        sql = """
+            SELECT path, reason, COUNT(*), COUNT(DISTINCT profile_id)
+            FROM mapping_outcomes
+            WHERE outcome = 'unmapped'
+        """
+        params = []
+        if path_prefix:
+            sql += " AND path LIKE ? ESCAPE '\\'"
+            params.append(path_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        sql += " GROUP BY path, reason ORDER BY COUNT(DISTINCT profile_id) DESC, path"
+        report = []
+        for path, reason, occurrences, profiles in self.connection.execute(sql, params).fetchall():
+            values = self.connection.execute(
+                "SELECT DISTINCT value FROM mapping_outcomes WHERE outcome = 'unmapped' AND path = ? AND reason IS ? "
+                "LIMIT 5", (path, reason)).fetchall()
+            report.append({'path': path, 'reason': reason, 'occurrences': occurrences, 'profiles': profiles,
+                           'values': [value for value, in values]})
+        return report
+
+
+def parse_criteria(expressions: List[str]) -> Dict[str, Optional[str]]:
+    """Turn PATH=VALUE (or PATH for any value) expressions into find_profiles() criteria"""
+    criteria = {}
+    for expression in expressions:
+        path, separator, value = expression.partition('=')
+        criteria[path.strip()] = value.strip() if separator else None
+    return criteria
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='e2mc-converter index',
+                                     description='Build and query a SQLite index of profile parameters')
+    subparsers = parser.add_subparsers(dest='action')
+
+    build_parser = subparsers.add_parser('build', help='Index (or re-index) the profiles of a directory')
+    build_parser.add_argument('--source', required=True, help='Directory of Encoding.com profiles (searched recursively)')
+    build_parser.add_argument('--rules', required=True, help='Mapping rules file (YAML)')
+    build_parser.add_argument('--workers', type=int, help='Worker processes used to parse profiles (default: CPU count)')
+
+    query_parser = subparsers.add_parser('query', help='List the profiles that have all the given parameters')
+    query_parser.add_argument('criteria', nargs='+', metavar='PATH[=VALUE]',
+                              help='Parameter path, optionally with a value, e.g. video_codec=libvpx two_pass=yes')
+
+    show_parser = subparsers.add_parser('show', help='Show the parameters of a profile and their mapping outcomes')
+    show_parser.add_argument('profile_id', help='Profile ID (file path relative to the corpus, without .xml)')
+
+    unmapped_parser = subparsers.add_parser('unmapped', help='Report unmapped parameters across the corpus')
+    unmapped_parser.add_argument('--path-prefix', help='Only report parameter paths starting with this prefix')
+
+    for sub in (build_parser, query_parser, show_parser, unmapped_parser):
+        sub.add_argument('--db', default=DEFAULT_DB, help=f'Index database file (default: {DEFAULT_DB})')
+        sub.add_argument('--json', action='store_true', help='Print the result as JSON')
+
+    args = parser.parse_args(argv)
+    if not args.action:
+        parser.print_help()
+        return 1
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    with ParameterIndex(args.db) as index:
+        if args.action == 'build':
+            result = index.build(args.source, args.rules, args.workers)
+            text = (f"Indexed {result['indexed']} profiles ({result['failed']} with errors), "
+                    f"{result['unchanged']} unchanged, {result['removed']} removed")
+        elif args.action == 'query':
+            result = index.find_profiles(parse_criteria(args.criteria))
+            text = "\n".join(result) + f"\n{len(result)} matching profiles"
+        elif args.action == 'show':
+            result = [
+                {'path': path, 'value': value, 'stream_index': stream_index, 'outcome': outcome,
+                 'reason': reason, 'targets': json.loads(targets) if targets else None}
+                for path, value, stream_index, outcome, reason, targets in index.parameters(args.profile_id)
+            ]
+            lines = []
+            for row in result:
+                where = f"stream[{row['stream_index']}]." if row['stream_index'] is not None else ""
+                detail = row['reason'] or ", ".join(row['targets'] or []) or ""
+                lines.append(f"{where}{row['path']} = {row['value']}  [{row['outcome'] or '-'}] {detail}".rstrip())
+            text = "\n".join(lines)
+        else:
+            result = index.unmapped_report(args.path_prefix)
+            text = "\n".join(f"{row['profiles']:6d} profiles  {row['occurrences']:7d}x  {row['path']} ({row['reason']})"
+                             f"  e.g. {', '.join(row['values'])}" for row in result)
+
+    print(json.dumps(result, indent=2) if args.json else text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
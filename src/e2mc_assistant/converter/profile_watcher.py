@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Change detection for a directory of profiles
+
+ProfileWatcher reports which profiles (*.xml, *.format.xml) and companion
+templates (<name>-setting.json) of a directory changed, so a long-running
+converter only reconverts what was edited. Filesystem notifications are used
+when the optional watchdog package is installed (pip install e2mc-assistant[watch]);
+otherwise the directory is polled by comparing modification times and sizes.
+
+Changes are debounced: a file is reported once it has been quiet for the
+debounce delay, so editors that save twice (or write a temporary file and
+rename it) trigger a single reconversion.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+
+WATCHED_SUFFIXES = ('.xml', '-setting.json')
+
+logger = logging.getLogger('ProfileWatcher')
+
+
+def is_watched(filename: str) -> bool:
+    """Return True for profile and companion template file names"""
+    return filename.endswith(WATCHED_SUFFIXES)
+
+
+class _NotificationHandler(FileSystemEventHandler):
+    """Forward watchdog events for watched files to the ProfileWatcher"""
+
+    def __init__(self, watcher: 'ProfileWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        # Editors often save by writing a temporary file and renaming it over the original
+        for path in (getattr(event, 'src_path', None), getattr(event, 'dest_path', None)):
+            if path and os.path.dirname(os.path.abspath(path)) == self.watcher.directory:
+                self.watcher.mark(os.path.basename(path))
+
+
+class ProfileWatcher:
+    """
+    Debounced change feed for the profiles of one directory
+
+    Only the files directly in the directory are watched, as batch_convert()
+    only converts those.
+    """
+
+    def __init__(self, directory: str, debounce: float = 0.5, poll_interval: float = 1.0,
+                 use_notifications: bool = True):
+        """
+        Args:
+            directory: Directory holding the profiles
+            debounce: Seconds a file must stay unchanged before it is reported
+            poll_interval: Seconds between directory scans when polling
+            use_notifications: Use filesystem notifications if watchdog is installed
+        """
+        self.directory = os.path.abspath(directory)
+        self.debounce = max(0.0, debounce)
+        self.poll_interval = max(0.05, poll_interval)
+        self.mode = 'notify' if use_notifications and Observer is not None else 'poll'
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = {}
+        self._snapshot = self.scan()
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Return the (mtime_ns, size) signature of every watched file
+
+        Returns:
+            Dictionary of file name -> signature
+        """
+        signatures = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not is_watched(entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.is_file():
+                    signatures[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def mark(self, filename: str) -> None:
+        """Record a change to a file, restarting its debounce delay"""
+        if not is_watched(filename):
+            return
+        with self._lock:
+            self._pending[filename] = time.monotonic() + self.debounce
+        self._wakeup.set()
+
+    def _poll(self) -> None:
+        snapshot = self.scan()
+        for filename in snapshot.keys() | self._snapshot.keys():
+            if snapshot.get(filename) != self._snapshot.get(filename):
+                self.mark(filename)
+        self._snapshot = snapshot
+
+    def _due(self) -> Tuple[List[str], Optional[float]]:
+        """Pop the files whose debounce delay is over and return the time to the next deadline"""
+        now = time.monotonic()
+        with self._lock:
+            due = sorted(name for name, deadline in self._pending.items() if deadline <= now)
+            for name in due:
+                del self._pending[name]
+            next_deadline = min(self._pending.values(), default=None)
+        return due, None if next_deadline is None else max(0.0, next_deadline - now)
+
+    def changes(self, stop_event: Optional[threading.Event] = None) -> Iterator[List[str]]:
+        """
+        Yield batches of changed file names until stop_event is set
+
+        A batch holds the files that became quiet at the same time. Deleted files are
+        reported too; callers check whether they still exist.
+
+        Args:
+            stop_event: Event that ends the iteration when set
+
+        Yields:
+            Sorted lists of file names relative to the directory
+        """
+        observer = None
+        if self.mode == 'notify':
+            observer = Observer()
+            observer.schedule(_NotificationHandler(self), self.directory, recursive=False)
+            observer.start()
+        logger.info(f"Watching {self.directory} using {'filesystem notifications' if observer else 'polling'}")
+
+        try:
+            next_poll = time.monotonic() + self.poll_interval
+            while stop_event is None or not stop_event.is_set():
+                if observer is None and time.monotonic() >= next_poll:
+                    self._poll()
+                    next_poll = time.monotonic() + self.poll_interval
+
+                due, wait = self._due()
+                if due:
+                    yield due
+                    continue
+
+                if observer is None:
+                    poll_wait = max(0.0, next_poll - time.monotonic())
+                    wait = poll_wait if wait is None else min(wait, poll_wait)
+                self._wakeup.wait(wait if wait is not None else self.poll_interval)
+                self._wakeup.clear()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Static analysis of the MediaConvert paths written by mapping rules
+
+The converter applies every matching rule in turn, so two rules that write the
+same MediaConvert path (or a path and one of its parents) silently overwrite
+each other. This module builds a reverse index from target paths to the rule
+targets that write them and reports the pairs that can actually fire together.
+
+Two writes are treated as exclusive, and therefore not a conflict, when their
+source or target conditions test the same parameter against values that cannot
+hold at the same time, for example video_codec in [mpeg4, libx264] against
+video_codec in [libvpx], or cabr exists against NOT cabr exists. A rule's own
+source parameter counts as existing, since the rule only fires when it is
+present. Anything the analysis cannot prove exclusive is reported.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+_PATH_SPLIT_PATTERN = re.compile(r'[.\[]')
+
+
+class RuleTarget:
+    """A single target of a rule, with the condition atoms that guard it"""
+
+    __slots__ = ('rule_index', 'target_index', 'source_path', 'path', 'atoms')
+
+    def __init__(self, rule_index: int, target_index: int, source_path: str, path: str, atoms: List[Tuple]):
+        self.rule_index = rule_index
+        self.target_index = target_index
+        self.source_path = source_path
+        self.path = path
+        self.atoms = atoms
+
+    def __repr__(self) -> str:
+        return f"RuleTarget(rule={self.rule_index}, source={self.source_path!r}, path={self.path!r})"
+
+
+class RuleConflict:
+    """Two rule targets that write the same path, or a path and one of its parents"""
+
+    __slots__ = ('path', 'first', 'second')
+
+    def __init__(self, path: str, first: RuleTarget, second: RuleTarget):
+        self.path = path
+        self.first = first
+        self.second = second
+
+    def describe(self) -> str:
+        """Return a one-line description for logs"""
+        if self.first.path == self.second.path:
+            where = self.path
+        else:
+            where = f"{self.first.path} / {self.second.path}"
+        return (f"{where}: rule #{self.first.rule_index} ({self.first.source_path}) and "
+                f"rule #{self.second.rule_index} ({self.second.source_path})")
+
+    def __repr__(self) -> str:
+        return f"RuleConflict({self.describe()})"
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize a compared value the way evaluate_condition() does for strings"""
+    if isinstance(value, str):
+        return value.lower().strip()
+    return value
+
+
+def _condition_atoms(condition: Optional[Dict], own_path: str, atoms: List[Tuple], negate: bool = False) -> None:
+    """
+    Collect the (path, kind, values) constraints that must hold for a condition to pass
+
+    Only constraints implied by the condition as a whole are collected: the
+    members of AND (or of NOT OR), and simple eq/in/ne/exists tests. An OR (or
+    NOT AND) contributes only what all of its branches agree on: a single
+    branch, or branches that each restrict the same parameter to a set of
+    values, which amounts to the union of those sets.
+    """
+    if not isinstance(condition, dict):
+        return
+
+    operator = condition.get('operator', 'eq')
+    if operator in ('AND', 'OR'):
+        subconditions = condition.get('conditions', [])
+        # AND requires all members; NOT OR requires all members to be false
+        if (operator == 'AND') != negate:
+            for subcondition in subconditions:
+                _condition_atoms(subcondition, own_path, atoms, negate)
+            return
+        branches = []
+        for subcondition in subconditions:
+            branch: List[Tuple] = []
+            _condition_atoms(subcondition, own_path, branch, negate)
+            branches.append(branch)
+        if len(branches) == 1:
+            atoms.extend(branches[0])
+        elif branches and all(len(branch) == 1 and branch[0][1] == 'in' for branch in branches) \
+                and len({branch[0][0] for branch in branches}) == 1:
+            atoms.append((branches[0][0][0], 'in', frozenset().union(*(branch[0][2] for branch in branches))))
+        return
+    if operator == 'NOT':
+        _condition_atoms(condition.get('condition'), own_path, atoms, not negate)
+        return
+
+    path = condition.get('source_path', own_path)
+    value = condition.get('value')
+    if operator == 'exists':
+        atoms.append((path, 'absent' if negate else 'present', None))
+        return
+    if operator in ('eq', 'ne'):
+        values = frozenset([_normalize(value)])
+    elif operator == 'in' and isinstance(value, (list, tuple)):
+        values = frozenset(_normalize(item) for item in value)
+    else:
+        return
+    is_equal = operator in ('eq', 'in')
+    atoms.append((path, 'in' if is_equal != negate else 'not_in', values))
+
+
+def _atoms_exclusive(first: Tuple, second: Tuple) -> bool:
+    """Return True if two constraints on the same parameter cannot both hold"""
+    kinds = {first[1], second[1]}
+    if kinds == {'present', 'absent'} or kinds == {'in', 'absent'}:
+        return True
+    if kinds == {'in'}:
+        return not (first[2] & second[2])
+    if kinds == {'in', 'not_in'}:
+        allowed, excluded = (first[2], second[2]) if first[1] == 'in' else (second[2], first[2])
+        return allowed <= excluded
+    return False
+
+
+def targets_exclusive(first: RuleTarget, second: RuleTarget) -> bool:
+    """Return True if the conditions of two rule targets prove they never fire together"""
+    for atom in first.atoms:
+        for other in second.atoms:
+            if atom[0] == other[0] and _atoms_exclusive(atom, other):
+                return True
+    return False
+
+
+def _ancestor_paths(path: str) -> List[str]:
+    """Return the parent paths of a target path, e.g. A.B[0].C -> [A, A.B, A.B[0]]"""
+    return [path[:match.start()] for match in _PATH_SPLIT_PATTERN.finditer(path) if match.start() > 0]
+
+
+def build_target_index(rules: List[Dict]) -> Dict[str, List[RuleTarget]]:
+    """
+    Build the reverse index from target paths to the rule targets that write them
+
+    Args:
+        rules: Rules as loaded from the mapping rules file
+
+    Returns:
+        Dictionary mapping each target path to its RuleTarget entries, in rule order
+    """
+    index: Dict[str, List[RuleTarget]] = {}
+    for rule_index, rule in enumerate(rules):
+        source = rule.get('source', {})
+        if source.get('type') == 'dummy' or 'target' not in rule:
+            continue
+        source_path = source.get('path')
+
+        # A rule only fires for a parameter present in the source
+        source_atoms: List[Tuple] = [(source_path, 'present', None)]
+        _condition_atoms(source.get('condition'), source_path, source_atoms)
+
+        targets = rule['target'] if isinstance(rule['target'], list) else [rule['target']]
+        for target_index, target in enumerate(targets):
+            if not isinstance(target, dict) or 'path' not in target:
+                continue
+            atoms = list(source_atoms)
+            _condition_atoms(target.get('condition'), source_path, atoms)
+            entry = RuleTarget(rule_index, target_index, source_path, target['path'], atoms)
+            index.setdefault(target['path'], []).append(entry)
+    return index
+
+
+def find_rule_conflicts(index: Dict[str, List[RuleTarget]]) -> List[RuleConflict]:
+    """
+    Find the pairs of rule targets that can overwrite each other
+
+    Args:
+        index: Reverse index as returned by build_target_index()
+
+    Returns:
+        List of RuleConflict, ordered by path
+    """
+    conflicts = []
+    for path in sorted(index):
+        entries = index[path]
+
+        # Writes to the same path
+        for i, first in enumerate(entries):
+            for second in entries[i + 1:]:
+                if not targets_exclusive(first, second):
+                    conflicts.append(RuleConflict(path, first, second))
+
+        # Writes to a parent path merge into or replace this one
+        for ancestor in _ancestor_paths(path):
+            for first in index.get(ancestor, []):
+                for second in entries:
+                    if first.rule_index != second.rule_index and not targets_exclusive(first, second):
+                        conflicts.append(RuleConflict(ancestor, first, second))
+    return conflicts
+
+
+def contested_paths(conflicts: List[RuleConflict]) -> Set[str]:
+    """Return every target path involved in at least one conflict"""
+    paths = set()
+    for conflict in conflicts:
+        paths.add(conflict.first.path)
+        paths.add(conflict.second.path)
+    return paths
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Typed intermediate representation for parsed Encoding.com profiles
+
+ConfigConverter.parse_xml() returns plain nested dictionaries, which the rule
+engine walks path by path. The specialised generators (rate control, audio and
+stream outputs) only need a handful of well known fields, so they consume a
+compact, pre-parsed view of each stream instead:
+
+- bitrates are parsed to integers in bits per second
+- yes/no flags are normalized to True/False
+- channel counts are numeric
+
+The views are built once per profile and keep a reference to the original
+dictionary so the rule engine keeps working on the raw data.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+_BITRATE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([km])?(?:bps|b)?\s*$', re.IGNORECASE)
+_SIZE_PATTERN = re.compile(r'^\s*(\d+)\s*x\s*(\d+)\s*$', re.IGNORECASE)
+# Output name modifiers only ever used the digits of a lower-case 'NNNk' bitrate
+_NAME_BITRATE_PATTERN = re.compile(r'(\d+)k')
+_FLAG_VALUES = {'yes': True, 'no': False}
+
+
+def parse_bitrate(value: Any) -> Optional[int]:
+    """
+    Parse a bitrate such as '1300k', '1.5m' or '96000' to bits per second
+
+    Args:
+        value: Bitrate value from the profile
+
+    Returns:
+        Bitrate in bits per second, or None if the value cannot be parsed
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = _BITRATE_PATTERN.match(str(value))
+    if not match:
+        return None
+    number = float(match.group(1))
+    unit = (match.group(2) or '').lower()
+    if unit == 'k':
+        number *= 1000
+    elif unit == 'm':
+        number *= 1000000
+    return int(number)
+
+
+def parse_size(value: Any) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Split a size such as '1280x720' into width and height
+
+    Returns:
+        Tuple of (width, height); both are None if the value is not a WIDTHxHEIGHT string
+    """
+    if value is None:
+        return None, None
+    match = _SIZE_PATTERN.match(str(value))
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_flag(value: Any) -> Optional[bool]:
+    """Normalize a yes/no flag to True/False, returning None for anything else"""
+    if value is None:
+        return None
+    return _FLAG_VALUES.get(str(value).strip().lower())
+
+
+def parse_number(value: Any) -> Union[int, float, None]:
+    """Coerce a numeric profile value to int or float, returning None if it is not numeric"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class StreamSpec:
+    """
+    Pre-parsed view of a single stream (or of a single-output profile)
+
+    Attributes mirror the Encoding.com parameter names. Bitrates are in bits
+    per second and are None when the parameter is absent or empty.
+    """
+
+    __slots__ = (
+        'raw', 'output', 'video_codec', 'audio_codec',
+        'bitrate', 'maxrate', 'minrate',
+        'audio_bitrate', 'audio_sample_rate', 'audio_maxrate', 'audio_minrate', 'audio_channels',
+        'cbr', 'hard_cbr', 'cabr', 'video_only', 'audio_only',
+        'size',
+        'language', 'use_alternate_id', 'has_video_params', 'has_audio_params',
+    )
+
+    def __init__(self, raw: Dict, logger: Optional[logging.Logger] = None):
+        """
+        Build the view from a parsed stream dictionary.
+
+        Args:
+            raw: Stream (or format) dictionary as returned by parse_xml
+            logger: Optional logger used to report values that fail to parse
+        """
+        if not isinstance(raw, dict):
+            raw = {}
+        self.raw = raw
+        get = raw.get
+
+        self.output = get('output')
+        self.video_codec = get('video_codec')
+        self.audio_codec = get('audio_codec')
+
+        self.bitrate = self._parse_rate(raw, 'bitrate', logger)
+        self.maxrate = self._parse_rate(raw, 'maxrate', logger)
+        self.minrate = self._parse_rate(raw, 'minrate', logger)
+        self.audio_bitrate = self._parse_rate(raw, 'audio_bitrate', logger)
+
+        # Sample rates are written to MediaConvert as-is, only maxrate/minrate presence matters
+        self.audio_sample_rate = get('audio_sample_rate')
+        self.audio_maxrate = get('audio_maxrate')
+        self.audio_minrate = get('audio_minrate')
+        channels = parse_number(get('audio_channels_number'))
+        self.audio_channels = int(channels) if channels is not None else None
+
+        self.cbr = parse_flag(get('cbr'))
+        self.hard_cbr = parse_flag(get('hard_cbr'))
+        self.cabr = parse_flag(get('cabr'))
+        self.video_only = parse_flag(get('video_only')) is True
+        self.audio_only = parse_flag(get('audio_only')) is True
+
+        self.size = get('size')
+
+        self.language = get('language')
+        self.use_alternate_id = get('use_alternate_id')
+
+        # Stream type detection looks at which keys are present, not at their values
+        self.has_video_params = 'size' in raw or 'bitrate' in raw
+        self.has_audio_params = 'audio_bitrate' in raw or 'audio_sample_rate' in raw
+
+    @staticmethod
+    def _parse_rate(raw: Dict, name: str, logger: Optional[logging.Logger]) -> Optional[int]:
+        """Parse a bitrate field, returning None when absent and 0 when it cannot be parsed"""
+        value = raw.get(name)
+        if not value:
+            return None
+        parsed = parse_bitrate(value)
+        if parsed is None:
+            if logger:
+                logger.warning(f"Failed to parse {name}: {value}")
+            return 0
+        return parsed
+
+    def has(self, name: str) -> bool:
+        """Return True if the parameter is present in the stream (even with an empty value)"""
+        return self.raw.get(name) is not None
+
+    def name_bitrate(self, name: str) -> Optional[str]:
+        """
+        Return the kbps digits of a bitrate written as 'NNNk', for output name modifiers
+
+        Other notations ('2m', '2000000', '128K') give None, so name modifiers stay
+        exactly as they were before bitrates were parsed.
+        """
+        value = self.raw.get(name)
+        match = _NAME_BITRATE_PATTERN.match(value) if isinstance(value, str) else None
+        return match.group(1) if match else None
+
+    def text(self, name: str) -> Any:
+        """Return the parameter exactly as it appeared in the profile"""
+        return self.raw.get(name)
+
+    def __repr__(self) -> str:
+        return (f"StreamSpec(output={self.output!r}, size={self.size!r}, bitrate={self.bitrate}, "
+                f"audio_codec={self.audio_codec!r}, audio_bitrate={self.audio_bitrate})")
+
+
+class SourceProfile:
+    """
+    Pre-parsed view of a whole Encoding.com profile
+
+    Attributes:
+        raw: The parsed profile dictionary
+        output: Output format of the profile
+        format: StreamSpec of the top-level <format> parameters
+        streams: StreamSpec for each <stream> element, in document order
+    """
+
+    __slots__ = ('raw', 'output', 'format', 'streams')
+
+    def __init__(self, raw: Dict, logger: Optional[logging.Logger] = None):
+        self.raw = raw if isinstance(raw, dict) else {}
+        self.format = StreamSpec(self.raw, logger)
+        self.output = self.format.output
+        streams = self.raw.get('stream')
+        if isinstance(streams, list):
+            self.streams: List[StreamSpec] = [StreamSpec(stream, logger) for stream in streams]
+        else:
+            self.streams = []
+
+    @classmethod
+    def from_dict(cls, raw: Dict, logger: Optional[logging.Logger] = None) -> 'SourceProfile':
+        """Build the profile view from a parse_xml() result"""
+        return cls(raw, logger)
@@ -4,6 +4,15 @@ AWS MediaConvert Job Requester Module
 This module provides functionality to submit transcoding jobs to AWS MediaConvert.
 """
 
+from .job_events import JobEventListener
+from .job_index import JobIndex
+from .job_tracker import JobTracker
 from .mediaconvert_job_submitter import MediaConvertJobSubmitter
+from .poll_schedule import PollSchedule
+from .queue_scheduler import QueueScheduler
+from .rate_limiter import TokenBucket
+from .submission_journal import SubmissionJournal
+from .template_registry import TemplateRegistry
 
-__all__ = ['MediaConvertJobSubmitter']
+__all__ = ['JobEventListener', 'JobIndex', 'JobTracker', 'MediaConvertJobSubmitter', 'PollSchedule',
+           'QueueScheduler', 'SubmissionJournal', 'TemplateRegistry', 'TokenBucket']
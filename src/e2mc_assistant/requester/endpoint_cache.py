@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of MediaConvert account endpoints
+
+MediaConvert clients need the account-specific endpoint returned by
+DescribeEndpoints, an API call with a very low rate limit. The endpoint does
+not change for an account and region, so it is resolved once and stored in a
+small JSON file (default: ~/.cache/e2mc/mediaconvert_endpoints.json, or the
+E2MC_ENDPOINT_CACHE environment variable) shared by every process.
+
+Entries are keyed by region and account ID. The account ID comes from
+sts:GetCallerIdentity, called once per process and credentials; keying on the
+access key ID instead would miss the cache every time temporary credentials
+rotate. Entries expire after a TTL (default: 7 days). invalidate() drops an
+entry whose endpoint could not be reached.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; concurrent cold starts then each resolve the endpoint
+    fcntl = None
+
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'e2mc', 'mediaconvert_endpoints.json')
+DEFAULT_TTL = 7 * 24 * 3600
+
+logger = logging.getLogger(__name__)
+
+# Access key ID -> account ID, so STS is called once per process and credentials
+_account_ids: Dict[str, str] = {}
+_account_lock = threading.Lock()
+
+
+def cache_file_path(cache_file: Optional[str] = None) -> str:
+    """Return the cache file to use: the argument, E2MC_ENDPOINT_CACHE or the default"""
+    return cache_file or os.environ.get('E2MC_ENDPOINT_CACHE') or DEFAULT_CACHE_FILE
+
+
+def account_id(session: Optional[boto3.session.Session] = None, region: Optional[str] = None) -> Optional[str]:
+    """
+    Return the account ID of the session's credentials
+
+    Args:
+        session: boto3 session (default: a new session)
+        region: Region of the STS endpoint to call (default: the session's region)
+
+    Returns:
+        The account ID, or None if it could not be determined
+    """
+    session = session or boto3.session.Session()
+    credentials = session.get_credentials()
+    access_key = credentials.access_key if credentials is not None else ''
+    with _account_lock:
+        if access_key in _account_ids:
+            return _account_ids[access_key]
+    try:
+        identity = session.client('sts', region_name=region).get_caller_identity()
+    except (BotoCoreError, ClientError) as e:
+        logger.warning(f"Could not determine the AWS account for the endpoint cache: {e}")
+        return None
+    with _account_lock:
+        _account_ids[access_key] = identity['Account']
+    return identity['Account']
+
+
+def cache_key(region: str, session: Optional[boto3.session.Session] = None) -> Optional[str]:
+    """
+    Return the cache key of an account and region
+
+    Args:
+        region: AWS region
+        session: boto3 session whose credentials identify the account (default: a new session)
+
+    Returns:
+        Key of the form <region>:<account ID>, or None if the account is unknown
+    """
+    account = account_id(session, region)
+    return f"{region}:{account}" if account else None
+
+
+def _read_cache(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r') as f:
+            entries = json.load(f)
+        return entries if isinstance(entries, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable endpoint cache {path}: {e}")
+        return {}
+
+
+def _write_cache(path: str, entries: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # Write atomically so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _fresh_entry(entries: Dict[str, Any], key: str, ttl: float) -> Optional[str]:
+    entry = entries.get(key)
+    if isinstance(entry, dict) and entry.get('url') and time.time() - entry.get('resolved_at', 0) < ttl:
+        return entry['url']
+    return None
+
+
+def _describe_endpoint(region: str, session: boto3.session.Session) -> str:
+    client = session.client('mediaconvert', region_name=region)
+    response = client.describe_endpoints()
+    return response['Endpoints'][0]['Url']
+
+
+def get_endpoint_url(region: str, session: Optional[boto3.session.Session] = None, cache_file: Optional[str] = None,
+                     ttl: float = DEFAULT_TTL, refresh: bool = False) -> str:
+    """
+    Return the MediaConvert endpoint of the account, calling DescribeEndpoints only on a cache miss
+
+    Args:
+        region: AWS region
+        session: boto3 session to resolve the endpoint with (default: a new session)
+        cache_file: Cache file (default: E2MC_ENDPOINT_CACHE or ~/.cache/e2mc/mediaconvert_endpoints.json)
+        ttl: Seconds a cached endpoint stays valid
+        refresh: Ignore the cached endpoint and resolve it again
+
+    Returns:
+        The endpoint URL
+    """
+    session = session or boto3.session.Session()
+    path = cache_file_path(cache_file)
+    key = cache_key(region, session)
+    if key is None:
+        # Without the account the entry could be served to another account
+        return _describe_endpoint(region, session)
+
+    if not refresh:
+        url = _fresh_entry(_read_cache(path), key, ttl)
+        if url:
+            logger.debug(f"Using cached MediaConvert endpoint for {region}: {url}")
+            return url
+
+    lock = None
+    try:
+        if fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                lock = open(f"{path}.lock", 'a')
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            except OSError as e:
+                logger.debug(f"Could not lock endpoint cache {path}: {e}")
+                lock = None
+            # Another process may have resolved the endpoint while we waited for the lock
+            if lock is not None and not refresh:
+                url = _fresh_entry(_read_cache(path), key, ttl)
+                if url:
+                    return url
+
+        url = _describe_endpoint(region, session)
+        logger.info(f"Retrieved MediaConvert endpoint: {url}")
+
+        entries = _read_cache(path)
+        entries[key] = {'url': url, 'resolved_at': time.time()}
+        try:
+            _write_cache(path, entries)
+        except OSError as e:
+            logger.warning(f"Could not write endpoint cache {path}: {e}")
+        return url
+    finally:
+        if lock is not None:
+            lock.close()
+
+
+def invalidate(region: str, session: Optional[boto3.session.Session] = None, cache_file: Optional[str] = None) -> None:
+    """
+    Remove the cached endpoint of an account and region, e.g. after it could not be reached
+
+    Args:
+        region: AWS region
+        session: boto3 session identifying the account (default: a new session)
+        cache_file: Cache file (default: E2MC_ENDPOINT_CACHE or ~/.cache/e2mc/mediaconvert_endpoints.json)
+    """
+    key = cache_key(region, session)
+    if key is None:
+        return
+    path = cache_file_path(cache_file)
+    entries = _read_cache(path)
+    if entries.pop(key, None) is not None:
+        logger.info(f"Removed cached MediaConvert endpoint for {region}")
+        try:
+            _write_cache(path, entries)
+        except OSError as e:
+            logger.warning(f"Could not write endpoint cache {path}: {e}")
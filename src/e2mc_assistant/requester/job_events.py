@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+MediaConvert job state-change events from an SQS queue
+
+MediaConvert publishes a "MediaConvert Job State Change" event to Amazon
+EventBridge whenever a job changes status. Routing these events to an SQS
+queue lets the submitter learn about completions as they happen instead of
+polling the MediaConvert API:
+
+    aws events put-rule --name e2mc-job-state \\
+        --event-pattern '{"source": ["aws.mediaconvert"], "detail-type": ["MediaConvert Job State Change"]}'
+    aws events put-targets --rule e2mc-job-state --targets Id=sqs,Arn=<queue ARN>
+
+(the queue policy must allow events.amazonaws.com to send messages). Events
+forwarded through an SNS topic are unwrapped as well.
+
+JobEventListener consumes the queue with long polling and deletes every
+message it reads, including events of jobs it does not track, so the queue
+must be dedicated to a single run of this tool. Two runs sharing a queue take
+each other's events; each then learns about the other's jobs only from its
+fallback list_jobs poll.
+"""
+
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+try:
+    from .. import aws_clients
+except ImportError:
+    # Running the submitter directly as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import aws_clients
+
+
+EVENT_SOURCE = 'aws.mediaconvert'
+EVENT_DETAIL_TYPE = 'MediaConvert Job State Change'
+
+# SQS caps long polling at 20 seconds and a receive at 10 messages
+MAX_WAIT_TIME = 20
+MAX_MESSAGES = 10
+
+logger = logging.getLogger(__name__)
+
+
+def parse_event(body: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract the job details of a MediaConvert state-change event
+
+    Args:
+        body: SQS message body holding an EventBridge event, directly or in an SNS notification
+
+    Returns:
+        Job details in the shape of a get_job response (Id, Status, Queue, UserMetadata,
+        ErrorCode, ErrorMessage, OutputGroupDetails, ...), or None if the message is not
+        a MediaConvert job state change
+    """
+    try:
+        event = json.loads(body)
+        if event.get('Type') == 'Notification' and 'Message' in event:
+            event = json.loads(event['Message'])
+    except (TypeError, ValueError, AttributeError):
+        return None
+    if not isinstance(event, dict) or event.get('source') != EVENT_SOURCE \
+            or event.get('detail-type') != EVENT_DETAIL_TYPE:
+        return None
+
+    detail = event.get('detail') or {}
+    if 'jobId' not in detail or 'status' not in detail:
+        return None
+
+    job = {
+        'Id': detail['jobId'],
+        'Status': detail['status'],
+        'Queue': detail.get('queue'),
+        'UserMetadata': detail.get('userMetadata', {}),
+        'EventTime': event.get('time'),
+    }
+    optional_fields = (
+        ('errorCode', 'ErrorCode'),
+        ('errorMessage', 'ErrorMessage'),
+        ('jobProgress', 'JobProgress'),
+        ('outputGroupDetails', 'OutputGroupDetails'),
+        ('warnings', 'Warnings'),
+    )
+    for event_key, job_key in optional_fields:
+        if event_key in detail:
+            job[job_key] = detail[event_key]
+    if 'jobProgress' in detail:
+        job['JobPercentComplete'] = detail['jobProgress'].get('jobPercentComplete')
+        job['CurrentPhase'] = detail['jobProgress'].get('currentPhase')
+    return job
+
+
+class JobEventListener:
+    """Long-polling consumer of MediaConvert job state-change events (on a dedicated queue)"""
+
+    def __init__(self, queue_url: str, region: str = 'us-east-1', sqs_client=None):
+        """
+        Args:
+            queue_url: URL of the SQS queue receiving the events
+            region: AWS region of the queue
+            sqs_client: Optional boto3 SQS client (default: the shared client from aws_clients)
+        """
+        self.queue_url = queue_url
+        self.client = sqs_client or aws_clients.get_client('sqs', region=region)
+
+    def receive(self, wait_time: float = MAX_WAIT_TIME) -> List[Dict[str, Any]]:
+        """
+        Wait for events and remove them from the queue
+
+        Every message received is deleted, whether or not it is a MediaConvert job
+        state change and whichever job it is about.
+
+        Args:
+            wait_time: Seconds to wait for the first message (long polling, at most 20)
+
+        Returns:
+            Job details of the state changes received (see parse_event()), possibly empty
+        """
+        response = self.client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=MAX_MESSAGES,
+            WaitTimeSeconds=max(0, min(MAX_WAIT_TIME, int(round(wait_time))))
+        )
+        messages = response.get('Messages', [])
+        if not messages:
+            return []
+
+        events = []
+        for message in messages:
+            job = parse_event(message.get('Body'))
+            if job is None:
+                logger.debug(f"Ignoring message {message.get('MessageId')}: not a MediaConvert job state change")
+            else:
+                events.append(job)
+
+        response = self.client.delete_message_batch(
+            QueueUrl=self.queue_url,
+            Entries=[{'Id': str(i), 'ReceiptHandle': message['ReceiptHandle']} for i, message in enumerate(messages)]
+        )
+        for failure in response.get('Failed', []):
+            logger.warning(f"Failed to delete event message: {failure.get('Message', failure.get('Code'))}")
+        return events
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Streaming job listing and a local index of MediaConvert jobs
+
+list_jobs returns one page of at most 20 jobs. iter_jobs() follows NextToken
+and streams every job matching a status, queue and creation-time window; with
+the default newest-first order it stops at the first job older than the
+window instead of paging through the whole account.
+
+JobIndex keeps a SQLite table of job ID to status, queue, timings, user
+metadata and error, so reports and reconciliation can query job history
+locally. JobIndex.sync() updates it incrementally: it only lists the jobs
+created since the newest indexed job, and refreshes the jobs the index still
+holds as SUBMITTED or PROGRESSING with get_job.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from botocore.exceptions import ClientError
+
+
+PAGE_SIZE = 20
+OPEN_STATUSES = ('SUBMITTED', 'PROGRESSING')
+# Time formats accepted by parse_time(), most specific first
+TIME_FORMATS = ('%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S',
+                '%Y-%m-%dT%H:%M%z', '%Y-%m-%dT%H:%M', '%Y-%m-%d')
+
+logger = logging.getLogger(__name__)
+
+
+def _epoch(value) -> Optional[float]:
+    """Convert a datetime or epoch seconds to epoch seconds"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_time(value: str) -> datetime:
+    """
+    Parse an ISO 8601 time such as 2024-05-01, 2024-05-01T12:00:00 or 2024-05-01T12:00:00+00:00
+
+    A space may separate the date and the time, and 'Z' stands for UTC. Times
+    without an offset are local times.
+
+    Args:
+        value: Time to parse
+
+    Returns:
+        The parsed datetime
+
+    Raises:
+        ValueError: If the value is not in a supported format
+    """
+    text = value.strip().replace(' ', 'T', 1)
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.strptime(text, time_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid time {value!r}, expected YYYY-MM-DD[THH:MM[:SS]][+HH:MM]")
+
+
+def iter_jobs(client, status: Optional[str] = None, queue: Optional[str] = None, created_after=None,
+              created_before=None, order: str = 'DESCENDING', page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the jobs matching the filters, page by page
+
+    Args:
+        client: boto3 MediaConvert client (with the account endpoint)
+        status: Optional status filter (SUBMITTED, PROGRESSING, COMPLETE, CANCELED, ERROR)
+        queue: Optional queue name or ARN
+        created_after: Optional lower bound of the creation time (datetime or epoch seconds, inclusive)
+        created_before: Optional upper bound of the creation time (datetime or epoch seconds, exclusive)
+        order: 'DESCENDING' (newest first) or 'ASCENDING'
+        page_size: Jobs per list_jobs call (at most 20)
+
+    Returns:
+        Generator of job details in creation order; listing stops as soon as the
+        remaining jobs are outside the time window
+    """
+    after, before = _epoch(created_after), _epoch(created_before)
+    params = {'MaxResults': max(1, min(PAGE_SIZE, page_size)), 'Order': order}
+    if status:
+        params['Status'] = status
+    if queue:
+        params['Queue'] = queue
+    while True:
+        response = client.list_jobs(**params)
+        for job in response.get('Jobs', []):
+            created = _epoch(job.get('CreatedAt'))
+            if created is not None:
+                if after is not None and created < after:
+                    if order == 'DESCENDING':
+                        return
+                    continue
+                if before is not None and created >= before:
+                    if order == 'ASCENDING':
+                        return
+                    continue
+            yield job
+        if not response.get('NextToken'):
+            return
+        params['NextToken'] = response['NextToken']
+
+
+class JobIndex:
+    """SQLite index of MediaConvert jobs"""
+
+    COLUMNS = ('job_id', 'status', 'queue', 'created_at', 'submit_time', 'start_time', 'finish_time',
+               'user_metadata', 'error_code', 'error_message', 'updated_at')
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file, created if missing
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT,
+                    queue TEXT,
+                    created_at REAL,
+                    submit_time REAL,
+                    start_time REAL,
+                    finish_time REAL,
+                    user_metadata TEXT,
+                    error_code INTEGER,
+                    error_message TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS sync_state (scope TEXT PRIMARY KEY, newest_created REAL)')
+
+    @staticmethod
+    def _row(job: Dict[str, Any]) -> tuple:
+        timing = job.get('Timing') or {}
+        return (
+            job['Id'],
+            job.get('Status'),
+            job.get('Queue'),
+            _epoch(job.get('CreatedAt')),
+            _epoch(timing.get('SubmitTime')),
+            _epoch(timing.get('StartTime')),
+            _epoch(timing.get('FinishTime')),
+            json.dumps(job.get('UserMetadata') or {}, sort_keys=True),
+            job.get('ErrorCode'),
+            job.get('ErrorMessage'),
+            time.time(),
+        )
+
+    def upsert(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add or update jobs
+
+        Args:
+            jobs: Job details from list_jobs or get_job
+
+        Returns:
+            Number of jobs written
+        """
+        rows = [self._row(job) for job in jobs]
+        if rows:
+            with self._lock, self._conn:
+                self._conn.executemany(f"INSERT OR REPLACE INTO jobs VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                                       rows)
+        return len(rows)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry['user_metadata'] = json.loads(entry['user_metadata'] or '{}')
+        return entry
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the indexed entry of a job, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def query(self, status: Optional[str] = None, queue: Optional[str] = None, created_after=None,
+              created_before=None, user_metadata: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """
+        Return the indexed jobs matching the filters, newest first
+
+        Args:
+            status: Optional status
+            queue: Optional queue ARN
+            created_after: Optional lower bound of the creation time (datetime or epoch seconds, inclusive)
+            created_before: Optional upper bound of the creation time (datetime or epoch seconds, exclusive)
+            user_metadata: Optional user metadata entries the jobs must have
+
+        Returns:
+            List of entries with the index columns; times are epoch seconds
+        """
+        clauses, values = [], []
+        for clause, value in (('status = ?', status), ('queue = ?', queue),
+                              ('created_at >= ?', _epoch(created_after)), ('created_at < ?', _epoch(created_before))):
+            if value is not None:
+                clauses.append(clause)
+                values.append(value)
+        sql = 'SELECT * FROM jobs'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY created_at DESC', values).fetchall()
+        entries = [self._to_dict(row) for row in rows]
+        if user_metadata:
+            entries = [entry for entry in entries
+                       if all(entry['user_metadata'].get(key) == value for key, value in user_metadata.items())]
+        return entries
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of indexed jobs per status"""
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+    def sync(self, client, queue: Optional[str] = None) -> int:
+        """
+        Bring the index up to date with the account
+
+        Lists newest first back to the newest job indexed by the previous sync (the
+        first sync lists everything), then refreshes with get_job the jobs the index
+        still holds as SUBMITTED or PROGRESSING that the listing did not return.
+
+        Args:
+            client: boto3 MediaConvert client (with the account endpoint)
+            queue: Optional queue name or ARN to sync only its jobs
+
+        Returns:
+            Number of jobs written
+        """
+        scope = queue or '*'
+        with self._lock:
+            row = self._conn.execute('SELECT newest_created FROM sync_state WHERE scope = ?', (scope,)).fetchone()
+            open_clause = 'status IN (?, ?)' + (' AND queue = ?' if queue else '')
+            open_values = list(OPEN_STATUSES) + ([queue] if queue else [])
+            open_ids = {job_id for job_id, in self._conn.execute(f'SELECT job_id FROM jobs WHERE {open_clause}',
+                                                                 open_values)}
+        # Without a previous sync everything is listed
+        newest = row[0] if row else None
+
+        written = 0
+        batch = []
+        for job in iter_jobs(client, queue=queue, created_after=newest):
+            created = _epoch(job.get('CreatedAt'))
+            if created is not None and (newest is None or created > newest):
+                newest = created
+            open_ids.discard(job['Id'])
+            batch.append(job)
+            if len(batch) >= 100:
+                written += self.upsert(batch)
+                batch = []
+        written += self.upsert(batch)
+        if open_ids:
+            logger.debug(f"Refreshing {len(open_ids)} open jobs of job index {self.path}")
+            written += self.refresh(client, sorted(open_ids))
+
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?)', (scope, newest))
+        logger.info(f"Synced job index {self.path}: {written} jobs written")
+        return written
+
+    def refresh(self, client, job_ids: Iterable[str]) -> int:
+        """
+        Update specific jobs with get_job
+
+        Args:
+            client: boto3 MediaConvert client (with the account endpoint)
+            job_ids: IDs of the jobs to refresh
+
+        Returns:
+            Number of jobs written
+        """
+        jobs = []
+        for job_id in job_ids:
+            try:
+                jobs.append(client.get_job(Id=job_id)['Job'])
+            except ClientError as e:
+                logger.warning(f"Could not refresh job {job_id}: {str(e)}")
+        return self.upsert(jobs)
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Bulk status tracking for many MediaConvert jobs
+
+track_job() polls get_job for a single job, so waiting on N jobs costs N API
+calls per poll cycle. JobTracker owns the whole set of in-flight jobs and
+refreshes it with list_jobs instead: for every queue the tracked jobs run in,
+it pages through the jobs that reached a terminal status (COMPLETE, ERROR,
+CANCELED), newest first, and stops as soon as it has gone past the oldest
+tracked job of that queue. A poll cycle therefore costs a few pages, however
+many jobs are tracked.
+
+Jobs the listing cannot account for fall back to get_job: jobs added by ID only
+(their queue and creation time are unknown until the first get_job) and jobs
+older than the pages a cycle is allowed to read.
+
+With a JobEventListener (job_events.py) the tracker waits on the job
+state-change event queue instead: jobs finish as their events arrive, and
+the list_jobs poll only runs every fallback_interval seconds to catch events
+that were lost or never routed to the queue.
+
+With a PollSchedule (poll_schedule.py) the interval between poll cycles
+follows the predicted completion of the job expected to finish first. Each
+cycle then lists the SUBMITTED and PROGRESSING jobs of the queues instead,
+which gives the schedule the queue position and progress of the tracked jobs;
+only jobs missing from both listings have their terminal status looked up.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    from .job_events import MAX_WAIT_TIME, JobEventListener
+    from .poll_schedule import PollSchedule
+except ImportError:
+    # Running the submitter directly as a script
+    from job_events import MAX_WAIT_TIME, JobEventListener
+    from poll_schedule import PollSchedule
+
+
+# Terminal states reported by MediaConvert, in the order they are listed
+TERMINAL_STATES = ('COMPLETE', 'ERROR', 'CANCELED')
+
+# Terminal events of untracked jobs kept in case the job is added later
+MAX_EARLY_EVENTS = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class _TrackedJob:
+    __slots__ = ('job_id', 'queue', 'created_at', 'callback')
+
+    def __init__(self, job_id: str, queue: Optional[str], created_at, callback: Optional[Callable]):
+        self.job_id = job_id
+        self.queue = queue
+        self.created_at = created_at
+        self.callback = callback
+
+
+class JobTracker:
+    """
+    Track a set of MediaConvert jobs until they reach a terminal state
+
+    Attributes:
+        api_calls: Number of list_jobs and get_job calls made so far
+    """
+
+    def __init__(self, client, poll_interval: float = 10, page_size: int = 20, max_pages: int = 5,
+                 on_complete: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 events: Optional[JobEventListener] = None, fallback_interval: float = 300,
+                 schedule: Optional[PollSchedule] = None):
+        """
+        Args:
+            client: boto3 MediaConvert client (with the account endpoint)
+            poll_interval: Seconds between poll cycles in completed() and wait() (without a schedule)
+            page_size: Jobs per list_jobs page (MediaConvert allows up to 20)
+            max_pages: Maximum list_jobs pages per queue and status in one cycle; tracked
+                jobs older than the pages read are checked with get_job
+            on_complete: Callback receiving the final job details of every finished job
+            events: Optional listener on a job state-change event queue
+            fallback_interval: Seconds between poll cycles when events are used
+            schedule: Optional adaptive schedule replacing poll_interval
+        """
+        self.client = client
+        self.poll_interval = poll_interval
+        self.page_size = max(1, min(20, page_size))
+        self.max_pages = max(1, max_pages)
+        self.on_complete = on_complete
+        self.events = events
+        self.fallback_interval = fallback_interval
+        self.schedule = schedule
+        self.api_calls = 0
+        self._jobs = OrderedDict()
+        # Terminal events of jobs not tracked (yet), e.g. when a job finishes before add()
+        self._early_events = OrderedDict()
+        self._ready = []
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    @property
+    def pending(self) -> List[str]:
+        """IDs of the jobs that have not finished yet"""
+        return list(self._jobs)
+
+    def add(self, job, callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
+        """
+        Start tracking a job
+
+        Pass the Job of a create_job (or get_job) response where possible: its Queue
+        and CreatedAt let the job be refreshed by list_jobs right away. A bare job ID
+        is looked up with get_job on the next poll.
+
+        Args:
+            job: Job details dictionary or job ID
+            callback: Callback receiving the final job details, in addition to on_complete
+
+        Returns:
+            The job ID
+        """
+        if isinstance(job, dict):
+            tracked = _TrackedJob(job['Id'], job.get('Queue'), job.get('CreatedAt'), callback)
+        else:
+            tracked = _TrackedJob(job, None, None, callback)
+        self._jobs[tracked.job_id] = tracked
+        early_event = self._early_events.pop(tracked.job_id, None)
+        if early_event is not None:
+            self._ready.append(self._finish(early_event))
+        return tracked.job_id
+
+    def handle_event(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply a job state-change event
+
+        Args:
+            job: Job details from job_events.parse_event()
+
+        Returns:
+            The job details if the event finished a tracked job, otherwise None
+        """
+        if job['Status'] not in TERMINAL_STATES:
+            if self.schedule is not None and job['Id'] in self._jobs:
+                self.schedule.observe(job)
+            return None
+        if job['Id'] not in self._jobs:
+            self._early_events[job['Id']] = job
+            while len(self._early_events) > MAX_EARLY_EVENTS:
+                self._early_events.popitem(last=False)
+            return None
+        return self._finish(job)
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """
+        Refresh every tracked job once and dispatch the callbacks of the finished ones
+
+        Returns:
+            Final job details of the jobs that finished in this cycle
+        """
+        finished = {}
+        stragglers = []
+
+        by_queue = OrderedDict()
+        for tracked in self._jobs.values():
+            if tracked.queue is None or tracked.created_at is None:
+                stragglers.append(tracked)
+            else:
+                by_queue.setdefault(tracked.queue, []).append(tracked)
+
+        for queue, jobs in by_queue.items():
+            if self.schedule is not None:
+                # Only jobs no longer waiting or running need their terminal status looked up
+                try:
+                    jobs = self._observe_active(queue, jobs)
+                except Exception as e:
+                    logger.warning(f"Failed to list active jobs in queue {queue}: {str(e)}")
+                if len(jobs) < len(TERMINAL_STATES):
+                    stragglers.extend(jobs)
+                    continue
+            try:
+                covered_since = self._list_finished(queue, jobs, finished)
+            except Exception as e:
+                logger.warning(f"Failed to list jobs in queue {queue}, falling back to get_job: {str(e)}")
+                stragglers.extend(tracked for tracked in jobs if tracked.job_id not in finished)
+                continue
+            if covered_since is not None:
+                stragglers.extend(tracked for tracked in jobs
+                                  if tracked.job_id not in finished and tracked.created_at < covered_since)
+
+        for tracked in stragglers:
+            try:
+                self.api_calls += 1
+                job = self.client.get_job(Id=tracked.job_id)['Job']
+            except Exception as e:
+                logger.error(f"Failed to get job status for job {tracked.job_id}: {str(e)}")
+                continue
+            tracked.queue = job.get('Queue')
+            tracked.created_at = job.get('CreatedAt')
+            if job['Status'] in TERMINAL_STATES:
+                finished[tracked.job_id] = job
+            elif self.schedule is not None:
+                self.schedule.observe(job)
+
+        return [self._finish(job) for job in finished.values()]
+
+    def _observe_active(self, queue: str, jobs: List[_TrackedJob]) -> List[_TrackedJob]:
+        """
+        Feed the schedule with the queue position and progress of the tracked jobs of a queue
+
+        Returns:
+            The tracked jobs found neither waiting nor running, i.e. the ones that may have finished
+        """
+        wanted = {tracked.job_id for tracked in jobs}
+        oldest_wanted = min(tracked.created_at for tracked in jobs)
+
+        # Waiting jobs, oldest first: a job's position in the listing is its position in the queue.
+        # Listed before the running jobs so a job starting in between is still seen once.
+        params = {'Queue': queue, 'Status': 'SUBMITTED', 'Order': 'ASCENDING', 'MaxResults': self.page_size}
+        position = 0
+        for _ in range(self.max_pages):
+            self.api_calls += 1
+            response = self.client.list_jobs(**params)
+            for job in response.get('Jobs', []):
+                if job['Id'] in wanted:
+                    self.schedule.observe(job, queue_position=position)
+                    wanted.discard(job['Id'])
+                position += 1
+            if not wanted or not response.get('NextToken'):
+                break
+            params['NextToken'] = response['NextToken']
+
+        # Running jobs, newest first, down to the oldest tracked job
+        params = {'Queue': queue, 'Status': 'PROGRESSING', 'Order': 'DESCENDING', 'MaxResults': self.page_size}
+        for _ in range(self.max_pages):
+            if not wanted:
+                break
+            self.api_calls += 1
+            response = self.client.list_jobs(**params)
+            page_jobs = response.get('Jobs', [])
+            for job in page_jobs:
+                if job['Id'] in wanted:
+                    self.schedule.observe(job)
+                    wanted.discard(job['Id'])
+            last_created = page_jobs[-1].get('CreatedAt') if page_jobs else None
+            if not response.get('NextToken') or (last_created is not None and last_created < oldest_wanted):
+                break
+            params['NextToken'] = response['NextToken']
+
+        return [tracked for tracked in jobs if tracked.job_id in wanted]
+
+    def _finish(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Stop tracking a finished job and dispatch its callbacks"""
+        tracked = self._jobs.pop(job['Id'])
+        if self.schedule is not None:
+            self.schedule.finished(job)
+        self._log_finished(job)
+        for callback in (tracked.callback, self.on_complete):
+            if callback is None:
+                continue
+            try:
+                callback(job)
+            except Exception as e:
+                logger.error(f"Completion callback failed for job {job['Id']}: {str(e)}")
+        return job
+
+    def _list_finished(self, queue: str, jobs: List[_TrackedJob], finished: Dict[str, Dict[str, Any]]):
+        """
+        Page through the terminal jobs of a queue, newest first, recording the tracked ones
+
+        Returns:
+            None if every tracked job of the queue was covered by the listing, otherwise the
+            creation time of the oldest job read; tracked jobs created before it were not covered
+        """
+        wanted = {tracked.job_id for tracked in jobs}
+        oldest_wanted = min(tracked.created_at for tracked in jobs)
+        covered_since = None
+
+        for status in TERMINAL_STATES:
+            params = {'Queue': queue, 'Status': status, 'Order': 'DESCENDING', 'MaxResults': self.page_size}
+            for page in range(self.max_pages):
+                self.api_calls += 1
+                response = self.client.list_jobs(**params)
+                page_jobs = response.get('Jobs', [])
+                for job in page_jobs:
+                    if job['Id'] in wanted:
+                        finished[job['Id']] = job
+                        wanted.discard(job['Id'])
+
+                next_token = response.get('NextToken')
+                if not wanted or not next_token or not page_jobs:
+                    break
+                # Jobs are listed by creation time, so older pages cannot hold a tracked job
+                last_created = page_jobs[-1].get('CreatedAt')
+                if last_created is not None and last_created < oldest_wanted:
+                    break
+                if page == self.max_pages - 1:
+                    if last_created is not None:
+                        covered_since = last_created if covered_since is None else max(covered_since, last_created)
+                    break
+                params['NextToken'] = next_token
+            if not wanted:
+                return None
+        return covered_since
+
+    def _log_finished(self, job: Dict[str, Any]) -> None:
+        status = job['Status']
+        if status == 'COMPLETE':
+            logger.info(f"Job {job['Id']} completed successfully")
+        elif status == 'ERROR':
+            logger.error(f"Job {job['Id']} failed with error: {job.get('ErrorMessage', 'Unknown error')}")
+        else:
+            logger.info(f"Job {job['Id']} was canceled")
+
+    def completed(self, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Wait until every tracked job has finished, yielding the jobs as they finish
+
+        Jobs may be added while iterating. On timeout the jobs still running are
+        looked up once more and yielded with their current (non-terminal) status, as
+        track_job() does, and tracking stops.
+
+        Args:
+            timeout: Optional timeout in seconds (default: None, no timeout)
+
+        Yields:
+            Job details dictionaries
+        """
+        start_time = time.time()
+        # Poll right away: jobs may have finished before tracking started
+        next_poll = start_time
+        while self._jobs or self._ready:
+            yield from self._ready
+            self._ready = []
+
+            if self._jobs and time.time() >= next_poll:
+                calls = self.api_calls
+                tracked_count = len(self._jobs)
+                finished = self.poll()
+                logger.info(f"Polled {tracked_count} jobs with {self.api_calls - calls} API calls, "
+                            f"{len(finished)} finished, {len(self._jobs)} running")
+                yield from finished
+                next_poll = time.time() + self._next_interval()
+            if not self._jobs:
+                continue
+
+            elapsed_time = time.time() - start_time
+            if timeout is not None and elapsed_time >= timeout:
+                logger.warning(f"Tracking {len(self._jobs)} jobs timed out after {elapsed_time:.1f} seconds")
+                for job_id in list(self._jobs):
+                    del self._jobs[job_id]
+                    self.api_calls += 1
+                    try:
+                        yield self.client.get_job(Id=job_id)['Job']
+                    except Exception as e:
+                        logger.error(f"Failed to get job status for job {job_id}: {str(e)}")
+                break
+
+            wait_time = max(0.0, next_poll - time.time())
+            if timeout is not None:
+                wait_time = min(wait_time, max(0.0, start_time + timeout - time.time()))
+            if self.events is None:
+                time.sleep(wait_time)
+                continue
+
+            try:
+                events = self.events.receive(wait_time=min(wait_time, MAX_WAIT_TIME))
+            except Exception as e:
+                logger.warning(f"Failed to receive job events, falling back to polling: {str(e)}")
+                self.events = None
+                next_poll = min(next_poll, time.time() + self.poll_interval)
+                continue
+            for event in events:
+                job = self.handle_event(event)
+                if job is not None:
+                    yield job
+
+    def _next_interval(self) -> float:
+        """Seconds until the next poll cycle"""
+        if self.events is not None:
+            return self.fallback_interval
+        if self.schedule is not None:
+            return self.schedule.next_interval(self._jobs)
+        return self.poll_interval
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Block until every tracked job has finished
+
+        Args:
+            timeout: Optional timeout in seconds (default: None, no timeout)
+
+        Returns:
+            Dictionary mapping job IDs to their final job details
+        """
+        return {job['Id']: job for job in self.completed(timeout)}
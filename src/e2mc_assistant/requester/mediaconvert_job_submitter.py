@@ -14,17 +14,45 @@ Usage:
                                          [--endpoint-url <endpoint_url>]
                                          [--role-arn <role_arn>]
                                          [--track-job]
+    python mediaconvert_job_submitter.py --batch <manifest.csv> [--max-workers N] [--max-tps TPS] [--track-job]
 """
 
 import argparse
-import boto3
+import csv
+import itertools
 import json
 import logging
 import os
 import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import EndpointConnectionError
+
+try:
+    from .. import aws_clients
+    from . import endpoint_cache
+    from .job_events import JobEventListener
+    from .job_index import JobIndex, iter_jobs, parse_time
+    from .job_tracker import JobTracker
+    from .poll_schedule import PollSchedule
+    from .queue_scheduler import QueueScheduler, parse_queue_spec
+    from .rate_limiter import TokenBucket, backoff_delay, is_throttling_error
+    from .template_registry import TemplateRegistry
+except ImportError:
+    # Running the submitter directly as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import aws_clients
+    import endpoint_cache
+    from job_events import JobEventListener
+    from job_index import JobIndex, iter_jobs, parse_time
+    from job_tracker import JobTracker
+    from poll_schedule import PollSchedule
+    from queue_scheduler import QueueScheduler, parse_queue_spec
+    from rate_limiter import TokenBucket, backoff_delay, is_throttling_error
+    from template_registry import TemplateRegistry
 
 # Custom JSON encoder for handling datetime objects
 class DateTimeEncoder(json.JSONEncoder):
@@ -54,8 +82,21 @@ class MediaConvertJobSubmitter:
     
     # Terminal states
     TERMINAL_STATES = [STATUS_COMPLETE, STATUS_CANCELED, STATUS_ERROR]
-
-    def __init__(self, region: str = 'us-east-1', endpoint_url: Optional[str] = None, role_arn: Optional[str] = None):
+    
+    # Defaults for concurrent submission; set max_tps to the account's CreateJob quota
+    DEFAULT_MAX_WORKERS = 8
+    DEFAULT_MAX_TPS = 10.0
+    
+    # Throttling is paced and retried by the token bucket of submit_jobs(), so botocore
+    # only retries each call once more (standard mode, for transient errors) instead of
+    # rate limiting and retrying on its own underneath it
+    CLIENT_RETRY_MODE = 'standard'
+    CLIENT_MAX_ATTEMPTS = 2
+
+    def __init__(self, region: str = 'us-east-1', endpoint_url: Optional[str] = None, role_arn: Optional[str] = None,
+                 event_queue_url: Optional[str] = None, max_pool_connections: Optional[int] = None,
+                 adaptive_polling: bool = False, use_templates: bool = False,
+                 template_prefix: str = 'e2mc', queues: Optional[List] = None, longest_first: bool = False):
         """
         Initialize the MediaConvert job submitter.
 
@@ -63,36 +104,62 @@ class MediaConvertJobSubmitter:
             region: AWS region where MediaConvert is available
             endpoint_url: Optional custom endpoint URL for MediaConvert
             role_arn: IAM role ARN that MediaConvert will assume to access resources
+            event_queue_url: Optional SQS queue receiving MediaConvert job state-change events;
+                job tracking then waits for events instead of polling (see job_events.py)
+            max_pool_connections: Connections the shared MediaConvert client must pool, e.g. the
+                max_workers of submit_jobs() when it exceeds the aws_clients default
+            adaptive_polling: Poll jobs on a PollSchedule predicting their completion time instead
+                of a fixed interval (see poll_schedule.py)
+            use_templates: Submit jobs as a JobTemplate reference with outputs referencing presets,
+                creating templates and presets as needed (see template_registry.py)
+            template_prefix: Name prefix of the templates and presets
+            queues: Optional pool of queues (names, ARNs or dicts with 'Queue' and 'Slots') to
+                spread jobs over by observed load and predicted duration (see queue_scheduler.py)
+            longest_first: With queues, submit the longest jobs of each priority first
         """
         self.region = region
         self.endpoint_url = endpoint_url
         self.role_arn = role_arn
+        self.event_queue_url = event_queue_url
+        self._event_listener = None
+        # Shared by all tracking so the run-time history carries over between jobs
+        self.poll_schedule = PollSchedule() if adaptive_polling else None
         
         # If endpoint URL is not provided, get it from the service
+        self._endpoint_cached = not self.endpoint_url
         if not self.endpoint_url:
             self._get_endpoint_url()
             
-        # Initialize MediaConvert client
-        self.client = boto3.client(
-            'mediaconvert',
-            region_name=self.region,
-            endpoint_url=self.endpoint_url
-        )
+        # Shared MediaConvert client (pooled, see aws_clients.py), with few botocore retries
+        self.client = aws_clients.get_client('mediaconvert', region=self.region, endpoint_url=self.endpoint_url,
+                                             max_pool_connections=max_pool_connections,
+                                             retry_mode=self.CLIENT_RETRY_MODE,
+                                             max_attempts=self.CLIENT_MAX_ATTEMPTS)
+        self.template_registry = TemplateRegistry(self.client, prefix=template_prefix) if use_templates else None
+        self.queue_scheduler = QueueScheduler(self.client, queues, longest_first=longest_first) if queues else None
         
         logger.info(f"Initialized MediaConvert client in {self.region} with endpoint {self.endpoint_url}")
 
     def _get_endpoint_url(self):
-        """Get the endpoint URL for MediaConvert in the specified region."""
+        """Get the endpoint URL for MediaConvert in the specified region (cached on disk, see endpoint_cache.py)."""
         try:
-            # Create a MediaConvert client without an endpoint to get the endpoint
-            mc_client = boto3.client('mediaconvert', region_name=self.region)
-            response = mc_client.describe_endpoints()
-            self.endpoint_url = response['Endpoints'][0]['Url']
-            logger.info(f"Retrieved MediaConvert endpoint: {self.endpoint_url}")
+            self.endpoint_url = endpoint_cache.get_endpoint_url(self.region, session=aws_clients.get_session())
         except Exception as e:
             logger.error(f"Failed to get MediaConvert endpoint: {str(e)}")
             raise
 
+    def _endpoint_unreachable(self, error: Exception) -> None:
+        """Drop a cached endpoint that could not be reached, so the next run resolves it again"""
+        if not self._endpoint_cached:
+            return
+        self._endpoint_cached = False
+        logger.warning(f"Could not reach MediaConvert endpoint {self.endpoint_url} ({str(error)}); "
+                       f"removing it from the endpoint cache")
+        try:
+            endpoint_cache.invalidate(self.region, session=aws_clients.get_session())
+        except Exception as e:
+            logger.warning(f"Failed to invalidate the cached MediaConvert endpoint: {str(e)}")
+
     def load_job_profile(self, profile_path: str) -> Dict[str, Any]:
         """
         Load a MediaConvert job profile from a JSON file.
@@ -198,12 +265,9 @@ class MediaConvertJobSubmitter:
             Response from the create_job API call
         """
         try:
-            # If role ARN is provided, add it to the job profile
-            if self.role_arn:
-                job_profile['Role'] = self.role_arn
-            
-            # Submit the job
-            response = self.client.create_job(**job_profile)
+            if self.queue_scheduler is not None:
+                self.queue_scheduler.assign([job_profile])
+            response = self._create_job(job_profile)
             
             job_id = response['Job']['Id']
             logger.info(f"Successfully submitted job with ID: {job_id}")
@@ -213,6 +277,116 @@ class MediaConvertJobSubmitter:
             logger.error(f"Failed to submit job: {str(e)}")
             raise
 
+    def _create_job(self, job_profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Call create_job, adding the role ARN if one is configured and using a job template if enabled"""
+        if self.role_arn:
+            job_profile['Role'] = self.role_arn
+        try:
+            if self.template_registry is not None:
+                return self.client.create_job(**self.template_registry.job_request(job_profile))
+            return self.client.create_job(**job_profile)
+        except EndpointConnectionError as e:
+            self._endpoint_unreachable(e)
+            raise
+
+    def submit_jobs(self, jobs: Iterable, max_workers: int = DEFAULT_MAX_WORKERS,
+                    max_tps: float = DEFAULT_MAX_TPS, max_attempts: int = 8,
+                    rate_limiter: Optional[TokenBucket] = None) -> Iterator[Tuple[Any, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Submit many jobs concurrently, paced to the CreateJob TPS quota.
+
+        Jobs are submitted by a thread pool. Every create_job call first takes a token
+        from a token bucket, so the pool never exceeds max_tps. A throttled call
+        (TooManyRequestsException) halves the bucket's rate and is retried after an
+        exponential backoff with jitter; the rate recovers as calls succeed. Only a
+        bounded number of jobs are in flight, so the input may be a lazy iterable of
+        any length, unless a queue pool is configured: the scheduler reads the whole
+        batch to order it and assign queues before the first submission.
+
+        Args:
+            jobs: Job profiles, or (key, job_profile) tuples to label the results
+            max_workers: Number of submission threads
+            max_tps: Maximum create_job calls per second (the account's CreateJob quota)
+            max_attempts: Attempts per job before a throttling error is returned
+            rate_limiter: Token bucket to share with other callers (default: a new one for max_tps)
+
+        Returns:
+            Generator of (key, response, error) tuples in completion order; key is the
+            job's position in the input unless a key was given, and exactly one of
+            response and error is None
+        """
+        limiter = rate_limiter or TokenBucket(max_tps)
+        max_workers = max(1, max_workers)
+        if self.queue_scheduler is not None:
+            jobs = self.queue_scheduler.assign(jobs)
+        submitted = failed = 0
+        started = time.time()
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            in_flight = {}
+            
+            def drain(return_when):
+                nonlocal submitted, failed
+                done, _ = wait(in_flight, return_when=return_when)
+                for future in done:
+                    key = in_flight.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        failed += 1
+                        logger.error(f"Failed to submit job {key}: {str(e)}")
+                        yield key, None, e
+                    else:
+                        submitted += 1
+                        logger.info(f"Submitted job {key} with ID: {response['Job']['Id']}")
+                        yield key, response, None
+            
+            for index, job in enumerate(jobs):
+                key, job_profile = job if isinstance(job, tuple) else (index, job)
+                in_flight[pool.submit(self._submit_with_backoff, job_profile, limiter, max_attempts)] = key
+                if len(in_flight) >= max_workers * 2:
+                    yield from drain(FIRST_COMPLETED)
+            while in_flight:
+                yield from drain(FIRST_COMPLETED)
+        
+        logger.info(f"Submitted {submitted} jobs ({failed} failed) in {time.time() - started:.1f}s, "
+                    f"{limiter.throttle_count} throttled calls, final rate {limiter.rate:.1f} TPS")
+
+    def _submit_with_backoff(self, job_profile: Dict[str, Any], limiter: TokenBucket, max_attempts: int) -> Dict[str, Any]:
+        """Submit one job through the token bucket, retrying throttled calls"""
+        attempt = 1
+        while True:
+            limiter.acquire()
+            try:
+                response = self._create_job(job_profile)
+            except Exception as e:
+                if not is_throttling_error(e) or attempt >= max_attempts:
+                    raise
+                limiter.throttled()
+                delay = backoff_delay(attempt)
+                logger.debug(f"create_job throttled (attempt {attempt}), retrying in {delay:.2f}s at {limiter.rate:.1f} TPS")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            limiter.succeeded()
+            return response
+
+    def prepare_job(self, profile_path: str, input_url: str, output_destination: str) -> Dict[str, Any]:
+        """
+        Load a job profile and set its input URL and output destination.
+
+        Args:
+            profile_path: Path to the MediaConvert job profile JSON file
+            input_url: Input file URL
+            output_destination: Output destination of the first output group
+
+        Returns:
+            Job profile ready for submit_job() or submit_jobs()
+        """
+        job_profile = self.load_job_profile(profile_path)
+        job_profile = self.update_input_url(job_profile, input_url)
+        return self.update_output_destination(job_profile, output_destination)
+
     def get_job_status(self, job_id: str) -> Dict[str, Any]:
         """
         Get the status of a MediaConvert job.
@@ -230,28 +404,59 @@ class MediaConvertJobSubmitter:
             logger.error(f"Failed to get job status for job {job_id}: {str(e)}")
             raise
 
-    def list_jobs(self, status: Optional[str] = None, max_results: int = 20) -> List[Dict[str, Any]]:
+    def list_jobs(self, status: Optional[str] = None, max_results: Optional[int] = 20,
+                  queue: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        List MediaConvert jobs with optional status filter.
+        List MediaConvert jobs with optional status filter, newest first.
 
         Args:
             status: Optional status filter (SUBMITTED, PROGRESSING, COMPLETE, CANCELED, ERROR)
-            max_results: Maximum number of jobs to return (default: 20)
+            max_results: Maximum number of jobs to return, across pages (default: 20; None for all)
+            queue: Optional queue name or ARN
 
         Returns:
             List of job summaries
         """
         try:
-            params = {'MaxResults': max_results}
-            if status:
-                params['Status'] = status
-                
-            response = self.client.list_jobs(**params)
-            return response['Jobs']
+            return list(itertools.islice(self.iter_jobs(status=status, queue=queue), max_results))
         except Exception as e:
             logger.error(f"Failed to list jobs: {str(e)}")
             raise
 
+    def iter_jobs(self, status: Optional[str] = None, queue: Optional[str] = None, created_after=None,
+                  created_before=None, order: str = 'DESCENDING',
+                  index: Optional[JobIndex] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream every job matching the filters, following NextToken.
+
+        Args:
+            status: Optional status filter (SUBMITTED, PROGRESSING, COMPLETE, CANCELED, ERROR)
+            queue: Optional queue name or ARN
+            created_after: Optional lower bound of the creation time (datetime or epoch seconds)
+            created_before: Optional upper bound of the creation time (datetime or epoch seconds)
+            order: 'DESCENDING' (newest first) or 'ASCENDING'
+            index: Optional JobIndex updated with every job streamed
+
+        Returns:
+            Generator of job details
+        """
+        jobs = iter_jobs(self.client, status=status, queue=queue, created_after=created_after,
+                         created_before=created_before, order=order)
+        if index is None:
+            yield from jobs
+            return
+        batch = []
+        try:
+            for job in jobs:
+                batch.append(job)
+                if len(batch) >= 100:
+                    index.upsert(batch)
+                    batch = []
+                yield job
+        finally:
+            # Also index what was streamed when the caller stops early
+            index.upsert(batch)
+
     def cancel_job(self, job_id: str) -> Dict[str, Any]:
         """
         Cancel a MediaConvert job.
@@ -274,6 +479,9 @@ class MediaConvertJobSubmitter:
         """
         Track a MediaConvert job until completion or timeout.
 
+        With adaptive polling, the interval between status checks follows the
+        submitter's PollSchedule and poll_interval is not used.
+
         Args:
             job_id: The ID of the job to track
             poll_interval: Time in seconds between status checks (default: 10)
@@ -282,6 +490,11 @@ class MediaConvertJobSubmitter:
         Returns:
             Dict containing the final job details
         """
+        if self.event_queue_url:
+            # Wait for the job's state-change event, polling only as a fallback
+            for job in self.track_jobs([job_id], poll_interval=poll_interval, timeout=timeout):
+                return job
+        
         start_time = time.time()
         elapsed_time = 0
         
@@ -299,6 +512,9 @@ class MediaConvertJobSubmitter:
             
             logger.info(f"Job {job_id} status: {status}, progress: {progress_pct}%, phase: {current_phase}")
             
+            if self.poll_schedule is not None:
+                self.poll_schedule.observe(job)
+            
             # If job is in a terminal state, return the job details
             if status in self.TERMINAL_STATES:
                 if status == self.STATUS_COMPLETE:
@@ -312,13 +528,64 @@ class MediaConvertJobSubmitter:
                 return job
             
             # Sleep before next check
-            time.sleep(poll_interval)
+            if self.poll_schedule is not None:
+                delay = self.poll_schedule.next_interval([job_id])
+                if timeout is not None:
+                    delay = min(delay, max(0.0, timeout - (time.time() - start_time)))
+                time.sleep(delay)
+            else:
+                time.sleep(poll_interval)
             elapsed_time = time.time() - start_time
         
         # If we reach here, we've timed out
         logger.warning(f"Tracking job {job_id} timed out after {elapsed_time:.1f} seconds")
         return self.get_job_status(job_id)
 
+    def job_tracker(self, poll_interval: float = 10, **kwargs) -> JobTracker:
+        """
+        Create a JobTracker sharing this submitter's MediaConvert client.
+
+        If the submitter has an event queue, the tracker waits for job state-change
+        events and only polls every fallback_interval seconds. With adaptive polling,
+        the tracker polls on the submitter's PollSchedule.
+
+        Args:
+            poll_interval: Time in seconds between poll cycles (default: 10)
+            **kwargs: Further JobTracker options (page_size, max_pages, on_complete,
+                events, fallback_interval, schedule)
+
+        Returns:
+            An empty JobTracker
+        """
+        if self.poll_schedule is not None and 'schedule' not in kwargs:
+            kwargs['schedule'] = self.poll_schedule
+        if self.event_queue_url and 'events' not in kwargs:
+            if self._event_listener is None:
+                self._event_listener = JobEventListener(self.event_queue_url, region=self.region)
+            kwargs['events'] = self._event_listener
+        return JobTracker(self.client, poll_interval=poll_interval, **kwargs)
+
+    def track_jobs(self, jobs: Iterable, poll_interval: float = 10,
+                   timeout: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Track many MediaConvert jobs until completion or timeout.
+
+        Unlike calling track_job() for each job, all jobs are refreshed together by
+        a JobTracker with a few list_jobs calls per poll cycle.
+
+        Args:
+            jobs: Job IDs or Job dictionaries from create_job responses
+            poll_interval: Time in seconds between poll cycles (default: 10)
+            timeout: Optional timeout in seconds (default: None, no timeout)
+
+        Returns:
+            Generator of final job details in completion order
+        """
+        tracker = self.job_tracker(poll_interval=poll_interval)
+        for job in jobs:
+            tracker.add(job)
+        return tracker.completed(timeout)
+
     def get_job_metrics(self, job_id: str) -> Dict[str, Any]:
         """
         Get detailed metrics for a completed job.
@@ -417,16 +684,50 @@ class MediaConvertJobSubmitter:
         return metrics
 
 
+def read_batch_manifest(manifest_path: str) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    Read a batch submission manifest.
+
+    The manifest is a CSV file with a header row and the columns profile_path,
+    input_url and output_destination, plus an optional id column used to label the
+    results (default: the row number). Relative profile paths are resolved against
+    the manifest's directory.
+
+    Args:
+        manifest_path: Path to the CSV manifest
+
+    Returns:
+        Generator of (id, profile_path, input_url, output_destination) tuples
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, newline='') as f:
+        reader = csv.DictReader(f)
+        missing = {'profile_path', 'input_url', 'output_destination'} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"Manifest {manifest_path} is missing columns: {', '.join(sorted(missing))}")
+        for row_number, row in enumerate(reader, 1):
+            profile_path = os.path.join(base_dir, row['profile_path'].strip())
+            yield (row.get('id') or str(row_number)).strip(), profile_path, row['input_url'].strip(), row['output_destination'].strip()
+
+
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='Submit a job to AWS MediaConvert')
     
-    parser.add_argument('--profile-path', required=True, 
+    parser.add_argument('--profile-path',
                         help='Path to the MediaConvert job profile JSON file')
-    parser.add_argument('--input-url', required=True,
+    parser.add_argument('--input-url',
                         help='Input file URL (S3 path)')
-    parser.add_argument('--output-destination', required=True,
+    parser.add_argument('--output-destination',
                         help='Output destination (S3 path)')
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help='Submit every job of a CSV manifest (columns: profile_path, input_url, '
+                             'output_destination and optionally id) concurrently')
+    parser.add_argument('--max-workers', type=int, default=MediaConvertJobSubmitter.DEFAULT_MAX_WORKERS,
+                        help=f'Submission threads for --batch (default: {MediaConvertJobSubmitter.DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--max-tps', type=float, default=MediaConvertJobSubmitter.DEFAULT_MAX_TPS,
+                        help='Maximum CreateJob calls per second for --batch; set to the account quota '
+                             f'(default: {MediaConvertJobSubmitter.DEFAULT_MAX_TPS:g})')
     parser.add_argument('--region', default='us-east-1',
                         help='AWS region (default: us-east-1)')
     parser.add_argument('--endpoint-url', 
@@ -434,9 +735,25 @@ def parse_arguments():
     parser.add_argument('--role-arn',
                         help='IAM role ARN for MediaConvert to access resources (optional)')
     parser.add_argument('--track-job', action='store_true',
-                        help='Track job progress until completion')
+                        help='Track job progress until completion (with --batch, every submitted job)')
     parser.add_argument('--poll-interval', type=int, default=10,
                         help='Polling interval in seconds when tracking jobs (default: 10)')
+    parser.add_argument('--queues',
+                        help='Comma-separated pool of queue names or ARNs, each optionally with =SLOTS '
+                             '(concurrent jobs); jobs go to the queue where they are predicted to finish first. '
+                             'The whole batch is read into memory to order and assign it before submission')
+    parser.add_argument('--longest-first', action='store_true',
+                        help='With --queues, submit the longest jobs of each priority first')
+    parser.add_argument('--use-templates', action='store_true',
+                        help='Submit jobs as a MediaConvert job template reference with outputs referencing '
+                             'presets; templates and presets are created from the profile as needed')
+    parser.add_argument('--adaptive-polling', action='store_true',
+                        help='Poll tracked jobs more often as they near completion instead of every '
+                             '--poll-interval seconds')
+    parser.add_argument('--event-queue-url',
+                        help='SQS queue receiving MediaConvert job state-change events; tracking waits for '
+                             'events and falls back to polling. Every message read is deleted, so the queue '
+                             'must be dedicated to this run (optional)')
     parser.add_argument('--timeout', type=int,
                         help='Timeout in seconds when tracking jobs (optional)')
     parser.add_argument('--job-id',
@@ -448,11 +765,34 @@ def parse_arguments():
     parser.add_argument('--status-filter',
                         help='Filter jobs by status when listing (SUBMITTED, PROGRESSING, COMPLETE, CANCELED, ERROR)')
     parser.add_argument('--max-results', type=int, default=20,
-                        help='Maximum number of jobs to list (default: 20)')
+                        help='Maximum number of jobs to list, across pages (default: 20; 0 for all)')
+    parser.add_argument('--queue-filter',
+                        help='Filter jobs by queue name or ARN when listing')
+    parser.add_argument('--created-after',
+                        help='List only jobs created at or after this ISO 8601 time, e.g. 2024-05-01 or '
+                             '2024-05-01T00:00:00+00:00 (local time without an offset)')
+    parser.add_argument('--created-before',
+                        help='List only jobs created before this ISO 8601 time')
+    parser.add_argument('--job-index',
+                        help='SQLite job index to update with the listed jobs (see job_index.py)')
+    parser.add_argument('--sync-job-index', action='store_true',
+                        help='Bring --job-index up to date with the account incrementally and print its job counts')
     parser.add_argument('--cancel-job',
                         help='Cancel a job by ID')
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.sync_job_index and not args.job_index:
+        parser.error("--sync-job-index requires --job-index")
+    for option in ('created_after', 'created_before'):
+        if getattr(args, option):
+            try:
+                setattr(args, option, parse_time(getattr(args, option)))
+            except ValueError as e:
+                parser.error(f"--{option.replace('_', '-')}: {str(e)}")
+    if not (args.batch or args.list_jobs or args.sync_job_index or args.job_id or args.cancel_job):
+        if not (args.profile_path and args.input_url and args.output_destination):
+            parser.error("--profile-path, --input-url and --output-destination are required to submit a job")
+    return args
 
 
 def main():
@@ -468,7 +808,13 @@ def main():
         submitter = MediaConvertJobSubmitter(
             region=args.region,
             endpoint_url=args.endpoint_url,
-            role_arn=args.role_arn
+            role_arn=args.role_arn,
+            event_queue_url=args.event_queue_url,
+            max_pool_connections=args.max_workers,
+            adaptive_polling=args.adaptive_polling,
+            use_templates=args.use_templates,
+            queues=parse_queue_spec(args.queues) if args.queues else None,
+            longest_first=args.longest_first
         )
         
         # Handle job cancellation if requested
@@ -478,16 +824,75 @@ def main():
             return 0
         
         # Handle job listing if requested
+        if args.sync_job_index:
+            index = JobIndex(args.job_index)
+            try:
+                written = index.sync(submitter.client, queue=args.queue_filter)
+                print(f"Job index {args.job_index}: {written} jobs updated")
+                for status, count in sorted(index.counts().items()):
+                    print(f"{status}: {count}")
+            finally:
+                index.close()
+            return 0
+        
         if args.list_jobs:
-            jobs = submitter.list_jobs(status=args.status_filter, max_results=args.max_results)
-            print(f"Found {len(jobs)} jobs:")
-            for job in jobs:
-                created_at = job.get('CreatedAt', 'Unknown')
-                if hasattr(created_at, 'strftime'):
-                    created_at = created_at.strftime('%Y-%m-%d %H:%M:%S')
-                print(f"ID: {job['Id']}, Status: {job['Status']}, Created: {created_at}")
+            index = JobIndex(args.job_index) if args.job_index else None
+            try:
+                jobs = submitter.iter_jobs(
+                    status=args.status_filter,
+                    queue=args.queue_filter,
+                    created_after=args.created_after,
+                    created_before=args.created_before,
+                    index=index
+                )
+                count = 0
+                for job in itertools.islice(jobs, args.max_results or None):
+                    created_at = job.get('CreatedAt', 'Unknown')
+                    if hasattr(created_at, 'strftime'):
+                        created_at = created_at.strftime('%Y-%m-%d %H:%M:%S')
+                    print(f"ID: {job['Id']}, Status: {job['Status']}, Created: {created_at}")
+                    count += 1
+                jobs.close()
+                print(f"Found {count} jobs")
+            finally:
+                if index is not None:
+                    index.close()
             return 0
         
+        # Submit a manifest of jobs concurrently
+        if args.batch:
+            counts = {'submitted': 0, 'failed': 0}
+            submitted_jobs = {}
+            
+            def jobs():
+                for row_id, profile_path, input_url, output_destination in read_batch_manifest(args.batch):
+                    try:
+                        yield row_id, submitter.prepare_job(profile_path, input_url, output_destination)
+                    except Exception as e:
+                        # A bad row must not stop the rest of the batch
+                        counts['failed'] += 1
+                        print(f"{row_id}: ERROR {e}")
+            
+            for row_id, response, error in submitter.submit_jobs(jobs(), max_workers=args.max_workers,
+                                                                  max_tps=args.max_tps):
+                if error is not None:
+                    counts['failed'] += 1
+                    print(f"{row_id}: ERROR {error}")
+                else:
+                    counts['submitted'] += 1
+                    print(f"{row_id}: {response['Job']['Id']}")
+                    submitted_jobs[response['Job']['Id']] = (row_id, response['Job'])
+            print(f"Submitted {counts['submitted']} jobs, {counts['failed']} failed")
+            
+            if args.track_job and submitted_jobs:
+                print(f"Tracking {len(submitted_jobs)} jobs...")
+                for job in submitter.track_jobs([job for _, job in submitted_jobs.values()],
+                                                poll_interval=args.poll_interval, timeout=args.timeout):
+                    print(f"{submitted_jobs[job['Id']][0]}: {job['Id']} final status: {job['Status']}")
+                    if job['Status'] != MediaConvertJobSubmitter.STATUS_COMPLETE:
+                        counts['failed'] += 1
+            return 0 if counts['failed'] == 0 else 1
+        
         # Handle job tracking if job ID is provided
         if args.job_id:
             print(f"Tracking job {args.job_id}...")
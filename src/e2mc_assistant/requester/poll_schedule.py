@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Adaptive polling schedule for MediaConvert jobs
+
+A fixed poll interval is too short while a job waits in a busy queue or has
+just started transcoding, and too long when it is about to finish.
+PollSchedule predicts how long each job still needs and polls at a fraction
+of that time, so polls are rare early on and frequent near the end:
+
+- SUBMITTED jobs: the queue wait observed for earlier jobs and the number of
+  jobs ahead in the queue (when known), plus the typical run time
+- PROGRESSING jobs: the progress rate from JobPercentComplete (between the
+  last two observations, or since the job started); jobs in PROBING use the
+  typical run time and jobs in UPLOADING are about to finish
+- without observations or history: the default interval
+
+Run and queue-wait times are learned from the Timing of finished jobs. The
+interval is clamped to [min_interval, max_interval] and jittered so that
+many trackers do not poll in lockstep.
+"""
+
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+
+def _timestamp(value) -> Optional[float]:
+    """Convert a Timing value (datetime or epoch seconds) to epoch seconds"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PollSchedule:
+    """
+    Predict job completion times and derive poll intervals from them
+
+    One schedule can serve many jobs; the run-time history it learns is shared
+    between them.
+    """
+
+    def __init__(self, min_interval: float = 2.0, max_interval: float = 120.0, default_interval: float = 10.0,
+                 lead_fraction: float = 0.5, jitter: float = 0.2, history_size: int = 50,
+                 queue_concurrency: int = 1):
+        """
+        Args:
+            min_interval: Shortest interval between polls in seconds
+            max_interval: Longest interval between polls in seconds, bounding how stale a prediction can get
+            default_interval: Interval used while nothing is known about a job
+            lead_fraction: Fraction of the predicted remaining time to wait before the next poll
+            jitter: Relative random variation applied to every interval (0.2 = +/-20%)
+            history_size: Number of finished jobs whose timings are remembered
+            queue_concurrency: Jobs the queue runs at once, to turn a queue position into a wait
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.default_interval = default_interval
+        self.lead_fraction = lead_fraction
+        self.jitter = jitter
+        self.queue_concurrency = max(1, queue_concurrency)
+        self._run_times = deque(maxlen=history_size)
+        self._queue_waits = deque(maxlen=history_size)
+        self._jobs = {}
+
+    def observe(self, job: Dict[str, Any], queue_position: Optional[int] = None, now: Optional[float] = None) -> None:
+        """
+        Record the current state of a job
+
+        Args:
+            job: Job details from get_job, list_jobs or a state-change event
+            queue_position: Number of jobs ahead of it in its queue, if known (SUBMITTED jobs)
+            now: Observation time (default: now)
+        """
+        now = time.time() if now is None else now
+        if job.get('Status') in ('COMPLETE', 'ERROR', 'CANCELED'):
+            self.finished(job)
+            return
+
+        state = self._jobs.setdefault(job['Id'], {'progress': deque(maxlen=2)})
+        timing = job.get('Timing') or {}
+        state['status'] = job.get('Status', state.get('status'))
+        state['phase'] = job.get('CurrentPhase', state.get('phase'))
+        state['submitted'] = _timestamp(timing.get('SubmitTime')) or _timestamp(job.get('CreatedAt')) \
+            or state.get('submitted') or now
+        state['started'] = _timestamp(timing.get('StartTime')) or state.get('started')
+        if state['status'] == 'PROGRESSING' and state['started'] is None:
+            state['started'] = now
+        if queue_position is not None:
+            state['queue_position'] = queue_position
+
+        percent = job.get('JobPercentComplete')
+        if percent is not None:
+            progress = state['progress']
+            # Keep the first observation of each percentage, so the rate spans real progress
+            if not progress or progress[-1][1] != percent:
+                progress.append((now, float(percent)))
+
+    def finished(self, job: Dict[str, Any]) -> None:
+        """Learn the run and queue-wait times of a finished job and stop predicting it"""
+        self._jobs.pop(job['Id'], None)
+        if job.get('Status') != 'COMPLETE':
+            return
+        timing = job.get('Timing') or {}
+        submitted = _timestamp(timing.get('SubmitTime'))
+        started = _timestamp(timing.get('StartTime'))
+        finished = _timestamp(timing.get('FinishTime'))
+        if started is not None and finished is not None and finished >= started:
+            self._run_times.append(finished - started)
+        if submitted is not None and started is not None and started >= submitted:
+            self._queue_waits.append(started - submitted)
+
+    def forget(self, job_id: str) -> None:
+        """Stop predicting a job without learning from it"""
+        self._jobs.pop(job_id, None)
+
+    @staticmethod
+    def _mean(values) -> Optional[float]:
+        return sum(values) / len(values) if values else None
+
+    def predict_remaining(self, job_id: str, now: Optional[float] = None) -> Optional[float]:
+        """
+        Predict the seconds until a job finishes
+
+        Args:
+            job_id: ID of an observed job
+            now: Prediction time (default: now)
+
+        Returns:
+            Predicted remaining seconds, or None if nothing is known to base a prediction on
+        """
+        now = time.time() if now is None else now
+        state = self._jobs.get(job_id)
+        if state is None:
+            return None
+        run_time = self._mean(self._run_times)
+
+        if state['status'] == 'SUBMITTED':
+            waits = []
+            queue_wait = self._mean(self._queue_waits)
+            if queue_wait is not None:
+                waits.append(queue_wait - (now - state['submitted']))
+            if state.get('queue_position') is not None and run_time is not None:
+                waits.append(state['queue_position'] / self.queue_concurrency * run_time)
+            if not waits and run_time is None:
+                return None
+            return max(0.0, max(waits, default=0.0)) + (run_time or 0.0)
+
+        if state.get('phase') == 'UPLOADING':
+            return 0.0
+
+        progress = state['progress']
+        if progress and progress[-1][1] > 0:
+            last_time, last_percent = progress[-1]
+            if len(progress) == 2 and last_time > progress[0][0]:
+                rate = (last_percent - progress[0][1]) / (last_time - progress[0][0])
+            elif state['started'] is not None and last_time > state['started']:
+                rate = last_percent / (last_time - state['started'])
+            else:
+                rate = 0.0
+            if rate > 0:
+                return max(0.0, (100.0 - last_percent) / rate - (now - last_time))
+
+        if run_time is not None:
+            return max(0.0, run_time - (now - (state['started'] or now)))
+        return None
+
+    def next_interval(self, job_ids: Optional[Iterable[str]] = None, now: Optional[float] = None) -> float:
+        """
+        Return the seconds to wait before the next poll
+
+        Args:
+            job_ids: Jobs the next poll refreshes (default: every observed job); the
+                interval suits the job expected to finish first
+            now: Current time (default: now)
+
+        Returns:
+            Jittered interval within [min_interval, max_interval]
+        """
+        now = time.time() if now is None else now
+        job_ids = list(self._jobs) if job_ids is None else list(job_ids)
+        intervals = []
+        for job_id in job_ids:
+            remaining = self.predict_remaining(job_id, now)
+            if remaining is None:
+                intervals.append(self.default_interval)
+            else:
+                intervals.append(remaining * self.lead_fraction)
+        interval = min(intervals) if intervals else self.default_interval
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(self.min_interval, interval)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Load-aware assignment of MediaConvert jobs to a pool of queues
+
+Without a queue, every job goes to the account's Default queue, so a large
+batch piles up there while other queues, including paid-for reserved slots,
+sit idle. QueueScheduler spreads a batch over a pool of queues:
+
+- each queue has a capacity in concurrent job slots: the reserved slots of a
+  reserved queue (read with get_queue) or a configured weight for on-demand
+  queues (default: DEFAULT_ON_DEMAND_SLOTS)
+- the current load of each queue is observed with list_jobs: SUBMITTED jobs
+  count as a full job, PROGRESSING jobs as half a job. At most max_pages
+  pages are read per queue and status; a queue whose listing is cut off holds
+  at least that many jobs and is treated as saturated, so it only gets jobs
+  when every queue of the pool is saturated
+- each job gets a predicted duration (by default the number of its outputs, a
+  relative measure of transcoding work) and goes to the queue where it would
+  finish first, i.e. the queue with the lowest (load + duration) / slots;
+  reserved queues win ties
+
+Jobs are submitted by descending Priority; with longest_first the longest
+jobs of each priority go first (the LPT rule), which keeps the batch's
+makespan close to the optimum. Paused queues are skipped.
+
+assign() reads the whole batch into memory before the first job is assigned,
+so a lazy iterable of jobs is materialized when a queue pool is used.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+
+DEFAULT_ON_DEMAND_SLOTS = 20
+# Load of a PROGRESSING job relative to a waiting one (on average, half done)
+PROGRESSING_WEIGHT = 0.5
+
+logger = logging.getLogger(__name__)
+
+
+def parse_queue_spec(spec: str) -> List[Dict[str, Any]]:
+    """
+    Parse a command line queue pool
+
+    Args:
+        spec: Comma-separated queue names or ARNs, each optionally followed by
+            =SLOTS, e.g. "arn:aws:mediaconvert:...:queues/reserved,Default=10"
+
+    Returns:
+        Queue entries for QueueScheduler
+    """
+    queues = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, slots = item.partition('=')
+        entry = {'Queue': name.strip()}
+        if slots:
+            entry['Slots'] = float(slots)
+        queues.append(entry)
+    return queues
+
+
+def estimate_outputs(job_profile: Dict[str, Any]) -> float:
+    """Default duration estimate: the number of outputs of a job (at least 1)"""
+    settings = job_profile.get('Settings', {})
+    outputs = sum(len(group.get('Outputs', [])) for group in settings.get('OutputGroups', []))
+    return float(max(1, outputs))
+
+
+class QueueScheduler:
+    """Assign jobs to the queue of a pool where they are predicted to finish first"""
+
+    def __init__(self, client, queues: Iterable, longest_first: bool = False,
+                 duration_estimator: Optional[Callable[[Dict[str, Any]], float]] = None,
+                 max_pages: int = 5, refresh_interval: float = 30):
+        """
+        Args:
+            client: boto3 MediaConvert client (with the account endpoint)
+            queues: Queue names or ARNs, or dicts with 'Queue' and optionally 'Slots'
+                (concurrent jobs; read from the reservation plan of reserved queues if
+                omitted) and 'Type' ('RESERVED' or 'ON_DEMAND')
+            longest_first: Submit the longest jobs of each priority first
+            duration_estimator: Function predicting the duration of a job profile, in
+                seconds or any unit used consistently (default: its number of outputs)
+            max_pages: Pages of 20 jobs listed per queue and status when observing the load; a
+                queue with more jobs than that is treated as saturated
+            refresh_interval: Seconds an observed load stays valid between assign() calls
+        """
+        self.client = client
+        self.longest_first = longest_first
+        self.estimate = duration_estimator or estimate_outputs
+        self.max_pages = max_pages
+        self.refresh_interval = refresh_interval
+        self.queues = []
+        for queue in queues:
+            entry = {'Queue': queue} if isinstance(queue, str) else dict(queue)
+            self.queues.append(entry)
+        if not self.queues:
+            raise ValueError("QueueScheduler needs at least one queue")
+        self._lock = threading.Lock()
+        self._described = False
+        self._refreshed_at = None
+        self._durations = []
+        # Queue -> outstanding work (jobs observed in the queue plus jobs assigned since)
+        self._load = {queue['Queue']: 0.0 for queue in self.queues}
+        self._depth = {queue['Queue']: {'SUBMITTED': 0, 'PROGRESSING': 0} for queue in self.queues}
+        # Queues whose listing reached max_pages: their depth is only a lower bound
+        self._saturated = {queue['Queue']: False for queue in self.queues}
+
+    def _describe_queues(self) -> None:
+        """Read the type, status and reserved slots of the queues"""
+        for queue in self.queues:
+            queue.setdefault('Status', 'ACTIVE')
+            try:
+                details = self.client.get_queue(Name=queue['Queue'])['Queue']
+            except ClientError as e:
+                logger.warning(f"Could not describe queue {queue['Queue']}: {str(e)}")
+                details = {}
+            queue.setdefault('Type', details.get('Type', 'ON_DEMAND'))
+            queue['Status'] = details.get('Status', queue['Status'])
+            if 'Slots' not in queue:
+                reserved_slots = details.get('ReservationPlan', {}).get('ReservedSlots')
+                queue['Slots'] = reserved_slots if queue['Type'] == 'RESERVED' and reserved_slots \
+                    else DEFAULT_ON_DEMAND_SLOTS
+            queue['Slots'] = max(1.0, float(queue['Slots']))
+        self._described = True
+
+    def _count_jobs(self, queue: str, status: str) -> Tuple[int, bool]:
+        """Count the jobs of a queue in a status; returns (count, True if the count was capped)"""
+        count = 0
+        params = {'Queue': queue, 'Status': status, 'MaxResults': 20}
+        for _ in range(max(1, self.max_pages)):
+            response = self.client.list_jobs(**params)
+            count += len(response.get('Jobs', []))
+            if not response.get('NextToken'):
+                return count, False
+            params['NextToken'] = response['NextToken']
+        return count, True
+
+    def _mean_duration(self) -> float:
+        return sum(self._durations) / len(self._durations) if self._durations else 1.0
+
+    def refresh(self) -> None:
+        """Observe the SUBMITTED and PROGRESSING jobs of every queue"""
+        with self._lock:
+            if not self._described:
+                self._describe_queues()
+            mean_duration = self._mean_duration()
+            for queue in self.queues:
+                if queue['Status'] != 'ACTIVE':
+                    continue
+                name = queue['Queue']
+                counts = {status: self._count_jobs(name, status) for status in self._depth[name]}
+                depth = {status: count for status, (count, _) in counts.items()}
+                self._depth[name] = depth
+                self._saturated[name] = any(capped for _, capped in counts.values())
+                self._load[name] = (depth['SUBMITTED'] + PROGRESSING_WEIGHT * depth['PROGRESSING']) * mean_duration
+                if self._saturated[name]:
+                    logger.info(f"Queue {name} holds more jobs than {self.max_pages} pages list, "
+                                f"treating it as saturated")
+            self._refreshed_at = time.time()
+
+    def _choose(self, duration: float) -> str:
+        """Pick the queue where a job of this duration would finish first and book it there"""
+        best, best_key = None, None
+        for index, queue in enumerate(self.queues):
+            if queue['Status'] != 'ACTIVE':
+                continue
+            name = queue['Queue']
+            finish = (self._load[name] + duration) / queue['Slots']
+            # A saturated queue's load is only a lower bound: use it only if all queues are saturated
+            key = (self._saturated[name], finish, queue['Type'] != 'RESERVED', index)
+            if best_key is None or key < best_key:
+                best, best_key = name, key
+        if best is None:
+            raise RuntimeError("No active queue in the pool")
+        self._load[best] += duration
+        return best
+
+    def assign(self, jobs: Iterable) -> List[Tuple[Any, Dict[str, Any]]]:
+        """
+        Order a batch of jobs and set the Queue of each
+
+        The whole batch is read into memory before the first job is assigned, so that
+        jobs can be ordered and the load observed once.
+
+        Args:
+            jobs: Job profiles, or (key, job_profile) tuples as accepted by
+                MediaConvertJobSubmitter.submit_jobs()
+
+        Returns:
+            List of (key, job_profile) tuples in submission order
+        """
+        batch = []
+        for index, job in enumerate(jobs):
+            key, job_profile = job if isinstance(job, tuple) else (index, job)
+            duration = float(self.estimate(job_profile))
+            batch.append((key, job_profile, duration))
+        if not batch:
+            return []
+
+        with self._lock:
+            self._durations = [duration for _, _, duration in batch]
+        if self._refreshed_at is None or time.time() - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+
+        # Stable sort: higher priority first, then (optionally) longer jobs first
+        batch.sort(key=lambda item: (-int(item[1].get('Priority', 0)),
+                                     -item[2] if self.longest_first else 0))
+        with self._lock:
+            for key, job_profile, duration in batch:
+                job_profile['Queue'] = self._choose(duration)
+
+        for queue in self.queues:
+            assigned = sum(1 for _, job_profile, _ in batch if job_profile['Queue'] == queue['Queue'])
+            if assigned:
+                logger.info(f"Assigned {assigned} jobs to queue {queue['Queue']} "
+                            f"({queue['Type'].lower()}, {queue['Slots']:g} slots)")
+        return [(key, job_profile) for key, job_profile, _ in batch]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Return the slots, last observed depth and predicted load of every queue"""
+        with self._lock:
+            return [{
+                'Queue': queue['Queue'],
+                'Type': queue.get('Type'),
+                'Slots': queue.get('Slots'),
+                'Depth': dict(self._depth[queue['Queue']]),
+                'Saturated': self._saturated[queue['Queue']],
+                'PredictedFinish': self._load[queue['Queue']] / queue['Slots'] if queue.get('Slots') else None,
+            } for queue in self.queues]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Token bucket rate limiter for MediaConvert API calls
+
+MediaConvert enforces a per-account transactions-per-second quota on CreateJob
+(and on the other API operations). TokenBucket paces callers from any number of
+threads to a target rate and adapts it when the service answers with
+TooManyRequestsException: the rate is halved on every throttle and recovers
+step by step after successful calls, up to the configured maximum.
+"""
+
+import random
+import threading
+import time
+from typing import Optional
+
+
+# Error codes MediaConvert (and botocore) use for throttled requests
+THROTTLING_ERROR_CODES = frozenset([
+    'TooManyRequestsException',
+    'ThrottlingException',
+    'Throttling',
+    'RequestLimitExceeded',
+    'SlowDown',
+])
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """Return True if a botocore ClientError reports throttling"""
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 20.0) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (1-based)"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with adaptive rate
+
+    Attributes:
+        max_rate: Configured rate in tokens per second, never exceeded
+        rate: Current rate, lowered by throttled() and raised by succeeded()
+        capacity: Maximum number of tokens (burst size)
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: Optional[float] = None,
+                 backoff_factor: float = 0.5, recovery_step: Optional[float] = None):
+        """
+        Args:
+            rate: Target rate in tokens (requests) per second, e.g. the CreateJob TPS quota
+            burst: Bucket capacity (default: one second worth of tokens, at least 1)
+            min_rate: Lowest rate throttling can push the bucket to (default: rate / 20)
+            backoff_factor: Factor applied to the rate on each throttle
+            recovery_step: Rate added back after each successful call (default: rate / 20)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst else max(1.0, self.max_rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate / 20
+        self.backoff_factor = backoff_factor
+        self.recovery_step = float(recovery_step) if recovery_step else self.max_rate / 20
+        self.throttle_count = 0
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Take tokens from the bucket, waiting until they are available
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Maximum time to wait in seconds (default: wait as long as needed)
+
+        Returns:
+            True if the tokens were taken, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def throttled(self) -> None:
+        """Report a throttled call: lower the rate and drop the tokens already in the bucket"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+            self._tokens = min(self._tokens, 0.0)
+            self.throttle_count += 1
+
+    def succeeded(self) -> None:
+        """Report a successful call: let the rate recover towards max_rate"""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
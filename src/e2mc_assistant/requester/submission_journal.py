@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Crash-safe journal of MediaConvert job submissions
+
+A batch that dies midway used to be resubmitted from scratch, paying for a
+second transcode of every job that had already been created. The journal is a
+small SQLite database recording, per file ID, the hash of the submitted
+configuration, the ClientRequestToken used for create_job, the job ID and the
+last known status.
+
+The token is written before create_job is called and reused on every retry of
+the same configuration. MediaConvert only returns the existing job for a token
+reused within one minute, which covers retries inside a run but not a rerun
+after a crash. Jobs are therefore also tagged with their token in UserMetadata
+(TOKEN_METADATA_KEY): on a rerun, entries that have a token but no job ID are
+matched against the jobs listed since the token was issued with adopt(), so a
+job created just before the crash is recorded instead of submitted again.
+
+A rerun skips configurations whose job is already submitted, progressing or
+complete; a new token is only issued when the configuration changes or the
+previous job failed or was canceled.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# Statuses whose job must not be submitted again for the same configuration
+ACTIVE_STATUSES = ('SUBMITTED', 'PROGRESSING')
+DONE_STATUSES = ('COMPLETE',)
+# Statuses after which the configuration is submitted again, with a new token
+RETRY_STATUSES = ('ERROR', 'CANCELED')
+# UserMetadata key carrying the ClientRequestToken of a journaled job
+TOKEN_METADATA_KEY = 'e2mc-token'
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionJournal:
+    """SQLite journal of job submissions, keyed by file ID"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file, created if missing
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit: every write is durable once the call returns
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS submissions (
+                file_id TEXT PRIMARY KEY,
+                config_hash TEXT NOT NULL,
+                client_request_token TEXT NOT NULL,
+                job_id TEXT,
+                status TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Return the journal entry of a file ID, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM submissions WHERE file_id = ?', (file_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def begin(self, file_id: str, config_hash: str) -> Dict[str, Any]:
+        """
+        Return the entry to submit or skip a configuration with
+
+        The entry of the same configuration is returned unchanged unless its job failed
+        or was canceled, so its ClientRequestToken is reused. Otherwise a new entry with
+        a new token and status PENDING replaces it.
+
+        Args:
+            file_id: ID of the configuration
+            config_hash: Hash of the configuration as it will be submitted
+
+        Returns:
+            Entry with file_id, config_hash, client_request_token, job_id and status
+        """
+        entry = self.get(file_id)
+        if entry is not None and entry['config_hash'] == config_hash and entry['status'] not in RETRY_STATUSES:
+            return entry
+
+        entry = {
+            'file_id': file_id,
+            'config_hash': config_hash,
+            'client_request_token': str(uuid.uuid4()),
+            'job_id': None,
+            'status': 'PENDING',
+            'updated_at': time.time(),
+        }
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO submissions VALUES '
+                '(:file_id, :config_hash, :client_request_token, :job_id, :status, :updated_at)', entry)
+        return entry
+
+    def record_job(self, file_id: str, job_id: str, status: str = 'SUBMITTED') -> None:
+        """Record the job created for a configuration"""
+        with self._lock:
+            self._conn.execute('UPDATE submissions SET job_id = ?, status = ?, updated_at = ? WHERE file_id = ?',
+                               (job_id, status, time.time(), file_id))
+
+    def record_status(self, file_id: str, status: str) -> None:
+        """Record the latest status of a configuration's job"""
+        with self._lock:
+            self._conn.execute('UPDATE submissions SET status = ?, updated_at = ? WHERE file_id = ?',
+                               (status, time.time(), file_id))
+
+    def unrecorded(self) -> List[Dict[str, Any]]:
+        """Return the entries whose token was issued but whose job ID was never recorded"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM submissions WHERE job_id IS NULL AND status = 'PENDING' "
+                                      "ORDER BY updated_at").fetchall()
+        return [dict(row) for row in rows]
+
+    def adopt(self, jobs: Iterable[Dict[str, Any]]) -> int:
+        """
+        Record the jobs of unrecorded entries, found by the token in their UserMetadata
+
+        Args:
+            jobs: Job details, e.g. from iter_jobs() since the oldest unrecorded entry was
+                written; the iterable is only consumed until every entry is matched
+
+        Returns:
+            Number of entries whose job was recorded
+        """
+        file_ids = {entry['client_request_token']: entry['file_id'] for entry in self.unrecorded()}
+        adopted = 0
+        if not file_ids:
+            return adopted
+        for job in jobs:
+            file_id = file_ids.pop((job.get('UserMetadata') or {}).get(TOKEN_METADATA_KEY), None)
+            if file_id is None:
+                continue
+            logger.info(f"Adopting job {job['Id']} ({job.get('Status')}) of {file_id}, created before its "
+                        f"job ID was recorded")
+            self.record_job(file_id, job['Id'], job.get('Status', 'SUBMITTED'))
+            adopted += 1
+            if not file_ids:
+                break
+        return adopted
+
+    def summary(self) -> Dict[str, int]:
+        """Return the number of entries per status"""
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM submissions GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+MediaConvert job templates and presets for converted profiles
+
+create_job normally carries the complete converted Settings tree, although
+across a batch most of it repeats: profiles differ in their input and output
+locations, and many outputs are identical. TemplateRegistry moves the
+repeated parts into MediaConvert resources:
+
+- the encoding settings of each output (VideoDescription, AudioDescriptions,
+  ContainerSettings) become a Preset
+- the rest of the profile, with outputs referencing their presets and without
+  the input file and output destinations, becomes a JobTemplate
+
+Resources are named after a hash of their content (e2mc-preset-<hash>,
+e2mc-template-<hash>), so identical content maps to one resource and syncing
+again only creates what is missing. Jobs are then submitted with a JobTemplate
+reference and the template's Settings with the input files and destinations
+filled in. Those settings are complete, so the job does not depend on how
+MediaConvert merges partial Inputs or OutputGroups into the template's lists;
+the request still shrinks because the outputs only reference their presets.
+Job-level keys other than the template's (Role, UserMetadata, JobEngineVersion,
+SimulateReservedQueue, ...) are passed through to create_job unchanged.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Set
+
+from botocore.exceptions import ClientError
+
+
+# Output settings moved into presets. Caption descriptions stay on the outputs:
+# preset captions cannot reference the input caption selectors.
+PRESET_KEYS = ('AudioDescriptions', 'ContainerSettings', 'VideoDescription')
+
+# Top-level job profile keys moved into the job template; every other key except
+# Settings stays on the job (the queue may be chosen per job, see queue_scheduler.py)
+JOB_TEMPLATE_KEYS = ('AccelerationSettings', 'HopDestinations', 'Priority', 'StatusUpdateInterval')
+
+DESTINATION_SETTINGS = {
+    'FILE_GROUP_SETTINGS': 'FileGroupSettings',
+    'HLS_GROUP_SETTINGS': 'HlsGroupSettings',
+    'DASH_ISO_GROUP_SETTINGS': 'DashIsoGroupSettings',
+    'CMAF_GROUP_SETTINGS': 'CmafGroupSettings',
+    'MS_SMOOTH_GROUP_SETTINGS': 'MsSmoothGroupSettings',
+}
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(value: Any) -> str:
+    """Return a short, stable hash of a JSON-serializable value"""
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+class TemplateRegistry:
+    """
+    Create presets and job templates for job profiles, idempotently
+
+    Existing resources of the registry's category are listed once, then the
+    registry keeps track of what it created; it is safe to use from the
+    submission threads of MediaConvertJobSubmitter.submit_jobs().
+    """
+
+    def __init__(self, client, prefix: str = 'e2mc', category: str = 'e2mc-assistant'):
+        """
+        Args:
+            client: boto3 MediaConvert client (with the account endpoint)
+            prefix: Prefix of the preset and job template names
+            category: MediaConvert category the resources are created in
+        """
+        self.client = client
+        self.prefix = prefix
+        self.category = category
+        self.created = {'presets': 0, 'templates': 0}
+        self._presets: Optional[Set[str]] = None
+        self._templates: Optional[Set[str]] = None
+        self._lock = threading.Lock()
+
+    def split_profile(self, job_profile: Dict[str, Any]):
+        """
+        Split a job profile into a job template and its presets
+
+        Args:
+            job_profile: Job profile with a Settings section
+
+        Returns:
+            Tuple of (template_name, template, presets) where template holds the
+            create_job_template arguments and presets maps preset names to their settings
+        """
+        settings = copy.deepcopy(job_profile['Settings'])
+        presets = {}
+
+        for output_group in settings.get('OutputGroups', []):
+            group_settings = output_group.get('OutputGroupSettings', {})
+            destination_key = DESTINATION_SETTINGS.get(group_settings.get('Type'))
+            if destination_key and destination_key in group_settings:
+                group_settings[destination_key].pop('Destination', None)
+            for output in output_group.get('Outputs', []):
+                preset_settings = {key: output.pop(key) for key in PRESET_KEYS if key in output}
+                if not preset_settings:
+                    continue
+                preset_name = f"{self.prefix}-preset-{content_hash(preset_settings)}"
+                presets[preset_name] = preset_settings
+                output['Preset'] = preset_name
+
+        # Profiles without inputs get one at submission time (see E2MCWorkflow.submit_mediaconvert_jobs)
+        settings['Inputs'] = settings.get('Inputs') or [{}]
+        for job_input in settings['Inputs']:
+            job_input.pop('FileInput', None)
+
+        template = {key: job_profile[key] for key in JOB_TEMPLATE_KEYS if key in job_profile}
+        template['Settings'] = settings
+        template_name = f"{self.prefix}-template-{content_hash(template)}"
+        return template_name, template, presets
+
+    def _list_names(self, operation: str, result_key: str) -> Set[str]:
+        names = set()
+        params = {'Category': self.category, 'ListBy': 'NAME', 'MaxResults': 20}
+        while True:
+            response = getattr(self.client, operation)(**params)
+            names.update(item['Name'] for item in response.get(result_key, []))
+            if not response.get('NextToken'):
+                return names
+            params['NextToken'] = response['NextToken']
+
+    def _create(self, kind: str, name: str, create) -> bool:
+        """Create a resource unless it exists; returns True if it was created"""
+        try:
+            create()
+        except ClientError as e:
+            # Created by a concurrent run since the listing
+            if e.response.get('Error', {}).get('Code') == 'ConflictException':
+                logger.debug(f"{kind} {name} already exists")
+                return False
+            raise
+        logger.info(f"Created {kind} {name}")
+        return True
+
+    def sync_profile(self, job_profile: Dict[str, Any], description: Optional[str] = None) -> str:
+        """
+        Make sure the job template of a profile and its presets exist
+
+        Args:
+            job_profile: Job profile with a Settings section
+            description: Optional description of newly created resources, e.g. the profile file
+
+        Returns:
+            Name of the job template
+        """
+        template_name, template, presets = self.split_profile(job_profile)
+        self._ensure(template_name, template, presets, description)
+        return template_name
+
+    def _ensure(self, template_name: str, template: Dict[str, Any], presets: Dict[str, Any],
+                description: Optional[str]) -> None:
+        """Create the job template and presets of a split profile that do not exist yet"""
+        description = description or 'Created by e2mc-assistant'
+
+        with self._lock:
+            if self._presets is None:
+                self._presets = self._list_names('list_presets', 'Presets')
+                self._templates = self._list_names('list_job_templates', 'JobTemplates')
+
+            for preset_name, preset_settings in presets.items():
+                if preset_name in self._presets:
+                    continue
+                if self._create('preset', preset_name, lambda: self.client.create_preset(
+                        Name=preset_name, Category=self.category, Description=description,
+                        Settings=preset_settings)):
+                    self.created['presets'] += 1
+                self._presets.add(preset_name)
+
+            if template_name not in self._templates:
+                if self._create('job template', template_name, lambda: self.client.create_job_template(
+                        Name=template_name, Category=self.category, Description=description, **template)):
+                    self.created['templates'] += 1
+                self._templates.add(template_name)
+
+    def job_settings(self, job_profile: Dict[str, Any], template_settings: Optional[Dict[str, Any]] = None
+                     ) -> Dict[str, Any]:
+        """
+        Return the Settings of a templated job: the template's settings with the
+        profile's input files and output destinations filled in
+
+        Args:
+            job_profile: Job profile with a Settings section
+            template_settings: Settings of the profile's job template (default: split from the profile)
+
+        Returns:
+            Complete job settings whose outputs reference their presets
+        """
+        if template_settings is None:
+            template_settings = self.split_profile(job_profile)[1]['Settings']
+        settings = copy.deepcopy(template_settings)
+        profile_settings = job_profile['Settings']
+
+        profile_inputs = profile_settings.get('Inputs') or []
+        for job_input, profile_input in zip(settings.get('Inputs', []), profile_inputs):
+            if 'FileInput' in profile_input:
+                job_input['FileInput'] = profile_input['FileInput']
+
+        for output_group, profile_group in zip(settings.get('OutputGroups', []),
+                                               profile_settings.get('OutputGroups', [])):
+            group_settings = output_group.get('OutputGroupSettings', {})
+            destination_key = DESTINATION_SETTINGS.get(group_settings.get('Type'))
+            destination = profile_group.get('OutputGroupSettings', {}).get(destination_key, {}).get('Destination') \
+                if destination_key else None
+            if destination:
+                group_settings.setdefault(destination_key, {})['Destination'] = destination
+        return settings
+
+    def job_request(self, job_profile: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build create_job arguments that reference the profile's job template
+
+        The template and presets are created first if they do not exist yet.
+
+        Args:
+            job_profile: Job profile ready for submission (input URL and destination set)
+
+        Returns:
+            Arguments for create_job: JobTemplate, the job settings (see job_settings())
+            and every top-level key of the profile the template does not hold (Role,
+            UserMetadata, JobEngineVersion, ...)
+        """
+        template_name, template, presets = self.split_profile(job_profile)
+        self._ensure(template_name, template, presets, None)
+        request = {key: value for key, value in job_profile.items()
+                   if key != 'Settings' and key not in JOB_TEMPLATE_KEYS}
+        request['JobTemplate'] = template_name
+        request['Settings'] = self.job_settings(job_profile, template['Settings'])
+        return request
+
+    def sync_profiles(self, job_profiles: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Sync many profiles
+
+        Args:
+            job_profiles: Profiles by a label such as their file name
+
+        Returns:
+            Dictionary mapping each label to its job template name
+        """
+        templates = {}
+        for label, job_profile in job_profiles.items():
+            templates[label] = self.sync_profile(job_profile, description=f"Created by e2mc-assistant from {label}")
+        return templates
+
+    def summary(self) -> Dict[str, int]:
+        """Return how many presets and job templates were created and are known"""
+        return {
+            'presets_created': self.created['presets'],
+            'templates_created': self.created['templates'],
+            'presets_known': len(self._presets or ()),
+            'templates_known': len(self._templates or ()),
+        }
@@ -11,23 +11,33 @@ Author: AWS Professional Services
 """
 
 import argparse
-import boto3
+import io
 import json
 import logging
 import os
 import re
+import shutil
 import sys
+import tempfile
 import time
 from datetime import datetime
 import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 from botocore.exceptions import ClientError
 
 # Import required modules from the project
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+from src.e2mc_assistant import aws_clients
 from src.e2mc_assistant.converter.config_converter_enhanced import ConfigConverter
 from src.e2mc_assistant.requester.mediaconvert_job_submitter import MediaConvertJobSubmitter
+from src.e2mc_assistant.requester.job_index import iter_jobs
+from src.e2mc_assistant.requester.queue_scheduler import parse_queue_spec
+from src.e2mc_assistant.requester.submission_journal import (ACTIVE_STATUSES, DONE_STATUSES, RETRY_STATUSES,
+                                                              TOKEN_METADATA_KEY, SubmissionJournal)
+from src.e2mc_assistant.requester.template_registry import content_hash
 from src.e2mc_assistant.analyzer.video_analyzer import VideoAnalyzer
 
 # Configure logging
@@ -46,18 +56,41 @@ class E2MCWorkflow:
 
     # Constants for path handling
     S3_PREFIX = "s3://"
+    
+    # Default submission journal, in the configuration directory
+    SUBMISSION_JOURNAL_FILE = "submission_journal.db"
+    # Seconds listed before the oldest unrecorded journal entry, for clock skew with MediaConvert
+    JOURNAL_LOOKBACK_MARGIN = 300
 
-    def __init__(self, region: str = 'us-east-1', role_arn: Optional[str] = None):
+    def __init__(self, region: str = 'us-east-1', role_arn: Optional[str] = None, s3_max_workers: int = 16,
+                 event_queue_url: Optional[str] = None, adaptive_polling: bool = False,
+                 use_templates: bool = False, queues: Optional[List] = None, longest_first: bool = False):
         """
         Initialize the workflow handler.
 
         Args:
             region: AWS region for MediaConvert and S3 operations
             role_arn: IAM role ARN for MediaConvert to access resources
+            s3_max_workers: Number of concurrent S3 transfers when converting from or to S3
+            event_queue_url: Optional SQS queue receiving MediaConvert job state-change events,
+                used instead of polling to wait for job completion
+            adaptive_polling: Poll jobs more often as they near completion instead of every 10 seconds
+            use_templates: Submit jobs as a MediaConvert job template reference whose outputs
+                reference presets instead of carrying their complete encoding settings
+            queues: Optional pool of MediaConvert queues to spread jobs over by observed load
+                and predicted duration (names, ARNs or dicts with 'Queue' and 'Slots')
+            longest_first: With queues, submit the longest jobs of each priority first
         """
         self.region = region
         self.role_arn = role_arn
-        self.s3_client = boto3.client('s3', region_name=region)
+        self.event_queue_url = event_queue_url
+        self.adaptive_polling = adaptive_polling
+        self.use_templates = use_templates
+        self.queues = queues
+        self.longest_first = longest_first
+        self.s3_max_workers = max(1, s3_max_workers)
+        # Shared S3 client with one pooled connection per transfer thread
+        self.s3_client = aws_clients.get_client('s3', region=region, max_pool_connections=self.s3_max_workers)
         
         # Initialize components
         self.converter = None
@@ -68,9 +101,15 @@ class E2MCWorkflow:
         """
         Convert Encoding.com configuration files to MediaConvert configuration files.
 
+        Either directory may be an S3 URI (s3://bucket/prefix/). Profiles in S3 are
+        downloaded concurrently and converted in memory, and converted files are
+        uploaded concurrently while the next profiles are converted. When the output
+        is in S3, the conversion logs and error files are uploaded next to the
+        converted files once all profiles are done.
+
         Args:
-            input_dir: Directory containing Encoding.com configuration files
-            output_dir: Directory to save MediaConvert configuration files
+            input_dir: Directory or S3 URI containing Encoding.com configuration files
+            output_dir: Directory or S3 URI to save MediaConvert configuration files
             rules_file: Path to the mapping rules file
             template_file: Optional path to a template MediaConvert file
             schema_file: Optional path to a JSON schema file for validation
@@ -78,54 +117,74 @@ class E2MCWorkflow:
             exclude_ids: Optional list of video IDs to exclude
 
         Returns:
-            List of paths to the generated MediaConvert configuration files
+            List of paths (or S3 URIs) of the generated MediaConvert configuration files
         """
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
+        input_is_s3 = input_dir.startswith(self.S3_PREFIX)
+        output_is_s3 = output_dir.startswith(self.S3_PREFIX)
         
-        # Initialize converter
-        self.converter = ConfigConverter(rules_file)
+        # Logs and error files are written locally first; for S3 output they go to a
+        # staging directory that is uploaded at the end
+        log_dir = tempfile.mkdtemp(prefix='e2mc_convert_') if output_is_s3 else output_dir
+        os.makedirs(log_dir, exist_ok=True)
         
-        # Configure logging for converter
-        converter_logger = logging.getLogger('ConfigConverter')
-        converter_logger.setLevel(logging.INFO)
+        details_handler = None
+        pool = None
+        try:
+            # Initialize converter
+            self.converter = ConfigConverter(rules_file)
         
-        # Create a file handler for detailed logs
-        log_file = os.path.join(output_dir, 'conversion_details.log')
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        converter_logger.addHandler(file_handler)
+            # A single validator is reused for every converted file
+            validator = None
+            if schema_file:
+                from utils.mc_config_validator.validator import MediaConvertConfigValidator
+                validator = MediaConvertConfigValidator(schema_file)
         
-        # Track converted files
-        converted_files = []
+            # Configure logging for converter
+            converter_logger = logging.getLogger('ConfigConverter')
+            converter_logger.setLevel(logging.INFO)
         
-        # Process each XML file in the input directory
-        for filename in os.listdir(input_dir):
-            if filename.endswith('.xml'):
-                source_file = os.path.join(input_dir, filename)
-                
+            # Create a file handler for detailed logs
+            log_file = os.path.join(log_dir, 'conversion_details.log')
+            details_handler = logging.FileHandler(log_file)
+            details_handler.setLevel(logging.DEBUG)
+            details_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            converter_logger.addHandler(details_handler)
+        
+            # Track converted files
+            converted_files = []
+        
+            # Select the XML files to convert
+            selected = []
+            for filename, source_file in self._list_config_sources(input_dir):
                 # Extract ID from filename (assuming it's a number at the beginning)
                 id_match = re.match(r'^(\d+)', filename)
                 if id_match:
                     file_id = id_match.group(1)
                 else:
                     file_id = os.path.splitext(filename)[0]
-                
+            
                 # Apply include/exclude filtering
                 if include_ids and file_id not in include_ids:
                     logger.info(f"Skipping {filename} - ID {file_id} not in include list")
                     continue
-                
+            
                 if exclude_ids and file_id in exclude_ids:
                     logger.info(f"Skipping {filename} - ID {file_id} in exclude list")
                     continue
-                
+            
+                selected.append((file_id, source_file))
+        
+            pool = ThreadPoolExecutor(max_workers=self.s3_max_workers) if input_is_s3 or output_is_s3 else None
+            uploads = []
+            for file_id, source_file, download in self._iter_config_sources(selected, pool):
                 # Define output filename with the same ID prefix
-                output_file = os.path.join(output_dir, f"{file_id}.json")
+                if output_is_s3:
+                    output_file = self._join_s3_uri(output_dir, f"{file_id}.json")
+                else:
+                    output_file = os.path.join(output_dir, f"{file_id}.json")
                 
                 # Create a specific log file for this conversion
-                file_log = os.path.join(output_dir, f"{file_id}_conversion.log")
+                file_log = os.path.join(log_dir, f"{file_id}_conversion.log")
                 file_handler = logging.FileHandler(file_log)
                 file_handler.setLevel(logging.DEBUG)
                 file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
@@ -136,46 +195,49 @@ class E2MCWorkflow:
                     converter_logger.info(f"Starting conversion of {source_file}")
                     
                     # Convert the configuration
-                    result = self.converter.convert(source_file, template_file)
+                    if download is not None:
+                        source_data = self.converter.parse_xml_string(download.result())
+                        result = self.converter.convert_data(source_data, template_file, source_file)
+                    else:
+                        result = self.converter.convert(source_file, template_file)
                     
                     # Write the output file
-                    with open(output_file, 'w') as f:
-                        json.dump(result, f, indent=2)
-                    
-                    logger.info(f"Converted {source_file} to {output_file}")
-                    converted_files.append(output_file)
+                    if output_is_s3:
+                        bucket_name, key = self._parse_s3_path(output_file)
+                        body = json.dumps(result, indent=2).encode('utf-8')
+                        uploads.append((output_file, pool.submit(self._upload_s3_object, bucket_name, key, body)))
+                        logger.info(f"Converted {source_file}, uploading to {output_file}")
+                    else:
+                        with open(output_file, 'w') as f:
+                            json.dump(result, f, indent=2)
+                        logger.info(f"Converted {source_file} to {output_file}")
+                        converted_files.append(output_file)
                     
                     # Log successful conversion
                     converter_logger.info(f"Successfully converted {source_file} to {output_file}")
                     
                     # Validate the converted file if schema is provided
-                    if schema_file:
-                        from utils.mc_config_validator.validator import MediaConvertConfigValidator
-                        validator = MediaConvertConfigValidator(schema_file)
+                    if validator:
                         converter_logger.info(f"Validating {output_file} against schema {schema_file}")
-                        is_valid = validator.validate_config(output_file)
-                        if not is_valid:
-                            error_file = os.path.join(output_dir, f"{file_id}.err")
-                            
-                            # Create a string handler to capture validation errors
-                            import io
-                            string_io = io.StringIO()
-                            string_handler = logging.StreamHandler(string_io)
-                            string_handler.setLevel(logging.ERROR)
-                            validator.logger.addHandler(string_handler)
-                            
-                            # Re-run validation to capture errors
-                            validator.validate_config(output_file)
-                            
-                            # Get the captured error messages
+                        
+                        # Capture the validation errors for the error file
+                        string_io = io.StringIO()
+                        string_handler = logging.StreamHandler(string_io)
+                        string_handler.setLevel(logging.ERROR)
+                        validator.logger.addHandler(string_handler)
+                        try:
+                            is_valid = validator.validate_data(result, output_file)
+                        finally:
                             validator.logger.removeHandler(string_handler)
-                            error_messages = string_io.getvalue()
+                        
+                        if not is_valid:
+                            error_file = os.path.join(log_dir, f"{file_id}.err")
                             
                             # Write detailed error information to the error file
                             with open(error_file, 'w') as f:
                                 f.write(f"Validation failed for {output_file}\n")
                                 f.write("Validation errors:\n")
-                                f.write(error_messages)
+                                f.write(string_io.getvalue())
                             
                             converter_logger.error(f"Validation failed for {output_file}. Error log written to {error_file}")
                         else:
@@ -188,38 +250,196 @@ class E2MCWorkflow:
                 # Remove the file-specific handler
                 converter_logger.removeHandler(file_handler)
                 file_handler.close()
+            
+            # Wait for the converted files to reach S3
+            for output_file, upload in uploads:
+                try:
+                    upload.result()
+                    converted_files.append(output_file)
+                except Exception as e:
+                    logger.error(f"Error uploading {output_file}: {str(e)}")
+            
+            # The detailed log is complete; close it before it is uploaded
+            converter_logger.removeHandler(details_handler)
+            details_handler.close()
+            
+            logger.info(f"Converted {len(converted_files)} configuration files")
+            if output_is_s3:
+                # Upload the logs and error files next to the converted files
+                log_uploads = []
+                for filename in sorted(os.listdir(log_dir)):
+                    bucket_name, key = self._parse_s3_path(self._join_s3_uri(output_dir, filename))
+                    with open(os.path.join(log_dir, filename), 'rb') as f:
+                        log_uploads.append((filename, pool.submit(self._upload_s3_object, bucket_name, key, f.read())))
+                for filename, upload in log_uploads:
+                    try:
+                        upload.result()
+                    except Exception as e:
+                        logger.error(f"Error uploading {filename}: {str(e)}")
+                print(f"Detailed conversion logs uploaded to {output_dir}")
+            else:
+                print(f"Detailed conversion logs saved to {log_file} and individual files in {output_dir}")
+            return converted_files
+        finally:
+            if details_handler is not None:
+                converter_logger.removeHandler(details_handler)
+                details_handler.close()
+            if pool is not None:
+                pool.shutdown()
+            if output_is_s3:
+                shutil.rmtree(log_dir, ignore_errors=True)
+
+    def _list_config_sources(self, input_dir: str) -> List[Tuple[str, str]]:
+        """
+        List the Encoding.com XML files of a directory or S3 prefix.
+
+        Only the files directly under the prefix are listed, like os.listdir().
+
+        Args:
+            input_dir: Local directory or S3 URI
+
+        Returns:
+            List of (filename, path or S3 URI) tuples
+        """
+        if not input_dir.startswith(self.S3_PREFIX):
+            return [
+                (filename, os.path.join(input_dir, filename))
+                for filename in os.listdir(input_dir)
+                if filename.endswith('.xml')
+            ]
+        
+        bucket_name, prefix = self._parse_s3_path(input_dir)
+        if prefix:
+            prefix = f"{prefix}/"
+        
+        sources = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter='/'):
+            for obj in page.get('Contents', []):
+                filename = obj['Key'][len(prefix):]
+                if filename.endswith('.xml'):
+                    sources.append((filename, f"{self.S3_PREFIX}{bucket_name}/{obj['Key']}"))
+        return sources
+
+    def _iter_config_sources(self, selected: List[Tuple[str, str]], pool: Optional[ThreadPoolExecutor]):
+        """
+        Yield the selected sources in order, downloading S3 objects ahead of the conversion.
+
+        At most twice as many downloads as pool workers are in flight, so memory stays
+        bounded however many profiles the prefix holds.
+
+        Args:
+            selected: List of (file_id, path or S3 URI) tuples
+            pool: Thread pool for S3 downloads (unused for local files)
+
+        Yields:
+            Tuples of (file_id, source, download) where download is a future holding the
+            object's bytes, or None for local files
+        """
+        pending = deque()
+        for file_id, source_file in selected:
+            if not source_file.startswith(self.S3_PREFIX):
+                yield file_id, source_file, None
+                continue
+            
+            bucket_name, key = self._parse_s3_path(source_file)
+            pending.append((file_id, source_file, pool.submit(self._download_s3_object, bucket_name, key)))
+            if len(pending) >= self.s3_max_workers * 2:
+                yield pending.popleft()
         
-        logger.info(f"Converted {len(converted_files)} configuration files")
-        print(f"Detailed conversion logs saved to {log_file} and individual files in {output_dir}")
-        return converted_files
+        while pending:
+            yield pending.popleft()
 
-    def submit_mediaconvert_jobs(self, config_dir: str, s3_source_path: str, wait_for_completion: bool = True, include_ids: Optional[List[str]] = None, exclude_ids: Optional[List[str]] = None, s3_output_path: Optional[str] = None) -> Dict[str, str]:
+    def _download_s3_object(self, bucket_name: str, key: str) -> bytes:
+        """Read an S3 object; errors are raised to the caller"""
+        response = self.s3_client.get_object(Bucket=bucket_name, Key=key)
+        return response['Body'].read()
+
+    def _upload_s3_object(self, bucket_name: str, key: str, body: bytes) -> None:
+        """Write an S3 object; errors are raised to the caller"""
+        self.s3_client.put_object(Bucket=bucket_name, Key=key, Body=body)
+
+    def _join_s3_uri(self, s3_path: str, filename: str) -> str:
+        """Return the S3 URI of a file under an S3 prefix"""
+        bucket_name, prefix = self._parse_s3_path(s3_path)
+        key = f"{prefix}/{filename}" if prefix else filename
+        return f"{self.S3_PREFIX}{bucket_name}/{key}"
+
+    def submit_mediaconvert_jobs(self, config_dir: str, s3_source_path: str, wait_for_completion: bool = True, include_ids: Optional[List[str]] = None, exclude_ids: Optional[List[str]] = None, s3_output_path: Optional[str] = None, max_workers: int = MediaConvertJobSubmitter.DEFAULT_MAX_WORKERS, max_tps: float = MediaConvertJobSubmitter.DEFAULT_MAX_TPS, journal_file: Optional[str] = None) -> Dict[str, str]:
         """
         Submit MediaConvert jobs for each configuration file.
 
+        Jobs are submitted concurrently through MediaConvertJobSubmitter.submit_jobs(),
+        paced to max_tps CreateJob calls per second. When waiting for completion, all
+        submitted jobs are then tracked together by a single JobTracker.
+
+        With a journal file, every job is submitted with a ClientRequestToken recorded in
+        the journal before create_job is called and tagged with it in UserMetadata.
+        MediaConvert only honours a reused token for one minute, so on a rerun the jobs
+        whose ID a crash kept from being recorded are found by that tag with list_jobs
+        and adopted instead of submitted again. Configurations whose job is already submitted or complete
+        are skipped (and waited for if still running), and the others reuse their token.
+        Jobs the journal holds as submitted or progressing are first refreshed with
+        get_job; one that has since failed or been canceled is submitted again with a
+        new token.
+
         Args:
             config_dir: Directory containing MediaConvert configuration files
             s3_source_path: S3 path where source videos are stored
-            wait_for_completion: Whether to wait for each job to complete before submitting the next
+            wait_for_completion: Whether to wait for the submitted jobs to complete
             include_ids: Optional list of IDs to include (only these IDs will be processed)
             exclude_ids: Optional list of IDs to exclude from processing
             s3_output_path: Optional S3 path for MediaConvert output files
+            max_workers: Number of submission threads
+            max_tps: Maximum CreateJob calls per second (the account's CreateJob quota)
+            journal_file: Optional SQLite submission journal (see SubmissionJournal)
 
         Returns:
             Dictionary mapping job IDs to their status
         """
+        journal = SubmissionJournal(journal_file) if journal_file else None
+        try:
+            return self._submit_jobs(config_dir, s3_source_path, wait_for_completion, include_ids, exclude_ids,
+                                     s3_output_path, max_workers, max_tps, journal)
+        finally:
+            if journal is not None:
+                logger.info(f"Submission journal {journal_file}: {journal.summary()}")
+                journal.close()
+
+    def _submit_jobs(self, config_dir: str, s3_source_path: str, wait_for_completion: bool,
+                     include_ids: Optional[List[str]], exclude_ids: Optional[List[str]], s3_output_path: Optional[str],
+                     max_workers: int, max_tps: float, journal: Optional[SubmissionJournal]) -> Dict[str, str]:
+        """Submit and track the jobs of submit_mediaconvert_jobs()"""
         # Initialize job submitter
         self.job_submitter = MediaConvertJobSubmitter(
             region=self.region,
-            role_arn=self.role_arn
+            role_arn=self.role_arn,
+            event_queue_url=self.event_queue_url,
+            max_pool_connections=max_workers,
+            adaptive_polling=self.adaptive_polling,
+            use_templates=self.use_templates,
+            queues=self.queues,
+            longest_first=self.longest_first
         )
         
         # Track job IDs and status
         job_results = {}
         
-        # Process each JSON file in the config directory
-        for filename in sorted(os.listdir(config_dir)):
-            if filename.endswith('.json'):
+        # Configuration file and job profile of every job handed to the submitter, by file ID
+        prepared = {}
+        
+        # Shared poller for the submitted jobs
+        tracker = self.job_submitter.job_tracker()
+        
+        if journal is not None:
+            self._adopt_unrecorded_jobs(journal)
+        
+        def prepare_jobs():
+            # Process each JSON file in the config directory
+            for filename in sorted(os.listdir(config_dir)):
+                if not filename.endswith('.json'):
+                    continue
+                
                 # Extract ID from filename (assuming it's a number at the beginning)
                 id_match = re.match(r'^(\d+)', filename)
                 if id_match:
@@ -234,14 +454,35 @@ class E2MCWorkflow:
                     continue
                 
                 config_file = os.path.join(config_dir, filename)
-                
-                # Create a job log file in the same directory as the config file
-                job_log_file = os.path.join(config_dir, f"{file_id}_job_submission.log")
+                job_profile = None
                 
                 try:
                     # Load job profile
                     job_profile = self.job_submitter.load_job_profile(config_file)
                     
+                    if s3_output_path:
+                        # Use custom output path
+                        output_destination = f"{s3_output_path.rstrip('/')}/{file_id}/"
+                    else:
+                        # Use default pattern
+                        output_destination = f"{s3_source_path.rstrip('/')}/{file_id}/"
+                    
+                    entry = None
+                    if journal is not None:
+                        config_hash = content_hash({
+                            'Profile': job_profile, 'Source': s3_source_path, 'Destination': output_destination})
+                        entry = journal.begin(file_id, config_hash)
+                        if entry['job_id'] and entry['status'] in ACTIVE_STATUSES:
+                            # The job may have failed or finished since the journal last saw it
+                            entry = self._refresh_journaled_job(journal, entry)
+                            if entry['status'] in RETRY_STATUSES:
+                                entry = journal.begin(file_id, config_hash)
+                        if entry['job_id'] and entry['status'] in ACTIVE_STATUSES + DONE_STATUSES:
+                            self._resume_journaled_job(job_results, tracker if wait_for_completion else None,
+                                                       journal, entry, config_file, job_profile, config_dir,
+                                                       s3_source_path, s3_output_path)
+                            continue
+                    
                     # Find source video
                     source_video = self._find_source_video(s3_source_path, file_id)
                     if not source_video:
@@ -256,167 +497,308 @@ class E2MCWorkflow:
                     
                     # Update input URL and output destination
                     job_profile['Settings']['Inputs'][0]['FileInput'] = source_video
-                    if s3_output_path:
-                        # Use custom output path
-                        output_destination = f"{s3_output_path.rstrip('/')}/{file_id}/"
-                    else:
-                        # Use default pattern
-                        output_destination = f"{s3_source_path.rstrip('/')}/{file_id}/"
                     job_profile = self.job_submitter.update_output_destination(job_profile, output_destination)
+                    if entry is not None:
+                        # MediaConvert returns the existing job for a token reused within a minute; the
+                        # metadata tag lets a later rerun find the job if its ID is never recorded
+                        job_profile['ClientRequestToken'] = entry['client_request_token']
+                        job_profile.setdefault('UserMetadata', {})[TOKEN_METADATA_KEY] = entry['client_request_token']
+                except Exception as e:
+                    self._record_submission_error(job_results, config_dir, file_id, e, job_profile)
+                    continue
+                
+                prepared[file_id] = (config_file, job_profile)
+                yield file_id, job_profile
+        
+        for file_id, response, error in self.job_submitter.submit_jobs(prepare_jobs(), max_workers=max_workers,
+                                                                        max_tps=max_tps):
+            config_file, job_profile = prepared.pop(file_id)
+            if error is not None:
+                self._record_submission_error(job_results, config_dir, file_id, error, job_profile)
+                continue
+            
+            job_id = response['Job']['Id']
+            logger.info(f"Submitted job for {file_id} with job ID: {job_id}")
+            job_results[f"{file_id}:{job_id}"] = "SUBMITTED"  # Store with file_id prefix
+            if journal is not None:
+                journal.record_job(file_id, job_id)
+            
+            if wait_for_completion:
+                tracker.add(response['Job'], callback=self._job_finished_callback(
+                    job_results, file_id, config_file, job_profile, config_dir, s3_source_path, s3_output_path,
+                    journal))
+        
+        if wait_for_completion and len(tracker):
+            # Wait for all submitted jobs together; completions are handled as they are seen
+            logger.info(f"Waiting for {len(tracker)} jobs to complete...")
+            tracker.wait()
+        
+        return job_results
+
+    def _adopt_unrecorded_jobs(self, journal: SubmissionJournal) -> None:
+        """Record the jobs an earlier run created but could not record, found by their token tag"""
+        entries = journal.unrecorded()
+        if not entries:
+            return
+        since = min(entry['updated_at'] for entry in entries) - self.JOURNAL_LOOKBACK_MARGIN
+        logger.info(f"Looking up jobs of {len(entries)} journal entries submitted without a recorded job ID")
+        jobs = iter_jobs(self.job_submitter.client, created_after=since)
+        try:
+            adopted = journal.adopt(jobs)
+        except ClientError as e:
+            logger.warning(f"Could not list jobs to adopt, resubmitting unrecorded entries: {str(e)}")
+            return
+        finally:
+            jobs.close()
+        if adopted:
+            logger.info(f"Adopted {adopted} jobs created by an earlier run")
+
+    def _refresh_journaled_job(self, journal: SubmissionJournal, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Read the current status of a journaled job with get_job and record it; keeps the entry if that fails"""
+        try:
+            status = self.job_submitter.client.get_job(Id=entry['job_id'])['Job']['Status']
+        except ClientError as e:
+            logger.warning(f"Could not refresh job {entry['job_id']} of {entry['file_id']}, "
+                           f"keeping journaled status {entry['status']}: {str(e)}")
+            return entry
+        if status != entry['status']:
+            logger.info(f"Job {entry['job_id']} of {entry['file_id']} is now {status} (was {entry['status']})")
+            journal.record_status(entry['file_id'], status)
+        return dict(entry, status=status)
+
+    def _resume_journaled_job(self, job_results: Dict[str, str], tracker, journal: SubmissionJournal,
+                              entry: Dict[str, Any], config_file: str, job_profile: Dict[str, Any], config_dir: str,
+                              s3_source_path: str, s3_output_path: Optional[str] = None) -> None:
+        """Record a job submitted by an earlier run, and track it if it is still running and a tracker is given"""
+        file_id, job_id, status = entry['file_id'], entry['job_id'], entry['status']
+        logger.info(f"Skipping {file_id}: job {job_id} already {status} (submission journal)")
+        job_results[f"{file_id}:{job_id}"] = status
+        if tracker is not None and status in ACTIVE_STATUSES:
+            tracker.add(job_id, callback=self._job_finished_callback(
+                job_results, file_id, config_file, job_profile, config_dir, s3_source_path, s3_output_path, journal))
+
+    def sync_templates(self, config_dir: str, include_ids: Optional[List[str]] = None,
+                       exclude_ids: Optional[List[str]] = None, prefix: str = 'e2mc') -> Dict[str, Any]:
+        """
+        Create MediaConvert job templates and presets for the configuration files in a directory.
+
+        Identical output settings share one preset and identical profiles one job template;
+        resources that already exist are not created again (see TemplateRegistry).
+
+        Args:
+            config_dir: Directory containing MediaConvert configuration files
+            include_ids: Optional list of IDs to include
+            exclude_ids: Optional list of IDs to exclude
+            prefix: Name prefix of the templates and presets
+
+        Returns:
+            Dictionary with the job template of each configuration file ('templates') and
+            the number of resources created and known ('summary')
+        """
+        self.job_submitter = MediaConvertJobSubmitter(
+            region=self.region,
+            role_arn=self.role_arn,
+            use_templates=True,
+            template_prefix=prefix
+        )
+        
+        job_profiles = {}
+        for filename in sorted(os.listdir(config_dir)):
+            if not filename.endswith('.json'):
+                continue
+            id_match = re.match(r'^(\d+)', filename)
+            file_id = id_match.group(1) if id_match else os.path.splitext(filename)[0]
+            if include_ids and file_id not in include_ids:
+                continue
+            if exclude_ids and file_id in exclude_ids:
+                continue
+            try:
+                job_profile = self.job_submitter.load_job_profile(os.path.join(config_dir, filename))
+            except Exception as e:
+                logger.warning(f"Skipping {filename}: {str(e)}")
+                continue
+            if 'Settings' not in job_profile:
+                logger.warning(f"Skipping {filename}: no Settings section")
+                continue
+            job_profiles[filename] = job_profile
+        
+        registry = self.job_submitter.template_registry
+        templates = registry.sync_profiles(job_profiles)
+        return {'templates': templates, 'summary': registry.summary()}
+
+    def _job_finished_callback(self, job_results: Dict[str, str], file_id: str, config_file: str,
+                               job_profile: Dict[str, Any], config_dir: str, s3_source_path: str,
+                               s3_output_path: Optional[str] = None, journal: Optional[SubmissionJournal] = None):
+        """Build the JobTracker callback recording the final status of a submitted job"""
+        def callback(job: Dict[str, Any]) -> None:
+            job_id = job['Id']
+            try:
+                job_results[f"{file_id}:{job_id}"] = job['Status']  # Store with file_id prefix
+                if journal is not None:
+                    journal.record_status(file_id, job['Status'])
+                self._handle_finished_job(file_id, job_id, job, config_file, config_dir, s3_source_path, s3_output_path)
+            except Exception as e:
+                self._record_submission_error(job_results, config_dir, file_id, e, job_profile)
+        return callback
+
+    def _handle_finished_job(self, file_id: str, job_id: str, job: Dict[str, Any], config_file: str, config_dir: str,
+                             s3_source_path: str, s3_output_path: Optional[str] = None) -> None:
+        """
+        Record the outcome of a finished job.
+
+        Failed jobs get a {file_id}_job_execution.err file in config_dir. For completed
+        jobs the configuration is uploaded to S3 with a timestamp suffix, and the
+        update.log next to it records the changes since the previous version.
+
+        Args:
+            file_id: ID of the configuration
+            job_id: MediaConvert job ID
+            job: Final job details
+            config_file: Path to the submitted configuration file
+            config_dir: Directory containing the configuration files
+            s3_source_path: S3 path where source videos are stored
+            s3_output_path: Optional S3 path for MediaConvert output files
+        """
+        # Log job completion status
+        if job['Status'] != MediaConvertJobSubmitter.STATUS_COMPLETE:
+            logger.warning(f"Job {job_id} completed with status: {job['Status']}")
+            
+            # Create error log file for failed jobs
+            if job['Status'] == MediaConvertJobSubmitter.STATUS_ERROR:
+                error_file = os.path.join(config_dir, f"{file_id}_job_execution.err")
+                with open(error_file, 'w') as f:
+                    f.write(f"MediaConvert job {job_id} failed\n")
+                    f.write(f"Timestamp: {datetime.now().isoformat()}\n\n")
+                    f.write("Job details:\n")
+                    try:
+                        f.write(json.dumps(job, indent=2, default=str))
+                    except Exception as json_err:
+                        f.write(f"Could not serialize job details: {str(json_err)}")
                     
-                    # Submit the job
-                    response = self.job_submitter.submit_job(job_profile)
-                    job_id = response['Job']['Id']
-                    logger.info(f"Submitted job for {file_id} with job ID: {job_id}")
-                    
-                    # Wait for job completion if requested
-                    if wait_for_completion:
-                        logger.info(f"Waiting for job {job_id} to complete...")
-                        job = self.job_submitter.track_job(job_id)
-                        job_results[f"{file_id}:{job_id}"] = job['Status']  # Store with file_id prefix
+                    # Add error messages if available
+                    if 'ErrorMessage' in job:
+                        f.write("\n\nError message:\n")
+                        f.write(job['ErrorMessage'])
+                    elif 'ErrorCode' in job:
+                        f.write("\n\nError code:\n")
+                        f.write(job['ErrorCode'])
                         
-                        # Log job completion status
-                        if job['Status'] != MediaConvertJobSubmitter.STATUS_COMPLETE:
-                            logger.warning(f"Job {job_id} completed with status: {job['Status']}")
-                            
-                            # Create error log file for failed jobs
-                            if job['Status'] == MediaConvertJobSubmitter.STATUS_ERROR:
-                                error_file = os.path.join(config_dir, f"{file_id}_job_execution.err")
-                                with open(error_file, 'w') as f:
-                                    f.write(f"MediaConvert job {job_id} failed\n")
-                                    f.write(f"Timestamp: {datetime.now().isoformat()}\n\n")
-                                    f.write("Job details:\n")
-                                    try:
-                                        f.write(json.dumps(job, indent=2, default=str))
-                                    except Exception as json_err:
-                                        f.write(f"Could not serialize job details: {str(json_err)}")
-                                    
-                                    # Add error messages if available
-                                    if 'ErrorMessage' in job:
-                                        f.write("\n\nError message:\n")
-                                        f.write(job['ErrorMessage'])
-                                    elif 'ErrorCode' in job:
-                                        f.write("\n\nError code:\n")
-                                        f.write(job['ErrorCode'])
-                                        
-                                logger.error(f"Job {job_id} failed. Error details written to {error_file}")
-                        else:
-                            # Job completed successfully, upload JSON file with timestamp suffix
-                            try:
-                                # Parse S3 path - use s3_output_path if provided, otherwise use s3_source_path
-                                upload_path = s3_output_path if s3_output_path else s3_source_path
-                                bucket_name, prefix = self._parse_s3_path(upload_path)
-                                
-                                # Generate timestamp suffix for the JSON file
-                                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                                json_filename = f"{file_id}_{timestamp}.json"
-                                json_s3_key = f"{prefix}/{file_id}/{json_filename}"
-                                
-                                # Read the current JSON file content
-                                with open(config_file, 'r') as f:
-                                    current_json_content = f.read()
-                                
-                                # Check if there are previous JSON files in S3
-                                previous_json = self._find_previous_json(bucket_name, f"{prefix}/{file_id}")
-                                
-                                # Initialize update log content
-                                update_log_content = f"Update log for {file_id} - {timestamp}\n"
-                                update_log_content += f"Job ID: {job_id}\n"
-                                update_log_content += f"Status: {job['Status']}\n\n"
-                                
-                                # Compare with previous JSON if it exists
-                                if previous_json:
-                                    logger.info(f"Found previous JSON file: {previous_json}")
-                                    update_log_content += f"Comparing with previous JSON: {previous_json}\n\n"
-                                    
-                                    # Download previous JSON content
-                                    previous_json_key = previous_json.replace(f"s3://{bucket_name}/", "")
-                                    previous_json_content = self._get_s3_content(bucket_name, previous_json_key)
-                                    
-                                    # Compare JSON content
-                                    try:
-                                        import difflib
-                                        previous_json_obj = json.loads(previous_json_content)
-                                        current_json_obj = json.loads(current_json_content)
-                                        
-                                        # Convert to formatted JSON strings for better diff
-                                        previous_formatted = json.dumps(previous_json_obj, indent=2, sort_keys=True)
-                                        current_formatted = json.dumps(current_json_obj, indent=2, sort_keys=True)
-                                        
-                                        # Generate diff
-                                        diff = difflib.unified_diff(
-                                            previous_formatted.splitlines(),
-                                            current_formatted.splitlines(),
-                                            fromfile=previous_json,
-                                            tofile=json_filename,
-                                            lineterm=''
-                                        )
-                                        
-                                        # Add diff to update log
-                                        diff_content = '\n'.join(list(diff))
-                                        if diff_content:
-                                            update_log_content += "Changes found:\n"
-                                            update_log_content += diff_content
-                                            update_log_content += "\n\n"
-                                        else:
-                                            update_log_content += "No changes detected between JSON files.\n\n"
-                                    except Exception as e:
-                                        update_log_content += f"Error comparing JSON files: {str(e)}\n\n"
-                                else:
-                                    update_log_content += "No previous JSON file found. This is the first version.\n\n"
-                                
-                                # Upload the JSON file to S3
-                                self.s3_client.put_object(
-                                    Bucket=bucket_name,
-                                    Key=json_s3_key,
-                                    Body=current_json_content
-                                )
-                                logger.info(f"Uploaded JSON file to s3://{bucket_name}/{json_s3_key}")
-                                
-                                # Update the update.log file in the video ID's prefix directory
-                                update_log_key = f"{prefix}/{file_id}/update.log"
-                                
-                                # Check if update.log already exists
-                                try:
-                                    existing_log = self._get_s3_content(bucket_name, update_log_key)
-                                    update_log_content = existing_log + "\n" + update_log_content
-                                except Exception:
-                                    # Log doesn't exist yet, use the new content
-                                    pass
-                                
-                                # Upload the update log to S3
-                                self.s3_client.put_object(
-                                    Bucket=bucket_name,
-                                    Key=update_log_key,
-                                    Body=update_log_content
-                                )
-                                logger.info(f"Updated log file at s3://{bucket_name}/{update_log_key}")
-                                
-                            except Exception as e:
-                                logger.error(f"Error handling JSON upload for {file_id}: {str(e)}")
-                    else:
-                        job_results[f"{file_id}:{job_id}"] = "SUBMITTED"  # Store with file_id prefix
-                    
-                except Exception as e:
-                    error_msg = f"Error submitting job for {file_id}: {str(e)}"
-                    logger.error(error_msg)
-                    job_results[file_id] = f"ERROR: {str(e)}"
+                logger.error(f"Job {job_id} failed. Error details written to {error_file}")
+        else:
+            # Job completed successfully, upload JSON file with timestamp suffix
+            try:
+                # Parse S3 path - use s3_output_path if provided, otherwise use s3_source_path
+                upload_path = s3_output_path if s3_output_path else s3_source_path
+                bucket_name, prefix = self._parse_s3_path(upload_path)
+                
+                # Generate timestamp suffix for the JSON file
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                json_filename = f"{file_id}_{timestamp}.json"
+                json_s3_key = f"{prefix}/{file_id}/{json_filename}"
+                
+                # Read the current JSON file content
+                with open(config_file, 'r') as f:
+                    current_json_content = f.read()
+                
+                # Check if there are previous JSON files in S3
+                previous_json = self._find_previous_json(bucket_name, f"{prefix}/{file_id}")
+                
+                # Initialize update log content
+                update_log_content = f"Update log for {file_id} - {timestamp}\n"
+                update_log_content += f"Job ID: {job_id}\n"
+                update_log_content += f"Status: {job['Status']}\n\n"
+                
+                # Compare with previous JSON if it exists
+                if previous_json:
+                    logger.info(f"Found previous JSON file: {previous_json}")
+                    update_log_content += f"Comparing with previous JSON: {previous_json}\n\n"
                     
-                    # Create error log file for submission errors
-                    error_file = os.path.join(config_dir, f"{file_id}_job_submission.err")
-                    with open(error_file, 'w') as f:
-                        f.write(f"Error submitting MediaConvert job for {file_id}\n")
-                        f.write(f"Timestamp: {datetime.now().isoformat()}\n\n")
-                        f.write(f"Error message: {str(e)}\n\n")
-                        f.write("Job settings:\n")
-                        try:
-                            f.write(json.dumps(job_profile, indent=2, default=str))
-                        except Exception as json_err:
-                            f.write(f"Could not serialize job profile: {str(json_err)}")
+                    # Download previous JSON content
+                    previous_json_key = previous_json.replace(f"s3://{bucket_name}/", "")
+                    previous_json_content = self._get_s3_content(bucket_name, previous_json_key)
                     
-                    logger.error(f"Job submission error details written to {error_file}")
+                    # Compare JSON content
+                    try:
+                        import difflib
+                        previous_json_obj = json.loads(previous_json_content)
+                        current_json_obj = json.loads(current_json_content)
+                        
+                        # Convert to formatted JSON strings for better diff
+                        previous_formatted = json.dumps(previous_json_obj, indent=2, sort_keys=True)
+                        current_formatted = json.dumps(current_json_obj, indent=2, sort_keys=True)
+                        
+                        # Generate diff
+                        diff = difflib.unified_diff(
+                            previous_formatted.splitlines(),
+                            current_formatted.splitlines(),
+                            fromfile=previous_json,
+                            tofile=json_filename,
+                            lineterm=''
+                        )
+                        
+                        # Add diff to update log
+                        diff_content = '\n'.join(list(diff))
+                        if diff_content:
+                            update_log_content += "Changes found:\n"
+                            update_log_content += diff_content
+                            update_log_content += "\n\n"
+                        else:
+                            update_log_content += "No changes detected between JSON files.\n\n"
+                    except Exception as e:
+                        update_log_content += f"Error comparing JSON files: {str(e)}\n\n"
+                else:
+                    update_log_content += "No previous JSON file found. This is the first version.\n\n"
+                
+                # Upload the JSON file to S3
+                self.s3_client.put_object(
+                    Bucket=bucket_name,
+                    Key=json_s3_key,
+                    Body=current_json_content
+                )
+                logger.info(f"Uploaded JSON file to s3://{bucket_name}/{json_s3_key}")
+                
+                # Update the update.log file in the video ID's prefix directory
+                update_log_key = f"{prefix}/{file_id}/update.log"
+                
+                # Check if update.log already exists
+                try:
+                    existing_log = self._get_s3_content(bucket_name, update_log_key)
+                    update_log_content = existing_log + "\n" + update_log_content
+                except Exception:
+                    # Log doesn't exist yet, use the new content
+                    pass
+                
+                # Upload the update log to S3
+                self.s3_client.put_object(
+                    Bucket=bucket_name,
+                    Key=update_log_key,
+                    Body=update_log_content
+                )
+                logger.info(f"Updated log file at s3://{bucket_name}/{update_log_key}")
+                
+            except Exception as e:
+                logger.error(f"Error handling JSON upload for {file_id}: {str(e)}")
+
+    def _record_submission_error(self, job_results: Dict[str, str], config_dir: str, file_id: str, error: Exception,
+                                 job_profile: Optional[Dict[str, Any]]) -> None:
+        """Record a job that could not be prepared or submitted and write its .err file"""
+        error_msg = f"Error submitting job for {file_id}: {str(error)}"
+        logger.error(error_msg)
+        job_results[file_id] = f"ERROR: {str(error)}"
         
-        return job_results
+        # Create error log file for submission errors
+        error_file = os.path.join(config_dir, f"{file_id}_job_submission.err")
+        with open(error_file, 'w') as f:
+            f.write(f"Error submitting MediaConvert job for {file_id}\n")
+            f.write(f"Timestamp: {datetime.now().isoformat()}\n\n")
+            f.write(f"Error message: {str(error)}\n\n")
+            f.write("Job settings:\n")
+            try:
+                f.write(json.dumps(job_profile, indent=2, default=str))
+            except Exception as json_err:
+                f.write(f"Could not serialize job profile: {str(json_err)}")
+        
+        logger.error(f"Job submission error details written to {error_file}")
 
     def _find_source_video(self, s3_path: str, file_id: str) -> Optional[str]:
         """
@@ -1010,12 +1392,12 @@ def parse_arguments():
     convert_parser.add_argument(
         '--input-dir',
         required=True,
-        help='Directory containing Encoding.com configuration files'
+        help='Directory or S3 URI (s3://bucket-name/prefix) containing Encoding.com configuration files'
     )
     convert_parser.add_argument(
         '--output-dir',
         required=True,
-        help='Directory to save MediaConvert configuration files'
+        help='Directory or S3 URI (s3://bucket-name/prefix) to save MediaConvert configuration files'
     )
     convert_parser.add_argument(
         '--rules-file',
@@ -1043,6 +1425,12 @@ def parse_arguments():
         '--exclude',
         help='Comma-separated list of video IDs to exclude'
     )
+    convert_parser.add_argument(
+        '--s3-workers',
+        type=int,
+        default=16,
+        help='Number of concurrent S3 downloads and uploads (default: 16)'
+    )
     
     # Submit command
     submit_parser = subparsers.add_parser(
@@ -1071,7 +1459,7 @@ def parse_arguments():
     submit_parser.add_argument(
         '--no-wait',
         action='store_true',
-        help='Do not wait for jobs to complete before submitting the next'
+        help='Do not wait for the submitted jobs to complete'
     )
     submit_parser.add_argument(
         '--include',
@@ -1085,6 +1473,77 @@ def parse_arguments():
         '--s3-output-path',
         help='S3 path for MediaConvert output files (overrides default s3-source-path/{id}/ pattern)'
     )
+    submit_parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=MediaConvertJobSubmitter.DEFAULT_MAX_WORKERS,
+        help=f'Number of concurrent job submissions (default: {MediaConvertJobSubmitter.DEFAULT_MAX_WORKERS})'
+    )
+    submit_parser.add_argument(
+        '--max-tps',
+        type=float,
+        default=MediaConvertJobSubmitter.DEFAULT_MAX_TPS,
+        help=f'Maximum CreateJob calls per second (default: {MediaConvertJobSubmitter.DEFAULT_MAX_TPS:g})'
+    )
+    submit_parser.add_argument(
+        '--event-queue-url',
+        help='SQS queue receiving MediaConvert job state-change events; used instead of polling to wait for jobs. '
+             'Every message read is deleted, so the queue must be dedicated to this run'
+    )
+    submit_parser.add_argument(
+        '--adaptive-polling',
+        action='store_true',
+        help='Poll jobs more often as they near completion instead of every 10 seconds'
+    )
+    submit_parser.add_argument(
+        '--use-templates',
+        action='store_true',
+        help='Submit jobs as a job template reference with outputs referencing presets '
+             '(templates and presets are created as needed, see sync-templates)'
+    )
+    submit_parser.add_argument(
+        '--journal',
+        nargs='?',
+        const='',
+        metavar='FILE',
+        help='Record submissions in a SQLite journal (default FILE: <config-dir>/submission_journal.db); '
+             'a rerun adopts jobs created before a crash and skips jobs already submitted or complete'
+    )
+    submit_parser.add_argument(
+        '--queues',
+        help='Comma-separated pool of MediaConvert queue names or ARNs, each optionally with =SLOTS '
+             '(concurrent jobs); jobs go to the queue where they are predicted to finish first. '
+             'All job profiles of the run are held in memory to order and assign them before submission'
+    )
+    submit_parser.add_argument(
+        '--longest-first',
+        action='store_true',
+        help='With --queues, submit the longest jobs of each priority first'
+    )
+    
+    # Sync templates command
+    sync_parser = subparsers.add_parser(
+        'sync-templates',
+        help='Create MediaConvert job templates and presets for configuration files'
+    )
+    sync_parser.add_argument(
+        '--config-dir',
+        required=True,
+        help='Directory containing MediaConvert configuration files'
+    )
+    sync_parser.add_argument(
+        '--region',
+        default='us-east-1',
+        help='AWS region (default: us-east-1)'
+    )
+    sync_parser.add_argument(
+        '--include',
+        help='Comma-separated list of video IDs to include'
+    )
+    sync_parser.add_argument(
+        '--exclude',
+        help='Comma-separated list of video IDs to exclude'
+    )
     
     # Analyze command
     analyze_parser = subparsers.add_parser(
@@ -1123,7 +1582,7 @@ def parse_arguments():
     workflow_parser.add_argument(
         '--input-dir',
         required=True,
-        help='Directory containing Encoding.com configuration files'
+        help='Directory or S3 URI (s3://bucket-name/prefix) containing Encoding.com configuration files'
     )
     workflow_parser.add_argument(
         '--output-dir',
@@ -1156,7 +1615,7 @@ def parse_arguments():
     workflow_parser.add_argument(
         '--no-wait',
         action='store_true',
-        help='Do not wait for jobs to complete before submitting the next'
+        help='Do not wait for the submitted jobs to complete'
     )
     workflow_parser.add_argument(
         '--include',
@@ -1166,6 +1625,53 @@ def parse_arguments():
         '--exclude',
         help='Comma-separated list of video IDs to exclude'
     )
+    workflow_parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=MediaConvertJobSubmitter.DEFAULT_MAX_WORKERS,
+        help=f'Number of concurrent job submissions (default: {MediaConvertJobSubmitter.DEFAULT_MAX_WORKERS})'
+    )
+    workflow_parser.add_argument(
+        '--max-tps',
+        type=float,
+        default=MediaConvertJobSubmitter.DEFAULT_MAX_TPS,
+        help=f'Maximum CreateJob calls per second (default: {MediaConvertJobSubmitter.DEFAULT_MAX_TPS:g})'
+    )
+    workflow_parser.add_argument(
+        '--event-queue-url',
+        help='SQS queue receiving MediaConvert job state-change events; used instead of polling to wait for jobs. '
+             'Every message read is deleted, so the queue must be dedicated to this run'
+    )
+    workflow_parser.add_argument(
+        '--adaptive-polling',
+        action='store_true',
+        help='Poll jobs more often as they near completion instead of every 10 seconds'
+    )
+    workflow_parser.add_argument(
+        '--use-templates',
+        action='store_true',
+        help='Submit jobs as a job template reference with outputs referencing presets '
+             '(templates and presets are created as needed, see sync-templates)'
+    )
+    workflow_parser.add_argument(
+        '--journal',
+        nargs='?',
+        const='',
+        metavar='FILE',
+        help='Record submissions in a SQLite journal (default FILE: <output-dir>/submission_journal.db); '
+             'a rerun adopts jobs created before a crash and skips jobs already submitted or complete'
+    )
+    workflow_parser.add_argument(
+        '--queues',
+        help='Comma-separated pool of MediaConvert queue names or ARNs, each optionally with =SLOTS '
+             '(concurrent jobs); jobs go to the queue where they are predicted to finish first. '
+             'All job profiles of the run are held in memory to order and assign them before submission'
+    )
+    workflow_parser.add_argument(
+        '--longest-first',
+        action='store_true',
+        help='With --queues, submit the longest jobs of each priority first'
+    )
     
     return parser.parse_args()
 
@@ -1182,7 +1688,13 @@ def main():
         # Initialize workflow handler
         workflow = E2MCWorkflow(
             region=args.region,
-            role_arn=getattr(args, 'role_arn', None)
+            role_arn=getattr(args, 'role_arn', None),
+            s3_max_workers=getattr(args, 's3_workers', 16),
+            event_queue_url=getattr(args, 'event_queue_url', None),
+            adaptive_polling=getattr(args, 'adaptive_polling', False),
+            use_templates=getattr(args, 'use_templates', False),
+            queues=parse_queue_spec(args.queues) if getattr(args, 'queues', None) else None,
+            longest_first=getattr(args, 'longest_first', False)
         )
         
         if args.command == 'convert':
@@ -1226,7 +1738,11 @@ def main():
                 wait_for_completion=not args.no_wait,
                 include_ids=include_ids,
                 exclude_ids=exclude_ids,
-                s3_output_path=getattr(args, 's3_output_path', None)
+                s3_output_path=getattr(args, 's3_output_path', None),
+                max_workers=args.max_workers,
+                max_tps=args.max_tps,
+                journal_file=None if args.journal is None else (
+                    args.journal or os.path.join(args.config_dir, E2MCWorkflow.SUBMISSION_JOURNAL_FILE))
             )
             
             # Create summary log file path
@@ -1284,6 +1800,24 @@ def main():
             
             return 0
             
+        elif args.command == 'sync-templates':
+            include_ids = args.include.split(',') if args.include else None
+            exclude_ids = args.exclude.split(',') if args.exclude else None
+            
+            result = workflow.sync_templates(
+                config_dir=args.config_dir,
+                include_ids=include_ids,
+                exclude_ids=exclude_ids
+            )
+            
+            for filename, template_name in result['templates'].items():
+                print(f"{filename}: {template_name}")
+            summary = result['summary']
+            print(f"Synced {len(result['templates'])} configuration files: "
+                  f"{summary['templates_created']} job templates and {summary['presets_created']} presets created, "
+                  f"{summary['templates_known']} job templates and {summary['presets_known']} presets in total")
+            return 0
+            
         elif args.command == 'analyze':
             # Process include and exclude parameters
             include_ids = args.include.split(',') if args.include else None
@@ -1318,6 +1852,11 @@ def main():
         elif args.command == 'workflow':
             # Run the complete workflow
             
+            # The submit step reads the converted files from a local directory
+            if args.output_dir.startswith(E2MCWorkflow.S3_PREFIX):
+                print("Error: --output-dir must be a local directory for the workflow command")
+                return 1
+            
             # 处理 include 和 exclude 参数
             include_ids = args.include.split(',') if args.include else None
             exclude_ids = args.exclude.split(',') if args.exclude else None
@@ -1344,7 +1883,11 @@ def main():
                 s3_source_path=args.s3_source_path,
                 wait_for_completion=not args.no_wait,
                 include_ids=include_ids,
-                exclude_ids=exclude_ids
+                exclude_ids=exclude_ids,
+                max_workers=args.max_workers,
+                max_tps=args.max_tps,
+                journal_file=None if args.journal is None else (
+                    args.journal or os.path.join(args.output_dir, E2MCWorkflow.SUBMISSION_JOURNAL_FILE))
             )
             print(f"Submitted {len(job_results)} MediaConvert jobs")
             
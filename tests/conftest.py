@@ -0,0 +1,30 @@
+"""Shared pytest setup: make the package importable from a source checkout"""
+
+import os
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# e2mc_assistant from src/, and src.e2mc_assistant as imported by the workflow
+for path in (ROOT, os.path.join(ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def aws_credentials(monkeypatch):
+    """Fake credentials and region so moto-backed clients never reach AWS"""
+    for name, value in (('AWS_ACCESS_KEY_ID', 'testing'), ('AWS_SECRET_ACCESS_KEY', 'testing'),
+                        ('AWS_SESSION_TOKEN', 'testing'), ('AWS_DEFAULT_REGION', 'us-east-1')):
+        monkeypatch.setenv(name, value)
+    # The workflow and the package modules may be loaded under both names
+    from e2mc_assistant import aws_clients
+    from src.e2mc_assistant import aws_clients as workflow_aws_clients
+    for module in (aws_clients, workflow_aws_clients):
+        module.clear()
+    yield
+    for module in (aws_clients, workflow_aws_clients):
+        module.clear()
@@ -0,0 +1,25 @@
+"""Shared boto3 clients and their retry settings"""
+
+from e2mc_assistant import aws_clients
+from e2mc_assistant.requester.mediaconvert_job_submitter import MediaConvertJobSubmitter
+
+
+ENDPOINT = 'https://abcd1234.mediaconvert.us-east-1.amazonaws.com'
+
+
+def test_clients_are_shared(aws_credentials):
+    assert aws_clients.get_client('s3', region='us-east-1') is aws_clients.get_client('s3', region='us-east-1')
+
+
+def test_default_retries_count_the_first_attempt(aws_credentials):
+    retries = aws_clients.get_client('s3', region='us-east-1').meta.config.retries
+    assert retries == {'mode': 'adaptive', 'total_max_attempts': aws_clients.DEFAULT_MAX_ATTEMPTS}
+
+
+def test_submitter_leaves_throttling_to_its_token_bucket(aws_credentials):
+    submitter = MediaConvertJobSubmitter(region='us-east-1', endpoint_url=ENDPOINT)
+    assert submitter.client.meta.config.retries == {'mode': 'standard', 'total_max_attempts': 2}
+    # Other users of the same endpoint keep the adaptive defaults
+    default = aws_clients.get_client('mediaconvert', region='us-east-1', endpoint_url=ENDPOINT)
+    assert default is not submitter.client
+    assert default.meta.config.retries['mode'] == 'adaptive'
@@ -0,0 +1,51 @@
+"""In-memory conversion with ConfigConverter.convert_many"""
+
+import json
+import os
+
+import pytest
+
+from e2mc_assistant.converter.config_converter_enhanced import ConfigConverter
+
+
+CONVERTER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'src', 'e2mc_assistant', 'converter')
+RULES_FILE = os.path.join(CONVERTER_DIR, 'rules', 'e2mc_rules.yaml')
+TEMPLATE_FILE = os.path.join(CONVERTER_DIR, 'templates', 'mp4_template.json')
+
+PROFILE = {'output': 'mp4', 'video_codec': 'libx264', 'bitrate': '1000k', 'size': '1280x720',
+           'audio_codec': 'libfaac', 'audio_bitrate': '128k'}
+XML_PROFILE = ('<?xml version="1.0"?><query><format>'
+               + ''.join(f'<{key}>{value}</{key}>' for key, value in PROFILE.items()) + '</format></query>')
+
+
+@pytest.fixture(scope='module')
+def converter():
+    return ConfigConverter(RULES_FILE)
+
+
+@pytest.mark.parametrize('document', [
+    json.dumps(PROFILE),
+    '\ufeff' + json.dumps(PROFILE),
+    b'\xef\xbb\xbf' + json.dumps(PROFILE).encode(),
+    '\ufeff' + XML_PROFILE,
+])
+def test_documents_with_and_without_bom(converter, document):
+    [(index, result, error)] = converter.convert_many([document], template=TEMPLATE_FILE)
+    assert error is None
+    assert result['Settings']['OutputGroups']
+
+
+def test_parallel_results_in_input_order(converter):
+    documents = [json.dumps(PROFILE), 'not a profile', XML_PROFILE] * 3
+    results = list(converter.convert_many(documents, template=TEMPLATE_FILE, workers=2))
+    assert [index for index, _, _ in results] == list(range(9))
+    assert [error is None for _, _, error in results] == [True, False, True] * 3
+
+
+def test_parallel_stop_early_cancels_pending(converter):
+    results = converter.convert_many((XML_PROFILE for _ in range(50)), template=TEMPLATE_FILE, workers=2)
+    index, result, error = next(results)
+    assert index == 0 and error is None
+    # Closing the generator cancels the queued documents and shuts the pool down cleanly
+    results.close()
@@ -0,0 +1,78 @@
+"""MediaConvert endpoint cache keyed by account (moto STS)"""
+
+import json
+
+import boto3
+import pytest
+from botocore.exceptions import EndpointConnectionError
+from moto import mock_aws
+
+from e2mc_assistant.requester import endpoint_cache
+from e2mc_assistant.requester.mediaconvert_job_submitter import MediaConvertJobSubmitter
+
+
+ENDPOINT = 'https://abcd1234.mediaconvert.us-east-1.amazonaws.com'
+
+
+@pytest.fixture
+def cache(aws_credentials, tmp_path, monkeypatch):
+    """Cache file in a temporary directory, with DescribeEndpoints counted instead of called"""
+    path = tmp_path / 'endpoints.json'
+    monkeypatch.setenv('E2MC_ENDPOINT_CACHE', str(path))
+    monkeypatch.setattr(endpoint_cache, '_account_ids', {})
+    described = []
+
+    def describe(region, session):
+        described.append(region)
+        return ENDPOINT
+    monkeypatch.setattr(endpoint_cache, '_describe_endpoint', describe)
+    with mock_aws():
+        yield path, described
+
+
+def test_key_is_region_and_account(cache):
+    account = boto3.client('sts', region_name='us-east-1').get_caller_identity()['Account']
+    assert endpoint_cache.cache_key('us-east-1') == f'us-east-1:{account}'
+
+
+def test_rotated_credentials_hit_the_cache(cache, monkeypatch):
+    path, described = cache
+    assert endpoint_cache.get_endpoint_url('us-east-1') == ENDPOINT
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'rotated')
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'rotated')
+    assert endpoint_cache.get_endpoint_url('us-east-1') == ENDPOINT
+    assert endpoint_cache.get_endpoint_url('eu-west-1') == ENDPOINT
+    assert described == ['us-east-1', 'eu-west-1']
+    # The account is looked up once per set of credentials
+    assert len(endpoint_cache._account_ids) == 2
+    assert len(json.loads(path.read_text())) == 2
+
+
+def test_invalidate(cache):
+    path, described = cache
+    endpoint_cache.get_endpoint_url('us-east-1')
+    endpoint_cache.invalidate('us-east-1')
+    assert json.loads(path.read_text()) == {}
+    endpoint_cache.get_endpoint_url('us-east-1')
+    assert described == ['us-east-1', 'us-east-1']
+
+
+def test_unreachable_endpoint_is_invalidated(cache, monkeypatch):
+    path, described = cache
+    submitter = MediaConvertJobSubmitter(region='us-east-1')
+    assert submitter.endpoint_url == ENDPOINT
+    assert len(json.loads(path.read_text())) == 1
+
+    def unreachable(**kwargs):
+        raise EndpointConnectionError(endpoint_url=ENDPOINT)
+    monkeypatch.setattr(submitter.client, 'create_job', unreachable)
+    with pytest.raises(EndpointConnectionError):
+        submitter.submit_job({'Settings': {}})
+    assert json.loads(path.read_text()) == {}
+
+
+def test_given_endpoint_is_not_cached(cache):
+    path, described = cache
+    MediaConvertJobSubmitter(region='us-east-1', endpoint_url=ENDPOINT)
+    assert described == []
+    assert not path.exists()
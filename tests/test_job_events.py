@@ -0,0 +1,138 @@
+"""Job state-change events from SQS (moto) and event-driven JobTracker"""
+
+import json
+import time
+from datetime import datetime, timezone
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from e2mc_assistant.requester.job_events import JobEventListener, parse_event
+from e2mc_assistant.requester.job_tracker import JobTracker
+
+
+QUEUE = 'arn:aws:mediaconvert:us-east-1:123456789012:queues/Default'
+
+
+def event_body(job_id, status, **detail):
+    return json.dumps({
+        'source': 'aws.mediaconvert',
+        'detail-type': 'MediaConvert Job State Change',
+        'time': '2026-01-01T00:00:00Z',
+        'detail': dict(jobId=job_id, status=status, queue=QUEUE, userMetadata={'file_id': '1'}, **detail),
+    })
+
+
+def sns_body(message):
+    return json.dumps({'Type': 'Notification', 'TopicArn': 'arn:aws:sns:us-east-1:123456789012:t', 'Message': message})
+
+
+class FakeMediaConvert:
+    """list_jobs/get_job over a dict of job ID -> status, counting calls"""
+
+    def __init__(self, statuses, complete_after=None):
+        self.statuses = statuses
+        self.created_at = datetime.now(timezone.utc)
+        self.complete_after = complete_after
+        self.calls = 0
+
+    def job(self, job_id):
+        return {'Id': job_id, 'Status': self.statuses[job_id], 'Queue': QUEUE, 'CreatedAt': self.created_at}
+
+    def list_jobs(self, Queue, Status, **kwargs):
+        self.calls += 1
+        if self.complete_after is not None and self.calls > self.complete_after:
+            self.statuses = dict.fromkeys(self.statuses, 'COMPLETE')
+        return {'Jobs': [self.job(job_id) for job_id, status in self.statuses.items() if status == Status]}
+
+    def get_job(self, Id):
+        self.calls += 1
+        return {'Job': self.job(Id)}
+
+
+@pytest.fixture
+def sqs(aws_credentials):
+    with mock_aws():
+        client = boto3.client('sqs', region_name='us-east-1')
+        url = client.create_queue(QueueName='e2mc-job-events')['QueueUrl']
+        yield client, url
+
+
+def queued_messages(client, url):
+    attributes = client.get_queue_attributes(
+        QueueUrl=url, AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible'])
+    return sum(int(value) for value in attributes['Attributes'].values())
+
+
+def test_parse_raw_event():
+    job = parse_event(event_body('job-1', 'ERROR', errorCode=1010, errorMessage='boom'))
+    assert job['Id'] == 'job-1'
+    assert job['Status'] == 'ERROR'
+    assert job['Queue'] == QUEUE
+    assert job['UserMetadata'] == {'file_id': '1'}
+    assert (job['ErrorCode'], job['ErrorMessage']) == (1010, 'boom')
+
+
+def test_parse_sns_wrapped_event():
+    progress = {'jobPercentComplete': 40, 'currentPhase': 'TRANSCODING'}
+    job = parse_event(sns_body(event_body('job-2', 'PROGRESSING', jobProgress=progress)))
+    assert (job['Id'], job['Status']) == ('job-2', 'PROGRESSING')
+    assert (job['JobPercentComplete'], job['CurrentPhase']) == (40, 'TRANSCODING')
+
+
+@pytest.mark.parametrize('body', [
+    'not json',
+    json.dumps({'source': 'aws.s3', 'detail-type': 'Object Created', 'detail': {}}),
+    sns_body('not json'),
+    json.dumps({'source': 'aws.mediaconvert', 'detail-type': 'MediaConvert Job State Change', 'detail': {}}),
+])
+def test_parse_ignores_other_messages(body):
+    assert parse_event(body) is None
+
+
+def test_receive_deletes_every_message(sqs):
+    client, url = sqs
+    client.send_message(QueueUrl=url, MessageBody=event_body('job-1', 'COMPLETE'))
+    client.send_message(QueueUrl=url, MessageBody=sns_body(event_body('job-2', 'PROGRESSING')))
+    client.send_message(QueueUrl=url, MessageBody='not an event')
+
+    events = JobEventListener(url, sqs_client=client).receive(wait_time=0)
+
+    assert sorted((job['Id'], job['Status']) for job in events) == [('job-1', 'COMPLETE'), ('job-2', 'PROGRESSING')]
+    assert queued_messages(client, url) == 0
+
+
+def test_tracker_completes_by_event(sqs):
+    client, url = sqs
+    mediaconvert = FakeMediaConvert({'job-1': 'PROGRESSING'})
+    tracker = JobTracker(mediaconvert, events=JobEventListener(url, sqs_client=client), fallback_interval=300)
+    tracker.add(mediaconvert.job('job-1'))
+    client.send_message(QueueUrl=url, MessageBody=event_body('job-1', 'COMPLETE'))
+
+    started = time.time()
+    finished = tracker.wait(timeout=30)
+
+    assert finished['job-1']['Status'] == 'COMPLETE'
+    # Finished from the event (which carries its time), long before the fallback poll
+    assert finished['job-1']['EventTime'] == '2026-01-01T00:00:00Z'
+    assert time.time() - started < 10
+    # Only the initial poll cycle: one list_jobs per terminal status
+    assert mediaconvert.calls == 3
+    assert queued_messages(client, url) == 0
+
+
+def test_tracker_falls_back_to_polling(sqs):
+    client, url = sqs
+    # The job finishes after the initial poll cycle, but its event never reaches the queue
+    mediaconvert = FakeMediaConvert({'job-1': 'PROGRESSING'}, complete_after=3)
+    tracker = JobTracker(mediaconvert, events=JobEventListener(url, sqs_client=client), fallback_interval=1)
+    tracker.add(mediaconvert.job('job-1'))
+
+    started = time.time()
+    finished = tracker.wait(timeout=30)
+
+    assert finished['job-1']['Status'] == 'COMPLETE'
+    assert 'EventTime' not in finished['job-1']
+    assert time.time() - started >= 1
+    assert mediaconvert.calls > 3
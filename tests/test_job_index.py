@@ -0,0 +1,98 @@
+"""Incremental JobIndex.sync and --created-after parsing against a fake MediaConvert client"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from e2mc_assistant.requester.job_index import JobIndex, parse_time
+
+
+START = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+class FakeMediaConvert:
+    """list_jobs (newest first, pages of MaxResults) and get_job over an in-memory job list"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.list_calls = 0
+        self.got = []
+
+    def add(self, minutes, status='SUBMITTED'):
+        job_id = f'job{len(self.jobs) + 1}'
+        self.jobs[job_id] = {'Id': job_id, 'Status': status, 'Queue': 'Default',
+                             'CreatedAt': START + timedelta(minutes=minutes)}
+        return job_id
+
+    def list_jobs(self, MaxResults, Order, NextToken=None, **filters):
+        jobs = sorted(self.jobs.values(), key=lambda job: job['CreatedAt'], reverse=Order == 'DESCENDING')
+        start = int(NextToken or 0)
+        page = jobs[start:start + MaxResults]
+        self.list_calls += 1
+        response = {'Jobs': [dict(job) for job in page]}
+        if start + MaxResults < len(jobs):
+            response['NextToken'] = str(start + MaxResults)
+        return response
+
+    def get_job(self, Id):
+        self.got.append(Id)
+        return {'Job': dict(self.jobs[Id])}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = JobIndex(str(tmp_path / 'jobs.db'))
+    yield index
+    index.close()
+
+
+def test_sync_lists_new_jobs_and_refreshes_open_ones(index):
+    client = FakeMediaConvert()
+    old_open = client.add(0)
+    for minutes in range(1, 60):
+        client.add(minutes, status='COMPLETE')
+    assert index.sync(client) == 60
+    assert client.got == []
+
+    client.jobs[old_open]['Status'] = 'COMPLETE'
+    new_job = client.add(120)
+    client.list_calls = 0
+    index.sync(client)
+    # Only the first page, back to the newest indexed job, is listed; the old open job is read with get_job
+    assert client.list_calls == 1
+    assert client.got == [old_open]
+    assert index.get(old_open)['status'] == 'COMPLETE'
+    assert index.get(new_job)['status'] == 'SUBMITTED'
+    assert index.counts() == {'COMPLETE': 60, 'SUBMITTED': 1}
+
+
+def test_listed_open_jobs_are_not_read_again(index):
+    client = FakeMediaConvert()
+    client.add(0)
+    boundary = client.add(5)
+    index.sync(client)
+    client.jobs[boundary]['Status'] = 'PROGRESSING'
+    newest = client.add(10, status='PROGRESSING')
+    index.sync(client)
+    # The job at the previous sync's bound is listed again with the new one; only the older open job needs get_job
+    assert client.got == ['job1']
+    assert index.get(boundary)['status'] == 'PROGRESSING'
+    assert index.get(newest)['status'] == 'PROGRESSING'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-05-01', datetime(2024, 5, 1)),
+    ('2024-05-01T12:30:00', datetime(2024, 5, 1, 12, 30)),
+    ('2024-05-01 12:30', datetime(2024, 5, 1, 12, 30)),
+    ('2024-05-01T12:30:00+00:00', datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)),
+    ('2024-05-01T12:30:00Z', datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)),
+    ('2024-05-01T12:30:00.250-05:00', datetime(2024, 5, 1, 12, 30, 0, 250000,
+                                                tzinfo=timezone(timedelta(hours=-5)))),
+])
+def test_parse_time(value, expected):
+    assert parse_time(value) == expected
+
+
+def test_parse_time_rejects_other_formats():
+    with pytest.raises(ValueError):
+        parse_time('05/01/2024')
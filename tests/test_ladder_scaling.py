@@ -0,0 +1,75 @@
+"""Cost of generate_outputs_with_settings as the ladder grows"""
+
+import os
+
+import pytest
+
+from e2mc_assistant.converter.config_converter_enhanced import ConfigConverter
+
+
+CONVERTER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'src', 'e2mc_assistant', 'converter')
+RULES_FILE = os.path.join(CONVERTER_DIR, 'rules', 'e2mc_rules.yaml')
+TEMPLATE_FILE = os.path.join(CONVERTER_DIR, 'templates', 'stream_template.json')
+
+
+def ladder_profile(rungs):
+    """HLS profile with distinct rungs (so memoized rule results are not reused): 4 video per audio"""
+    streams = []
+    for i in range(rungs):
+        if i % 5 == 4:
+            streams.append(f'<stream><audio_only>yes</audio_only><audio_bitrate>{64 + i}k</audio_bitrate>'
+                           f'<audio_codec>libfaac</audio_codec></stream>')
+        else:
+            streams.append(f'<stream><size>{320 + 16 * i}x{180 + 8 * i}</size><bitrate>{400 + 100 * i}k</bitrate>'
+                           f'<keyframe>60</keyframe><video_only>yes</video_only></stream>')
+    return ('<?xml version="1.0"?><query><format><output>advanced_hls</output><video_codec>libx264</video_codec>'
+            + ''.join(streams) + '</format></query>')
+
+
+def count_ladder_work(rungs):
+    """Convert a ladder and count the rule evaluations made inside generate_outputs_with_settings"""
+    converter = ConfigConverter(RULES_FILE)
+    counts = {'rules': 0, 'stream_passes': 0}
+    inside = [False]
+
+    def counting(name, key):
+        original = getattr(converter, name)
+
+        def wrapper(*args, **kwargs):
+            if inside[0]:
+                counts[key] += 1
+            return original(*args, **kwargs)
+        setattr(converter, name, wrapper)
+
+    counting('_process_rule', 'rules')
+    counting('_process_source_data', 'stream_passes')
+    generate = converter.generate_outputs_with_settings
+
+    def generate_counted(*args, **kwargs):
+        inside[0] = True
+        try:
+            return generate(*args, **kwargs)
+        finally:
+            inside[0] = False
+    converter.generate_outputs_with_settings = generate_counted
+
+    try:
+        result = converter.convert_data(converter.parse_xml_string(ladder_profile(rungs)), TEMPLATE_FILE)
+    finally:
+        converter.close()
+    outputs = result['Settings']['OutputGroups'][0]['Outputs']
+    assert len(outputs) == rungs
+    return counts
+
+
+@pytest.mark.parametrize('rungs', [10, 40])
+def test_one_rule_pass_per_rung(rungs):
+    assert count_ladder_work(rungs)['stream_passes'] == rungs
+
+
+def test_rule_evaluations_grow_linearly():
+    small, large = count_ladder_work(10), count_ladder_work(40)
+    assert small['rules'] > 0
+    # 4x the rungs may cost at most 4x the rule evaluations
+    assert large['rules'] <= 4 * small['rules']
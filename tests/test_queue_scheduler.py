@@ -0,0 +1,57 @@
+"""Queue pool scheduling against a fake MediaConvert client"""
+
+from e2mc_assistant.requester.queue_scheduler import QueueScheduler
+
+
+class FakeMediaConvert:
+    """Answers get_queue and list_jobs from fixed queue depths"""
+
+    def __init__(self, depths):
+        self.depths = depths
+        self.list_calls = 0
+
+    def get_queue(self, Name):
+        return {'Queue': {'Name': Name, 'Type': 'ON_DEMAND', 'Status': 'ACTIVE'}}
+
+    def list_jobs(self, Queue, Status, MaxResults, NextToken=None):
+        self.list_calls += 1
+        start = int(NextToken or 0)
+        total = self.depths.get(Queue, {}).get(Status, 0)
+        jobs = [{'Id': f'{Queue}-{index}'} for index in range(start, min(total, start + MaxResults))]
+        response = {'Jobs': jobs}
+        if start + MaxResults < total:
+            response['NextToken'] = str(start + MaxResults)
+        return response
+
+
+def job(outputs=1):
+    return {'Settings': {'OutputGroups': [{'Outputs': [{}] * outputs}]}}
+
+
+def test_jobs_go_to_the_least_loaded_queue():
+    client = FakeMediaConvert({'busy': {'SUBMITTED': 30}, 'idle': {'SUBMITTED': 0}})
+    scheduler = QueueScheduler(client, [{'Queue': 'busy', 'Slots': 10}, {'Queue': 'idle', 'Slots': 10}])
+    assigned = scheduler.assign([job() for _ in range(20)])
+    queues = [job_profile['Queue'] for _, job_profile in assigned]
+    assert queues.count('idle') > queues.count('busy')
+    assert not any(entry['Saturated'] for entry in scheduler.summary())
+
+
+def test_capped_listing_marks_the_queue_saturated():
+    # 'deep' holds more jobs than two pages of 20 list: its depth is only a lower bound
+    client = FakeMediaConvert({'deep': {'SUBMITTED': 1000}, 'shallow': {'SUBMITTED': 35}})
+    scheduler = QueueScheduler(client, [{'Queue': 'deep', 'Slots': 1000}, {'Queue': 'shallow', 'Slots': 1}],
+                               max_pages=2)
+    assigned = scheduler.assign([job() for _ in range(5)])
+    assert {job_profile['Queue'] for _, job_profile in assigned} == {'shallow'}
+    summary = {entry['Queue']: entry for entry in scheduler.summary()}
+    assert summary['deep']['Saturated'] and summary['deep']['Depth']['SUBMITTED'] == 40
+    assert not summary['shallow']['Saturated']
+
+
+def test_all_saturated_queues_fall_back_to_predicted_finish():
+    client = FakeMediaConvert({'a': {'SUBMITTED': 100}, 'b': {'SUBMITTED': 100}})
+    scheduler = QueueScheduler(client, [{'Queue': 'a', 'Slots': 1}, {'Queue': 'b', 'Slots': 10}], max_pages=1)
+    assigned = scheduler.assign([job() for _ in range(3)])
+    assert {job_profile['Queue'] for _, job_profile in assigned} == {'b'}
+    assert all(entry['Saturated'] for entry in scheduler.summary())
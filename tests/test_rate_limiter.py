@@ -0,0 +1,133 @@
+"""TokenBucket and concurrent submission with adaptive backoff (submit_jobs) against a stub client"""
+
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+from e2mc_assistant.requester import mediaconvert_job_submitter
+from e2mc_assistant.requester.mediaconvert_job_submitter import MediaConvertJobSubmitter
+from e2mc_assistant.requester.rate_limiter import TokenBucket
+
+
+ENDPOINT = 'https://abcd1234.mediaconvert.us-east-1.amazonaws.com'
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'CreateJob')
+
+
+class StubMediaConvert:
+    """create_job throttling the first `throttle` calls and rejecting jobs marked bad"""
+
+    def __init__(self, throttle):
+        self.throttle = throttle
+        self.calls = 0
+        self.attempts = {}
+        self._lock = threading.Lock()
+
+    def create_job(self, **job):
+        name = job['UserMetadata']['name']
+        with self._lock:
+            self.calls += 1
+            self.attempts[name] = self.attempts.get(name, 0) + 1
+            throttled = self.calls <= self.throttle
+        if throttled:
+            raise client_error('TooManyRequestsException')
+        if job['UserMetadata'].get('bad'):
+            raise client_error('BadRequestException')
+        return {'Job': {'Id': f'id-{name}', 'Status': 'SUBMITTED'}}
+
+
+class RecordingBucket(TokenBucket):
+    """Token bucket recording its rate after every throttle and success"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.history = []
+
+    def throttled(self):
+        super().throttled()
+        self.history.append(('throttled', self.rate))
+
+    def succeeded(self):
+        super().succeeded()
+        self.history.append(('succeeded', self.rate))
+
+
+@pytest.fixture
+def submitter(aws_credentials, monkeypatch):
+    monkeypatch.setattr(mediaconvert_job_submitter, 'backoff_delay', lambda attempt: 0)
+    return MediaConvertJobSubmitter(region='us-east-1', endpoint_url=ENDPOINT)
+
+
+def test_bucket_halves_and_recovers():
+    bucket = TokenBucket(10, recovery_step=2)
+    bucket.throttled()
+    assert bucket.rate == 5
+    bucket.throttled()
+    assert bucket.rate == 2.5
+    for _ in range(10):
+        bucket.succeeded()
+    assert bucket.rate == bucket.max_rate == 10
+    assert bucket.throttle_count == 2
+
+
+def test_bucket_rate_never_below_minimum():
+    bucket = TokenBucket(10, min_rate=1)
+    for _ in range(20):
+        bucket.throttled()
+    assert bucket.rate == 1
+
+
+def test_bucket_paces_callers():
+    bucket = TokenBucket(1000, burst=1)
+    assert bucket.acquire()
+    # The bucket is empty: a token takes 1 ms at 1000 per second
+    assert not bucket.acquire(timeout=0)
+    assert bucket.acquire(timeout=1)
+
+
+def test_throttled_jobs_are_retried_once_each(submitter):
+    submitter.client = StubMediaConvert(throttle=3)
+    limiter = RecordingBucket(100)
+    jobs = [(f'job{i}', {'Settings': {}, 'UserMetadata': {'name': f'job{i}'}}) for i in range(30)]
+
+    results = list(submitter.submit_jobs(jobs, max_workers=4, rate_limiter=limiter))
+
+    # Every job is yielded exactly once, with its key and response
+    assert sorted(key for key, _, _ in results) == sorted(key for key, _ in jobs)
+    for key, response, error in results:
+        assert error is None and response['Job']['Id'] == f'id-{key}'
+    assert submitter.client.calls == 33
+    assert limiter.throttle_count == 3
+
+    throttles = [rate for event, rate in limiter.history if event == 'throttled']
+    assert throttles[0] == 50
+    assert min(throttles) == 12.5
+    # Successful calls bring the rate back to the maximum
+    assert limiter.rate == limiter.max_rate
+
+
+def test_other_errors_are_not_retried(submitter):
+    submitter.client = StubMediaConvert(throttle=0)
+    jobs = [{'Settings': {}, 'UserMetadata': {'name': 'good'}},
+            {'Settings': {}, 'UserMetadata': {'name': 'bad', 'bad': 'yes'}}]
+
+    results = {key: (response, error) for key, response, error in submitter.submit_jobs(jobs, max_workers=2)}
+
+    # Keys default to the input position
+    assert results[0][1] is None and results[0][0]['Job']['Id'] == 'id-good'
+    response, error = results[1]
+    assert response is None
+    assert error.response['Error']['Code'] == 'BadRequestException'
+    assert submitter.client.attempts == {'good': 1, 'bad': 1}
+
+
+def test_throttling_error_returned_after_max_attempts(submitter):
+    submitter.client = StubMediaConvert(throttle=100)
+    [(key, response, error)] = submitter.submit_jobs([{'Settings': {}, 'UserMetadata': {'name': 'job'}}],
+                                                     max_attempts=3, rate_limiter=TokenBucket(1000))
+    assert key == 0 and response is None
+    assert error.response['Error']['Code'] == 'TooManyRequestsException'
+    assert submitter.client.attempts == {'job': 3}
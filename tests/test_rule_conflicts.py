@@ -0,0 +1,63 @@
+"""Conflict detection between mapping rules writing the same target path"""
+
+from e2mc_assistant.converter.rule_conflicts import build_target_index, find_rule_conflicts
+
+
+TARGET = 'Settings.OutputGroups[0].Outputs[0].VideoDescription.CodecSettings.H264Settings.CodecProfile'
+
+
+def rule(path, condition=None, target=TARGET):
+    source = {'path': path}
+    if condition is not None:
+        source['condition'] = condition
+    return {'source': source, 'target': {'path': target}}
+
+
+def conflicts(*rules):
+    return find_rule_conflicts(build_target_index(list(rules)))
+
+
+def test_overlapping_conditions_conflict():
+    assert len(conflicts(rule('profile'), rule('profile', {'operator': 'eq', 'value': 'baseline'}))) == 1
+
+
+def test_disjoint_values_are_exclusive():
+    assert conflicts(
+        rule('profile', {'source_path': 'video_codec', 'operator': 'in', 'value': ['mpeg4', 'libx264']}),
+        rule('profile', {'source_path': 'video_codec', 'operator': 'in', 'value': ['hevc']}),
+    ) == []
+
+
+def test_own_source_parameter_is_present():
+    # fragment_duration only fires when it exists, the other rule only when it does not
+    assert conflicts(
+        rule('fragment_duration'),
+        rule('segment_duration', {'operator': 'NOT',
+                                  'condition': {'source_path': 'fragment_duration', 'operator': 'exists'}}),
+    ) == []
+
+
+def test_single_branch_or_is_its_branch():
+    assert conflicts(
+        rule('two_pass', {'source_path': 'video_codec', 'operator': 'in', 'value': ['libx264']}),
+        rule('two_pass', {'operator': 'OR', 'conditions': [
+            {'operator': 'NOT', 'condition': {'source_path': 'video_codec', 'operator': 'exists'}}]}),
+    ) == []
+
+
+def test_or_of_values_on_one_parameter_is_their_union():
+    either = {'operator': 'OR', 'conditions': [
+        {'source_path': 'video_codec', 'operator': 'eq', 'value': 'mpeg4'},
+        {'source_path': 'video_codec', 'operator': 'eq', 'value': 'libx264'}]}
+    hevc = {'source_path': 'video_codec', 'operator': 'eq', 'value': 'hevc'}
+    libx264 = {'source_path': 'video_codec', 'operator': 'eq', 'value': 'libx264'}
+    assert conflicts(rule('profile', either), rule('profile', hevc)) == []
+    assert len(conflicts(rule('profile', either), rule('profile', libx264))) == 1
+
+
+def test_or_over_different_parameters_is_not_exclusive():
+    mixed = {'operator': 'OR', 'conditions': [
+        {'source_path': 'level', 'operator': 'eq', 'value': 30},
+        {'source_path': 'video_codec', 'operator': 'eq', 'value': 'hevc'}]}
+    libx264 = {'source_path': 'video_codec', 'operator': 'eq', 'value': 'libx264'}
+    assert len(conflicts(rule('profile', mixed), rule('profile', libx264))) == 1
@@ -0,0 +1,170 @@
+"""Resuming a journaled batch with E2MCWorkflow.submit_mediaconvert_jobs (moto S3, fake MediaConvert)"""
+
+import json
+import time
+from datetime import datetime, timezone
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from src.e2mc_assistant.requester.mediaconvert_job_submitter import MediaConvertJobSubmitter
+from src.e2mc_assistant.requester.submission_journal import TOKEN_METADATA_KEY, SubmissionJournal
+from src.e2mc_assistant.workflow.e2mc_workflow import E2MCWorkflow
+
+
+BUCKET = 'e2mc-test'
+SOURCE = f's3://{BUCKET}/src'
+FILE_IDS = ['1', '2', '3']
+PROFILE = {'Settings': {'Inputs': [{}], 'OutputGroups': [
+    {'OutputGroupSettings': {'Type': 'FILE_GROUP_SETTINGS', 'FileGroupSettings': {}}, 'Outputs': []}]}}
+
+
+# MediaConvert returns the existing job for a ClientRequestToken reused within this many seconds
+TOKEN_WINDOW = 60
+
+
+class FakeMediaConvert:
+    """create_job honouring ClientRequestToken for TOKEN_WINDOW seconds of `now`, get_job and list_jobs"""
+
+    def __init__(self):
+        self.now = time.time()
+        self.jobs = {}
+        self.tokens = {}
+        self.creates = []
+        # File IDs whose create_job succeeds but whose response is lost, as in a crash
+        self.lose_response = set()
+
+    def create_job(self, **request):
+        token = request['ClientRequestToken']
+        if token not in self.tokens or self.now - self.tokens[token][1] >= TOKEN_WINDOW:
+            job_id = f'job{len(self.jobs) + 1}'
+            self.jobs[job_id] = {'Id': job_id, 'Status': 'SUBMITTED', 'UserMetadata': request.get('UserMetadata', {}),
+                                 'CreatedAt': datetime.fromtimestamp(self.now, timezone.utc)}
+            self.tokens[token] = (job_id, self.now)
+            self.creates.append(token)
+        job_id = self.tokens[token][0]
+        if request['Settings']['Inputs'][0]['FileInput'].split('/')[-2] in self.lose_response:
+            raise ConnectionError('Connection reset after CreateJob')
+        return {'Job': dict(self.jobs[job_id])}
+
+    def get_job(self, Id):
+        return {'Job': dict(self.jobs[Id])}
+
+    def list_jobs(self, MaxResults, Order, NextToken=None):
+        jobs = sorted(self.jobs.values(), key=lambda job: job['CreatedAt'], reverse=Order == 'DESCENDING')
+        start = int(NextToken or 0)
+        response = {'Jobs': [dict(job) for job in jobs[start:start + MaxResults]]}
+        if start + MaxResults < len(jobs):
+            response['NextToken'] = str(start + MaxResults)
+        return response
+
+
+@pytest.fixture
+def batch(aws_credentials, tmp_path, monkeypatch):
+    client = FakeMediaConvert()
+    monkeypatch.setattr(MediaConvertJobSubmitter, '_get_endpoint_url',
+                        lambda self: setattr(self, 'endpoint_url', 'https://mediaconvert.us-east-1.amazonaws.com'))
+    init = MediaConvertJobSubmitter.__init__
+
+    def fake_client_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self.client = client
+    monkeypatch.setattr(MediaConvertJobSubmitter, '__init__', fake_client_init)
+
+    config_dir = tmp_path / 'configs'
+    config_dir.mkdir()
+    for file_id in FILE_IDS:
+        (config_dir / f'{file_id}.json').write_text(json.dumps(PROFILE))
+    with mock_aws():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket=BUCKET)
+        for file_id in FILE_IDS:
+            s3.put_object(Bucket=BUCKET, Key=f'src/{file_id}/{file_id}_source.mp4', Body=b'video')
+        workflow = E2MCWorkflow('us-east-1', 'arn:aws:iam::123456789012:role/MediaConvert')
+        yield workflow, str(config_dir), str(tmp_path / 'journal.db'), client
+
+
+def submit(workflow, config_dir, journal_file):
+    return workflow.submit_mediaconvert_jobs(config_dir, SOURCE, wait_for_completion=False, journal_file=journal_file)
+
+
+def test_rerun_does_not_resubmit_running_jobs(batch):
+    workflow, config_dir, journal_file, client = batch
+    first = submit(workflow, config_dir, journal_file)
+    assert sorted(first.values()) == ['SUBMITTED'] * 3
+    second = submit(workflow, config_dir, journal_file)
+    assert second == first
+    assert len(client.creates) == 3
+
+
+def test_rerun_refreshes_journaled_jobs(batch):
+    workflow, config_dir, journal_file, client = batch
+    submit(workflow, config_dir, journal_file)
+    # Since the first run, job1 failed, job2 was canceled and job3 completed
+    client.jobs['job1']['Status'] = 'ERROR'
+    client.jobs['job2']['Status'] = 'CANCELED'
+    client.jobs['job3']['Status'] = 'COMPLETE'
+
+    results = submit(workflow, config_dir, journal_file)
+    assert results == {'1:job4': 'SUBMITTED', '2:job5': 'SUBMITTED', '3:job3': 'COMPLETE'}
+    # The failed and canceled jobs got new tokens, so MediaConvert created new jobs
+    assert len(client.creates) == 5 and len(set(client.creates)) == 5
+
+    journal = SubmissionJournal(journal_file)
+    try:
+        assert journal.get('3')['status'] == 'COMPLETE'
+        assert journal.get('1')['job_id'] == 'job4'
+        assert journal.summary() == {'COMPLETE': 1, 'SUBMITTED': 2}
+    finally:
+        journal.close()
+
+
+def test_jobs_are_tagged_with_their_token(batch):
+    workflow, config_dir, journal_file, client = batch
+    submit(workflow, config_dir, journal_file)
+    assert sorted(job['UserMetadata'][TOKEN_METADATA_KEY] for job in client.jobs.values()) == sorted(client.creates)
+
+
+def test_rerun_after_the_token_window_adopts_jobs_created_before_a_crash(batch):
+    workflow, config_dir, journal_file, client = batch
+    # Jobs 2 and 3 are created but their responses never reach the journal
+    client.lose_response = {'2', '3'}
+    first = submit(workflow, config_dir, journal_file)
+    assert first['1:job1'] == 'SUBMITTED' and first['2'].startswith('ERROR') and first['3'].startswith('ERROR')
+    assert len(client.creates) == 3
+
+    # The rerun comes long after MediaConvert forgot the tokens
+    client.lose_response = set()
+    client.now += 3600
+    client.jobs['job3']['Status'] = 'COMPLETE'
+    results = submit(workflow, config_dir, journal_file)
+    assert results == {'1:job1': 'SUBMITTED', '2:job2': 'SUBMITTED', '3:job3': 'COMPLETE'}
+    assert len(client.creates) == 3
+
+    journal = SubmissionJournal(journal_file)
+    try:
+        assert journal.unrecorded() == []
+        assert journal.get('2')['job_id'] == 'job2'
+    finally:
+        journal.close()
+
+
+def test_rerun_after_the_token_window_submits_jobs_never_created(batch, monkeypatch):
+    workflow, config_dir, journal_file, client = batch
+    create_job = client.create_job
+
+    def crash_before_create(**request):
+        if request['Settings']['Inputs'][0]['FileInput'].split('/')[-2] == '2':
+            raise ConnectionError('Connection reset before CreateJob')
+        return create_job(**request)
+    monkeypatch.setattr(client, 'create_job', crash_before_create)
+    submit(workflow, config_dir, journal_file)
+    assert len(client.creates) == 2
+
+    monkeypatch.setattr(client, 'create_job', create_job)
+    client.now += 3600
+    results = submit(workflow, config_dir, journal_file)
+    # Nothing to adopt for 2: it is submitted exactly once
+    assert results == {'1:job1': 'SUBMITTED', '2:job3': 'SUBMITTED', '3:job2': 'SUBMITTED'}
+    assert len(client.creates) == 3
@@ -0,0 +1,139 @@
+"""TemplateRegistry request shapes, checked against the MediaConvert API model with Stubber"""
+
+import copy
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from e2mc_assistant.requester.template_registry import TemplateRegistry, content_hash
+
+
+ENDPOINT = 'https://abcd1234.mediaconvert.us-east-1.amazonaws.com'
+ROLE = 'arn:aws:iam::123456789012:role/MediaConvertRole'
+
+VIDEO = {'CodecSettings': {'Codec': 'H_264', 'H264Settings': {'RateControlMode': 'QVBR', 'MaxBitrate': 5000000}},
+         'Width': 1920, 'Height': 1080}
+AUDIO = [{'CodecSettings': {'Codec': 'AAC', 'AacSettings': {'Bitrate': 128000, 'CodingMode': 'CODING_MODE_2_0',
+                                                           'SampleRate': 48000}}}]
+CONTAINER = {'Container': 'MP4', 'Mp4Settings': {}}
+PRESET_SETTINGS = {'AudioDescriptions': AUDIO, 'ContainerSettings': CONTAINER, 'VideoDescription': VIDEO}
+PRESET = f"e2mc-preset-{content_hash(PRESET_SETTINGS)}"
+
+PROFILE = {
+    'Role': ROLE,
+    'UserMetadata': {'file_id': '1'},
+    'Priority': 10,
+    'StatusUpdateInterval': 'SECONDS_60',
+    'JobEngineVersion': '2024-01-01',
+    'SimulateReservedQueue': 'DISABLED',
+    'Settings': {
+        'Inputs': [{'FileInput': 's3://source/1.mp4',
+                    'AudioSelectors': {'Audio Selector 1': {'DefaultSelection': 'DEFAULT'}}}],
+        'OutputGroups': [{
+            'Name': 'File Group',
+            'OutputGroupSettings': {'Type': 'FILE_GROUP_SETTINGS',
+                                    'FileGroupSettings': {'Destination': 's3://output/1/'}},
+            'Outputs': [{'NameModifier': '_1080p', 'VideoDescription': VIDEO, 'AudioDescriptions': AUDIO,
+                         'ContainerSettings': CONTAINER}],
+        }],
+    },
+}
+
+# What the job template holds: no input file, no destination, outputs naming their preset
+TEMPLATE_SETTINGS = {
+    'Inputs': [{'AudioSelectors': {'Audio Selector 1': {'DefaultSelection': 'DEFAULT'}}}],
+    'OutputGroups': [{
+        'Name': 'File Group',
+        'OutputGroupSettings': {'Type': 'FILE_GROUP_SETTINGS', 'FileGroupSettings': {}},
+        'Outputs': [{'NameModifier': '_1080p', 'Preset': PRESET}],
+    }],
+}
+TEMPLATE = f"e2mc-template-{content_hash({'Priority': 10, 'StatusUpdateInterval': 'SECONDS_60', 'Settings': TEMPLATE_SETTINGS})}"
+
+
+@pytest.fixture
+def stubbed(aws_credentials):
+    client = boto3.client('mediaconvert', region_name='us-east-1', endpoint_url=ENDPOINT)
+    with Stubber(client) as stubber:
+        yield client, stubber
+        stubber.assert_no_pending_responses()
+
+
+def expect_listing(stubber, presets=(), templates=()):
+    listing = {'Category': 'e2mc-assistant', 'ListBy': 'NAME', 'MaxResults': 20}
+    stubber.add_response('list_presets', {'Presets': [{'Name': name, 'Settings': {}} for name in presets]}, listing)
+    stubber.add_response('list_job_templates',
+                         {'JobTemplates': [{'Name': name, 'Settings': {}} for name in templates]}, listing)
+
+
+def test_create_requests(stubbed):
+    client, stubber = stubbed
+    expect_listing(stubber)
+    stubber.add_response('create_preset', {'Preset': {'Name': PRESET, 'Settings': {}}}, {
+        'Name': PRESET,
+        'Category': 'e2mc-assistant',
+        'Description': 'Created by e2mc-assistant',
+        'Settings': PRESET_SETTINGS,
+    })
+    stubber.add_response('create_job_template', {'JobTemplate': {'Name': TEMPLATE, 'Settings': {}}}, {
+        'Name': TEMPLATE,
+        'Category': 'e2mc-assistant',
+        'Description': 'Created by e2mc-assistant',
+        'Priority': 10,
+        'StatusUpdateInterval': 'SECONDS_60',
+        'Settings': TEMPLATE_SETTINGS,
+    })
+
+    registry = TemplateRegistry(client)
+    request = registry.job_request(copy.deepcopy(PROFILE))
+
+    job_settings = copy.deepcopy(TEMPLATE_SETTINGS)
+    job_settings['Inputs'][0]['FileInput'] = 's3://source/1.mp4'
+    job_settings['OutputGroups'][0]['OutputGroupSettings']['FileGroupSettings']['Destination'] = 's3://output/1/'
+    expected_job = {
+        'Role': ROLE,
+        'UserMetadata': {'file_id': '1'},
+        'JobEngineVersion': '2024-01-01',
+        'SimulateReservedQueue': 'DISABLED',
+        'JobTemplate': TEMPLATE,
+        'Settings': job_settings,
+    }
+    assert request == expected_job
+    # The request is valid for the CreateJob API model
+    stubber.add_response('create_job', {'Job': {'Id': 'job-1', 'Role': ROLE, 'Settings': {}}}, expected_job)
+    client.create_job(**request)
+    assert registry.summary()['presets_created'] == 1
+    assert registry.summary()['templates_created'] == 1
+
+
+def test_existing_resources_are_not_created(stubbed):
+    client, stubber = stubbed
+    expect_listing(stubber, presets=[PRESET], templates=[TEMPLATE])
+    registry = TemplateRegistry(client)
+    assert registry.sync_profile(copy.deepcopy(PROFILE)) == TEMPLATE
+    # Listed once; a second profile with the same content needs no call at all
+    assert registry.job_request(copy.deepcopy(PROFILE))['JobTemplate'] == TEMPLATE
+    assert registry.summary()['presets_created'] == 0
+
+
+def test_concurrently_created_resources_are_tolerated(stubbed):
+    client, stubber = stubbed
+    expect_listing(stubber)
+    stubber.add_client_error('create_preset', 'ConflictException', http_status_code=409)
+    stubber.add_client_error('create_job_template', 'ConflictException', http_status_code=409)
+    registry = TemplateRegistry(client)
+    assert registry.sync_profile(copy.deepcopy(PROFILE)) == TEMPLATE
+    assert registry.summary() == {'presets_created': 0, 'templates_created': 0,
+                                  'presets_known': 1, 'templates_known': 1}
+
+
+def test_job_settings_fill_every_input_and_destination():
+    profile = copy.deepcopy(PROFILE)
+    profile['Settings']['Inputs'].append({'FileInput': 's3://source/1-extra.mp4'})
+    settings = TemplateRegistry(client=None).job_settings(profile)
+    assert [job_input['FileInput'] for job_input in settings['Inputs']] == ['s3://source/1.mp4',
+                                                                            's3://source/1-extra.mp4']
+    group_settings = settings['OutputGroups'][0]['OutputGroupSettings']
+    assert group_settings['FileGroupSettings'] == {'Destination': 's3://output/1/'}
+    assert settings['OutputGroups'][0]['Outputs'] == [{'NameModifier': '_1080p', 'Preset': PRESET}]
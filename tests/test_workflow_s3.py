@@ -0,0 +1,106 @@
+"""E2MCWorkflow.convert_configs with S3 input and output (moto)"""
+
+import os
+import tempfile
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from src.e2mc_assistant.workflow.e2mc_workflow import E2MCWorkflow
+
+
+CONVERTER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'src', 'e2mc_assistant', 'converter')
+RULES_FILE = os.path.join(CONVERTER_DIR, 'rules', 'e2mc_rules.yaml')
+TEMPLATE_FILE = os.path.join(CONVERTER_DIR, 'templates', 'mp4_template.json')
+
+BUCKET = 'e2mc-test'
+PROFILE = b"""<?xml version="1.0"?>
+<query><format>
+    <output>mp4</output>
+    <video_codec>libx264</video_codec>
+    <bitrate>1000k</bitrate>
+    <size>1280x720</size>
+    <audio_codec>libfaac</audio_codec>
+    <audio_bitrate>128k</audio_bitrate>
+</format></query>
+"""
+# More than one list_objects_v2 page (1000 keys) under the prefix; 2001 and 2002 sort after the filler
+FILLER_KEYS = 1100
+PROFILE_IDS = ['0001', '2001', '2002']
+
+
+@pytest.fixture
+def s3(aws_credentials):
+    with mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        for i in range(FILLER_KEYS):
+            client.put_object(Bucket=BUCKET, Key=f'profiles/{i:04d}.txt', Body=b'not a profile')
+        for file_id in PROFILE_IDS:
+            client.put_object(Bucket=BUCKET, Key=f'profiles/{file_id}.xml', Body=PROFILE)
+        # Keys below a sub-prefix are not part of the directory
+        client.put_object(Bucket=BUCKET, Key='profiles/nested/3001.xml', Body=PROFILE)
+        yield client
+
+
+@pytest.fixture
+def staging_dirs(monkeypatch):
+    """Record the log staging directories created by convert_configs"""
+    created = []
+    mkdtemp = tempfile.mkdtemp
+
+    def recording_mkdtemp(*args, **kwargs):
+        path = mkdtemp(*args, **kwargs)
+        created.append(path)
+        return path
+    monkeypatch.setattr(tempfile, 'mkdtemp', recording_mkdtemp)
+    return created
+
+
+def output_keys(client, prefix):
+    paginator = client.get_paginator('list_objects_v2')
+    return {obj['Key'] for page in paginator.paginate(Bucket=BUCKET, Prefix=prefix) for obj in page.get('Contents', [])}
+
+
+def test_lists_profiles_past_the_first_page(s3):
+    workflow = E2MCWorkflow(region='us-east-1')
+    sources = workflow._list_config_sources(f's3://{BUCKET}/profiles')
+    assert sorted(filename for filename, _ in sources) == [f'{file_id}.xml' for file_id in PROFILE_IDS]
+    assert all(uri.startswith(f's3://{BUCKET}/profiles/') for _, uri in sources)
+
+
+def test_s3_input_and_output(s3, staging_dirs):
+    workflow = E2MCWorkflow(region='us-east-1', s3_max_workers=4)
+    converted = workflow.convert_configs(f's3://{BUCKET}/profiles/', f's3://{BUCKET}/converted', RULES_FILE,
+                                         TEMPLATE_FILE)
+
+    assert sorted(converted) == [f's3://{BUCKET}/converted/{file_id}.json' for file_id in PROFILE_IDS]
+    keys = output_keys(s3, 'converted/')
+    for file_id in PROFILE_IDS:
+        assert f'converted/{file_id}.json' in keys
+        assert f'converted/{file_id}_conversion.log' in keys
+    assert 'converted/conversion_details.log' in keys
+    assert 'converted/3001.json' not in keys
+
+    body = s3.get_object(Bucket=BUCKET, Key='converted/2002.json')['Body'].read()
+    assert b'OutputGroups' in body
+    assert staging_dirs and not any(os.path.exists(path) for path in staging_dirs)
+
+
+def test_s3_input_local_output(s3, tmp_path):
+    workflow = E2MCWorkflow(region='us-east-1')
+    converted = workflow.convert_configs(f's3://{BUCKET}/profiles', str(tmp_path), RULES_FILE, TEMPLATE_FILE,
+                                         include_ids=['2001'])
+    assert converted == [str(tmp_path / '2001.json')]
+    assert (tmp_path / 'conversion_details.log').exists()
+
+
+def test_failed_listing_cleans_up(s3, staging_dirs):
+    workflow = E2MCWorkflow(region='us-east-1')
+    with pytest.raises(ClientError):
+        workflow.convert_configs('s3://missing-bucket/profiles', f's3://{BUCKET}/converted', RULES_FILE)
+    assert staging_dirs and not any(os.path.exists(path) for path in staging_dirs)
+    assert output_keys(s3, 'converted/') == set()
@@ -5,6 +5,17 @@ This package provides tools for validating AWS MediaConvert job configurations
 against a JSON schema.
 """
 
-from .validator import MediaConvertConfigValidator
+from .validator import MediaConvertConfigValidator, validate_bulk
+from .schema_compiler import CompiledSchemaValidator, UnsupportedSchemaError, ValidationIssue, compile_schema
+from .schema_index import SchemaKeyIndex, SchemaLocation
 
-__all__ = ['MediaConvertConfigValidator']
+__all__ = [
+    'MediaConvertConfigValidator',
+    'validate_bulk',
+    'CompiledSchemaValidator',
+    'UnsupportedSchemaError',
+    'ValidationIssue',
+    'compile_schema',
+    'SchemaKeyIndex',
+    'SchemaLocation',
+]
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+MediaConvert Schema Compiler
+
+This module turns a JSON schema (such as mc_setting_schema.json) into generated
+Python validation functions, one per schema node. The generated source is
+cached on disk under the SHA-256 of the schema, so the code generation only
+runs once per schema version and later runs just import the cached module.
+
+The compiler supports the Draft 7 keywords used by the MediaConvert schema
+(type, enum, const, properties, patternProperties, additionalProperties,
+items, required, numeric and length bounds, pattern). Schemas using any other
+keyword raise UnsupportedSchemaError so callers can fall back to jsonschema.
+
+Error messages follow jsonschema's wording so existing log parsing keeps
+working.
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+
+logger = logging.getLogger('SchemaCompiler')
+
+# Bump when the generated code changes so stale cache entries are not reused
+COMPILER_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'e2mc', 'schema_validators')
+
+# Keywords that only annotate the schema and need no code
+_ANNOTATION_KEYWORDS = {'$schema', '$id', 'title', 'description', 'default', 'examples', '$comment'}
+
+_SUPPORTED_KEYWORDS = _ANNOTATION_KEYWORDS | {
+    'type', 'enum', 'const', 'properties', 'patternProperties', 'additionalProperties',
+    'items', 'required', 'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum',
+    'minLength', 'maxLength', 'pattern', 'minItems', 'maxItems',
+}
+
+_TYPE_CHECKS = {
+    'object': 'isinstance({v}, dict)',
+    'array': 'isinstance({v}, list)',
+    'string': 'isinstance({v}, str)',
+    'boolean': 'isinstance({v}, bool)',
+    'null': '{v} is None',
+    'number': '(isinstance({v}, (int, float)) and not isinstance({v}, bool))',
+    'integer': '(isinstance({v}, int) and not isinstance({v}, bool) or isinstance({v}, float) and {v}.is_integer())',
+}
+
+
+ValidationIssue = namedtuple('ValidationIssue', ['path', 'keyword', 'message'])
+ValidationIssue.__doc__ = """
+A single validation error.
+
+Attributes:
+    path (tuple): Location of the offending value, as keys and list indices
+    keyword (str): Schema keyword that failed (type, enum, required, ...)
+    message (str): Human readable message, worded like jsonschema's
+"""
+
+
+class UnsupportedSchemaError(Exception):
+    """Raised when a schema uses keywords the compiler does not generate code for."""
+
+
+class _StopValidation(Exception):
+    """Raised by the fail-fast collector on the first error."""
+
+    def __init__(self, issue):
+        super().__init__(issue.message)
+        self.issue = issue
+
+
+class _FailFastErrors(list):
+    """Error collector that stops validation at the first error."""
+
+    def append(self, issue):
+        raise _StopValidation(issue)
+
+
+def _enum_equal(instance, option):
+    """Compare like jsonschema does: booleans never equal numbers."""
+    if isinstance(instance, bool) or isinstance(option, bool):
+        return isinstance(instance, bool) and isinstance(option, bool) and instance == option
+    return instance == option
+
+
+def _in_enum(instance, options):
+    return any(_enum_equal(instance, option) for option in options)
+
+
+def _extras_message(extras):
+    verb = 'was' if len(extras) == 1 else 'were'
+    return f"Additional properties are not allowed ({', '.join(repr(extra) for extra in extras)} {verb} unexpected)"
+
+
+# Names made available to the generated module
+_RUNTIME = {
+    'ValidationIssue': ValidationIssue,
+    '_in_enum': _in_enum,
+    '_extras_message': _extras_message,
+    '_MISSING': object(),
+    're': re,
+}
+
+
+class _CodeGenerator:
+    """Generates one validation function per schema node."""
+
+    def __init__(self):
+        self.lines = []
+        self.constants = []
+        self.counter = 0
+        # Schema location (as in schema_index, e.g. "OutputGroups[*].Outputs[*]") -> function name
+        self.locations = {}
+
+    def constant(self, value):
+        """Emit a module-level constant and return its name."""
+        name = f"_C{len(self.constants)}"
+        self.constants.append(f"{name} = {value}")
+        return name
+
+    def compile_node(self, schema, location=""):
+        """Generate the function validating one schema node and return its name."""
+        if schema is True or schema == {}:
+            return None
+        if schema is False:
+            name = self._new_name()
+            self.lines += [f"def {name}(v, path, errors):",
+                           "    errors.append(ValidationIssue(path, 'false', 'False schema does not allow %r' % (v,)))", ""]
+            self.locations[location] = name
+            return name
+        if not isinstance(schema, dict):
+            raise UnsupportedSchemaError(f"Schema node must be an object or boolean, got {type(schema).__name__}")
+
+        unsupported = set(schema) - _SUPPORTED_KEYWORDS
+        if unsupported:
+            raise UnsupportedSchemaError(f"Unsupported schema keywords: {', '.join(sorted(unsupported))}")
+
+        name = self._new_name()
+        body = []
+
+        # Child functions are generated before this one so their names are known
+        prefix = f"{location}." if location else ""
+        properties = {key: self.compile_node(sub, f"{prefix}{key}") for key, sub in schema.get('properties', {}).items()}
+        patterns = [(pattern, self.compile_node(sub, f"{prefix}<{pattern}>"))
+                    for pattern, sub in schema.get('patternProperties', {}).items()]
+        additional = schema.get('additionalProperties', True)
+        additional_fn = self.compile_node(additional, f"{prefix}*") if isinstance(additional, dict) else None
+        items = schema.get('items')
+        if isinstance(items, list):
+            raise UnsupportedSchemaError("Tuple-style 'items' is not supported")
+        items_fn = self.compile_node(items, f"{location}[*]") if items is not None else None
+
+        if 'type' in schema:
+            types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+            unknown_types = [t for t in types if t not in _TYPE_CHECKS]
+            if unknown_types:
+                raise UnsupportedSchemaError(f"Unsupported type: {unknown_types}")
+            check = ' or '.join(_TYPE_CHECKS[t].format(v='v') for t in types)
+            expected = self.constant(repr(', '.join(repr(t) for t in types)))
+            body += [f"if not ({check}):",
+                     f"    errors.append(ValidationIssue(path, 'type', '%r is not of type %s' % (v, {expected})))"]
+
+        if 'enum' in schema:
+            options = schema['enum']
+            if all(isinstance(option, str) for option in options):
+                values = self.constant(f"frozenset({options!r})")
+                check = f"not (isinstance(v, str) and v in {values})"
+            else:
+                values = self.constant(repr(options))
+                check = f"not _in_enum(v, {values})"
+            shown = self.constant(repr(repr(options)))
+            body += [f"if {check}:",
+                     f"    errors.append(ValidationIssue(path, 'enum', '%r is not one of %s' % (v, {shown})))"]
+
+        if 'const' in schema:
+            value = self.constant(repr([schema['const']]))
+            body += [f"if not _in_enum(v, {value}):",
+                     f"    errors.append(ValidationIssue(path, 'const', '%r was expected' % ({value}[0],)))"]
+
+        numeric = [(keyword, operator, text) for keyword, operator, text in (
+            ('minimum', '<', 'is less than the minimum of'),
+            ('maximum', '>', 'is greater than the maximum of'),
+            ('exclusiveMinimum', '<=', 'is less than or equal to the minimum of'),
+            ('exclusiveMaximum', '>=', 'is greater than or equal to the maximum of'),
+        ) if keyword in schema]
+        if numeric:
+            body.append(f"if {_TYPE_CHECKS['number'].format(v='v')}:")
+            for keyword, operator, text in numeric:
+                body += [f"    if v {operator} {schema[keyword]!r}:",
+                         f"        errors.append(ValidationIssue(path, {keyword!r}, '%r {text} %r' % (v, {schema[keyword]!r})))"]
+
+        string_checks = []
+        if 'minLength' in schema:
+            string_checks += [f"    if len(v) < {int(schema['minLength'])}:",
+                              "        errors.append(ValidationIssue(path, 'minLength', '%r is too short' % (v,)))"]
+        if 'maxLength' in schema:
+            string_checks += [f"    if len(v) > {int(schema['maxLength'])}:",
+                              "        errors.append(ValidationIssue(path, 'maxLength', '%r is too long' % (v,)))"]
+        if 'pattern' in schema:
+            pattern = self.constant(f"re.compile({schema['pattern']!r})")
+            string_checks += [f"    if not {pattern}.search(v):",
+                              f"        errors.append(ValidationIssue(path, 'pattern', '%r does not match %r' % (v, {schema['pattern']!r})))"]
+        if string_checks:
+            body.append("if isinstance(v, str):")
+            body += string_checks
+
+        object_checks = []
+        if 'required' in schema:
+            for key in schema['required']:
+                object_checks += [f"    if {key!r} not in v:",
+                                  f"        errors.append(ValidationIssue(path, 'required', {repr(key) + ' is a required property'!r}))"]
+        if properties or patterns or additional is not True:
+            table = self.constant('{' + ', '.join(f"{key!r}: {fn or 'None'}" for key, fn in properties.items()) + '}')
+            compiled_patterns = self.constant(
+                '[' + ', '.join(f"(re.compile({pattern!r}), {fn or 'None'})" for pattern, fn in patterns) + ']')
+            object_checks += ["    extras = []",
+                              "    for key, value in v.items():",
+                              f"        fn = {table}.get(key, _MISSING)",
+                              "        if fn is not _MISSING:",
+                              "            if fn is not None:",
+                              "                fn(value, path + (key,), errors)",
+                              "            continue"]
+            if patterns:
+                object_checks += ["        matched = False",
+                                  f"        for regex, fn in {compiled_patterns}:",
+                                  "            if regex.search(key):",
+                                  "                matched = True",
+                                  "                if fn is not None:",
+                                  "                    fn(value, path + (key,), errors)",
+                                  "        if matched:",
+                                  "            continue"]
+            if additional is False:
+                object_checks.append("        extras.append(key)")
+            elif additional_fn:
+                object_checks.append(f"        {additional_fn}(value, path + (key,), errors)")
+            if additional is False:
+                object_checks += ["    if extras:",
+                                  "        errors.append(ValidationIssue(path, 'additionalProperties', _extras_message(extras)))"]
+        if object_checks:
+            body.append("if isinstance(v, dict):")
+            body += object_checks
+
+        array_checks = []
+        if 'minItems' in schema:
+            array_checks += [f"    if len(v) < {int(schema['minItems'])}:",
+                             "        errors.append(ValidationIssue(path, 'minItems', '%r is too short' % (v,)))"]
+        if 'maxItems' in schema:
+            array_checks += [f"    if len(v) > {int(schema['maxItems'])}:",
+                             "        errors.append(ValidationIssue(path, 'maxItems', '%r is too long' % (v,)))"]
+        if items_fn:
+            array_checks += ["    for index, item in enumerate(v):",
+                             f"        {items_fn}(item, path + (index,), errors)"]
+        if array_checks:
+            body.append("if isinstance(v, list):")
+            body += array_checks
+
+        if not body:
+            return None
+
+        self.lines.append(f"def {name}(v, path, errors):")
+        self.lines += ['    ' + line for line in body]
+        self.lines.append('')
+        self.locations[location] = name
+        return name
+
+    def _new_name(self):
+        self.counter += 1
+        return f"_v{self.counter}"
+
+
+def schema_hash(schema):
+    """
+    Compute the cache key of a schema.
+
+    Args:
+        schema (dict): Loaded JSON schema
+
+    Returns:
+        str: Hex SHA-256 of the canonical JSON form of the schema and compiler version
+    """
+    canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{COMPILER_VERSION}:{canonical}".encode('utf-8')).hexdigest()
+
+
+def generate_source(schema):
+    """
+    Generate the Python source validating a schema.
+
+    Args:
+        schema (dict): Loaded JSON schema
+
+    Returns:
+        str: Module source defining validate(instance, errors) and NODE_VALIDATORS,
+        which maps schema locations to the function validating that node
+
+    Raises:
+        UnsupportedSchemaError: If the schema uses keywords the compiler does not support
+    """
+    generator = _CodeGenerator()
+    root = generator.compile_node(schema)
+    header = ['# Generated by mc_config_validator.schema_compiler; do not edit', '']
+    footer = ['def validate(instance, errors):',
+              f"    {root}(instance, (), errors)" if root else '    pass',
+              '',
+              'NODE_VALIDATORS = {' + ', '.join(f"{location!r}: {name}" for location, name in generator.locations.items()) + '}',
+              '']
+    # Constants refer to the node functions, so they are defined after them
+    return '\n'.join(header + generator.lines + generator.constants + [''] + footer)
+
+
+class CompiledSchemaValidator:
+    """
+    Validator backed by generated code for one schema.
+    """
+
+    def __init__(self, validate_function, digest, node_validators=None):
+        """
+        Args:
+            validate_function (callable): Generated validate(instance, errors) function
+            digest (str): Schema hash the code was generated from
+            node_validators (dict): Generated functions keyed by schema location
+        """
+        self._validate = validate_function
+        self._node_validators = node_validators or {}
+        self.schema_hash = digest
+
+    def iter_errors(self, instance):
+        """
+        Collect every validation error.
+
+        Args:
+            instance: Value to validate (usually the Settings object)
+
+        Returns:
+            list: ValidationIssue for each error, in document order
+        """
+        errors = []
+        self._validate(instance, errors)
+        return errors
+
+    def first_error(self, instance):
+        """
+        Stop at the first validation error.
+
+        Args:
+            instance: Value to validate
+
+        Returns:
+            ValidationIssue or None: The first error found, or None if the instance is valid
+        """
+        try:
+            self._validate(instance, _FailFastErrors())
+        except _StopValidation as stop:
+            return stop.issue
+        return None
+
+    def is_valid(self, instance):
+        """
+        Fast pass/fail check.
+
+        Returns:
+            bool: True if the instance is valid
+        """
+        return self.first_error(instance) is None
+
+    def validate_node(self, location, instance):
+        """
+        Validate a value against the schema node at one location.
+
+        Args:
+            location (str): Schema location as used by schema_index (e.g. "OutputGroups[*].Outputs[*]")
+            instance: Value to validate
+
+        Returns:
+            list: ValidationIssue for each error, with paths relative to the value.
+            Locations whose schema has no checks accept any value
+        """
+        function = self._node_validators.get(location)
+        errors = []
+        if function is not None:
+            function(instance, (), errors)
+        return errors
+
+
+def _load_module(path, digest):
+    spec = importlib.util.spec_from_file_location(f"_mc_schema_{digest[:16]}", path)
+    module = importlib.util.module_from_spec(spec)
+    module.__dict__.update(_RUNTIME)
+    spec.loader.exec_module(module)
+    return module
+
+
+def compile_schema(schema, cache_dir=None):
+    """
+    Compile a schema, reusing the generated module cached on disk when available.
+
+    Args:
+        schema (dict): Loaded JSON schema
+        cache_dir (str): Directory for generated modules (default: ~/.cache/e2mc/schema_validators,
+            or the E2MC_SCHEMA_CACHE environment variable)
+
+    Returns:
+        CompiledSchemaValidator: Validator for the schema
+
+    Raises:
+        UnsupportedSchemaError: If the schema uses keywords the compiler does not support
+    """
+    digest = schema_hash(schema)
+    cache_dir = cache_dir or os.environ.get('E2MC_SCHEMA_CACHE') or DEFAULT_CACHE_DIR
+    module_path = os.path.join(cache_dir, f"schema_{digest}.py")
+
+    if os.path.exists(module_path):
+        try:
+            module = _load_module(module_path, digest)
+            logger.debug(f"Loaded compiled schema validator from {module_path}")
+            return CompiledSchemaValidator(module.validate, digest, module.NODE_VALIDATORS)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable compiled schema validator {module_path}: {e}")
+
+    source = generate_source(schema)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write atomically so concurrent processes never import a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(source)
+        os.replace(tmp_path, module_path)
+        module = _load_module(module_path, digest)
+        logger.debug(f"Compiled schema validator written to {module_path}")
+        return CompiledSchemaValidator(module.validate, digest, module.NODE_VALIDATORS)
+    except OSError as e:
+        logger.warning(f"Could not cache compiled schema validator in {cache_dir}: {e}")
+
+    # Cache directory not writable: execute the generated code in memory
+    namespace = dict(_RUNTIME)
+    exec(compile(source, f"<schema {digest[:16]}>", 'exec'), namespace)
+    return CompiledSchemaValidator(namespace['validate'], digest, namespace['NODE_VALIDATORS'])
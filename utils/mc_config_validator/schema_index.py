@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+MediaConvert Schema Key Index
+
+This module flattens a JSON schema into an index of schema locations (such as
+"OutputGroups[*].Outputs[*].VideoDescription") to the keys allowed there, so
+unknown parameters can be found in one walk of a configuration without going
+back to the schema. Each location keeps its property table, the compiled
+patternProperties matchers, the additionalProperties rule and the list of
+valid parameters used in error messages.
+
+The reported messages are the same as those of
+MediaConvertConfigValidator._check_unknown_parameters().
+"""
+
+import re
+
+
+# Keys that are never reported as unknown
+IGNORED_KEYS = frozenset(['type', 'properties', 'items', 'additionalProperties', 'required', 'enum', 'patternProperties'])
+
+
+class SchemaLocation:
+    """
+    Allowed keys at one location of the schema.
+
+    Attributes:
+        location (str): Normalized location, list indices shown as [*]
+        schema (dict): The schema node itself
+        properties (dict): Property name -> SchemaLocation of its value
+        additional (SchemaLocation, bool or None): SchemaLocation for additionalProperties schemas,
+            True if any other key is allowed, None if additionalProperties is absent or False
+        patterns (list): (compiled pattern, SchemaLocation) for patternProperties, or None
+        items (SchemaLocation or None): Location of list items
+        has_items (bool): True if the schema defines items
+        valid_message (str): Suffix listing the valid parameters, used in error messages
+    """
+
+    __slots__ = ('location', 'schema', 'properties', 'additional', 'patterns', 'items', 'has_items', 'valid_message')
+
+    def __init__(self, location, schema):
+        self.location = location
+        self.schema = schema if isinstance(schema, dict) else {}
+        self.properties = {}
+        self.additional = None
+        self.patterns = None
+        self.items = None
+        self.has_items = False
+        valid_props = list(self.schema['properties'].keys()) if 'properties' in self.schema else []
+        self.valid_message = f". Valid parameters are: {', '.join(valid_props)}" if valid_props else ""
+
+
+class SchemaKeyIndex:
+    """
+    Precomputed allowed-keys index of a schema.
+    """
+
+    def __init__(self, schema):
+        """
+        Build the index.
+
+        Args:
+            schema (dict): Loaded JSON schema
+        """
+        self.locations = {}
+        self.root = self._build(schema, "")
+
+    def _build(self, schema, location):
+        node = SchemaLocation(location, schema)
+        self.locations[location] = node
+        schema = node.schema
+
+        for key, sub_schema in schema.get('properties', {}).items():
+            node.properties[key] = self._build(sub_schema, f"{location}.{key}" if location else key)
+
+        if 'additionalProperties' in schema and schema['additionalProperties'] is not False:
+            additional = schema['additionalProperties']
+            if isinstance(additional, dict):
+                node.additional = self._build(additional, f"{location}.*" if location else "*")
+            else:
+                node.additional = True
+
+        if 'patternProperties' in schema:
+            node.patterns = [
+                (re.compile(pattern), self._build(sub_schema, f"{location}.<{pattern}>" if location else f"<{pattern}>"))
+                for pattern, sub_schema in schema['patternProperties'].items()
+            ]
+
+        if 'items' in schema:
+            node.has_items = True
+            node.items = self._build(schema['items'], f"{location}[*]")
+
+        return node
+
+    def location_for(self, path):
+        """
+        Return the schema location of a configuration path.
+
+        Args:
+            path (str): Dotted configuration path such as "OutputGroups[0].Outputs[1].VideoDescription"
+
+        Returns:
+            SchemaLocation or None: None if the path leaves the schema
+        """
+        node = self.root
+        for part in re.findall(r'[^.\[\]]+|\[\d+\]', path):
+            if part.startswith('['):
+                node = node.items if node.has_items else None
+            elif part in node.properties:
+                node = node.properties[part]
+            elif isinstance(node.additional, SchemaLocation):
+                node = node.additional
+            elif node.patterns:
+                node = next((sub for regex, sub in node.patterns if regex.match(part)), None)
+            else:
+                node = None
+            if node is None:
+                return None
+        return node
+
+    def find_unknown(self, config, path="", location=None):
+        """
+        Find the keys of a configuration that the schema does not allow.
+
+        Args:
+            config: Configuration object or sub-object (usually the Settings object)
+            path (str): Path of config within the document, for error messages
+            location (SchemaLocation): Schema location of config (default: the schema root)
+
+        Returns:
+            list: Error messages for unknown parameters, in document order
+        """
+        errors = []
+        self._walk(config, path, location or self.root, errors)
+        return errors
+
+    def _walk(self, config, path, node, errors):
+        if isinstance(config, dict):
+            properties = node.properties
+            additional = node.additional
+            patterns = node.patterns
+            for key, value in config.items():
+                current_path = f"{path}.{key}" if path else key
+                child = properties.get(key)
+                if child is not None:
+                    self._walk(value, current_path, child, errors)
+                elif additional is not None:
+                    if additional is not True:
+                        self._walk(value, current_path, additional, errors)
+                elif patterns is not None:
+                    matched = False
+                    for regex, pattern_node in patterns:
+                        if regex.match(key):
+                            matched = True
+                            self._walk(value, current_path, pattern_node, errors)
+                    if not matched and key not in IGNORED_KEYS:
+                        errors.append(f"Unknown parameter '{key}' at {current_path}{node.valid_message}")
+                elif key not in IGNORED_KEYS:
+                    errors.append(f"Unknown parameter '{key}' at {current_path}{node.valid_message}")
+
+        elif isinstance(config, list):
+            if node.has_items:
+                items = node.items
+                for i, item in enumerate(config):
+                    self._walk(item, f"{path}[{i}]", items, errors)
@@ -10,10 +10,23 @@ it conforms to the schema specifications.
 import json
 import sys
 import os
+import re
+import time
 import argparse
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from jsonschema import Draft7Validator, SchemaError
 
+try:
+    from .schema_compiler import UnsupportedSchemaError, compile_schema
+    from .schema_index import SchemaKeyIndex
+except ImportError:
+    # Running the validator directly as a script
+    from schema_compiler import UnsupportedSchemaError, compile_schema
+    from schema_index import SchemaKeyIndex
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(name)s - %(levelname)s - %(message)s')
 
@@ -23,17 +36,37 @@ class MediaConvertConfigValidator:
     Validates AWS MediaConvert job configurations against a JSON schema.
     """
 
-    def __init__(self, schema_path):
+    def __init__(self, schema_path, use_compiled=True):
         """
         Initialize the validator with the schema file path.
         
         Args:
             schema_path (str): Path to the JSON schema file
+            use_compiled (bool): Validate with code generated from the schema (cached on
+                disk by schema hash) instead of interpreting it with jsonschema
         """
         self.schema_path = schema_path
+        self.logger = logging.getLogger('ConfigValidator')
         self.schema = self._load_schema()
         self.validator = Draft7Validator(self.schema)
-        self.logger = logging.getLogger('ConfigValidator')
+        self.key_index = SchemaKeyIndex(self.schema)
+        # jsonschema validators per schema location, used by validate_value() without compiled code
+        self._node_validators = {}
+        self.compiled_validator = self._compile_schema() if use_compiled else None
+
+    def _compile_schema(self):
+        """
+        Compile the schema to Python validation code.
+        
+        Returns:
+            CompiledSchemaValidator or None: None if the schema uses keywords the compiler
+            does not support, in which case jsonschema is used
+        """
+        try:
+            return compile_schema(self.schema)
+        except UnsupportedSchemaError as e:
+            self.logger.info(f"Using jsonschema for {self.schema_path}: {e}")
+            return None
 
     def _load_schema(self):
         """
@@ -56,14 +89,16 @@ class MediaConvertConfigValidator:
             self.logger.error(f"Error: Invalid JSON in schema file: {e}")
             sys.exit(1)
 
-    def validate_config(self, config_path):
+    def validate_config(self, config_path, fail_fast=False):
         """
         Validate a MediaConvert job configuration against the schema.
-        Collects all validation errors instead of stopping at the first one.
+        Collects all validation errors instead of stopping at the first one,
+        unless fail_fast is set.
         Also checks for any parameters in the config that are not defined in the schema.
         
         Args:
             config_path (str): Path to the configuration file
+            fail_fast (bool): Stop at the first error, for pass/fail gating
             
         Returns:
             bool: True if validation passes, False otherwise
@@ -76,6 +111,32 @@ class MediaConvertConfigValidator:
             with open(config_path, 'r') as config_file:
                 config = json.load(config_file)
             
+            return self.validate_data(config, config_path, fail_fast)
+            
+        except FileNotFoundError:
+            error_msg = f"Error: Configuration file not found at {config_path}"
+            self.logger.error(error_msg)
+            print(error_msg)
+            return False
+        except json.JSONDecodeError as e:
+            error_msg = f"Error: Invalid JSON in configuration file: {e}"
+            self.logger.error(error_msg)
+            print(error_msg)
+            return False
+
+    def validate_data(self, config, name="configuration", fail_fast=False):
+        """
+        Validate an in-memory MediaConvert job configuration and log the errors.
+        
+        Args:
+            config (dict): Job configuration containing a "Settings" object
+            name (str): Name of the configuration used in log messages
+            fail_fast (bool): Stop at the first error instead of collecting all of them
+            
+        Returns:
+            bool: True if validation passes, False otherwise
+        """
+        try:
             # Extract the Settings object for validation
             if 'Settings' not in config:
                 self.logger.error("Error: Configuration is missing the 'Settings' object")
@@ -83,15 +144,11 @@ class MediaConvertConfigValidator:
             
             settings = config['Settings']
             
-            # Collect all schema validation errors
-            schema_errors = list(self.validator.iter_errors(settings))
-            
-            # Check for unknown parameters not defined in the schema
-            unknown_param_errors = self._check_unknown_parameters(settings)
+            schema_errors, unknown_param_errors = self.collect_errors(settings, fail_fast)
             
             # If no errors, validation is successful
             if not schema_errors and not unknown_param_errors:
-                self.logger.info(f"Validation successful: {config_path} conforms to the schema")
+                self.logger.info(f"Validation successful: {name} conforms to the schema")
                 return True
             
             # Output all schema validation errors
@@ -117,25 +174,112 @@ class MediaConvertConfigValidator:
             
             return False
             
-        except FileNotFoundError:
-            error_msg = f"Error: Configuration file not found at {config_path}"
-            logger.error(error_msg)
-            print(error_msg)
-            return False
-        except json.JSONDecodeError as e:
-            error_msg = f"Error: Invalid JSON in configuration file: {e}"
-            logger.error(error_msg)
-            print(error_msg)
-            return False
         except SchemaError as e:
             error_msg = f"Schema error: {e.message}"
-            logger.error(error_msg)
+            self.logger.error(error_msg)
             print(error_msg)
             return False
 
+    def collect_errors(self, settings, fail_fast=False):
+        """
+        Collect the schema and unknown parameter errors of a Settings object.
+        
+        Args:
+            settings (dict): The "Settings" object of a job configuration
+            fail_fast (bool): Return as soon as one error is found
+            
+        Returns:
+            tuple: (schema_errors, unknown_param_errors). Schema errors have .path and
+            .message attributes; unknown parameter errors are messages
+        """
+        if fail_fast:
+            if self.compiled_validator is not None:
+                first = self.compiled_validator.first_error(settings)
+            else:
+                first = next(self.validator.iter_errors(settings), None)
+            if first is not None:
+                return [first], []
+            return [], self._check_unknown_parameters(settings)[:1]
+        
+        # Collect all schema validation errors
+        if self.compiled_validator is not None:
+            schema_errors = self.compiled_validator.iter_errors(settings)
+        else:
+            schema_errors = list(self.validator.iter_errors(settings))
+        
+        # Check for unknown parameters not defined in the schema
+        unknown_param_errors = self._check_unknown_parameters(settings)
+        return schema_errors, unknown_param_errors
+
+    def error_records(self, settings, fail_fast=False):
+        """
+        Collect the errors of a Settings object as (path, error_type, message) records.
+        
+        Paths are normalized with [*] for list indices, so the same error in different
+        outputs shares a path (e.g. "OutputGroups[*].Outputs[*].VideoDescription.Width").
+        The error type is the failing schema keyword (type, enum, ...) or
+        "unknown_parameter".
+        
+        Args:
+            settings (dict): The "Settings" object of a job configuration
+            fail_fast (bool): Stop at the first error
+            
+        Returns:
+            list: List of (path, error_type, message) tuples
+        """
+        schema_errors, unknown_param_errors = self.collect_errors(settings, fail_fast)
+        records = []
+        for error in schema_errors:
+            # ValidationIssue has .keyword, jsonschema's ValidationError has .validator
+            error_type = getattr(error, 'keyword', None) or getattr(error, 'validator', None) or 'schema'
+            records.append((normalize_error_path(error.path), error_type, error.message))
+        for error in unknown_param_errors:
+            full_path = error.split(" at ", 1)[1].split(". Valid")[0]
+            records.append((normalize_error_path(full_path), 'unknown_parameter', error))
+        return records
+
+    def validate_value(self, path, value):
+        """
+        Validate a value written at one path of a Settings object.
+        
+        The path is resolved through the allowed-keys index, the value is checked
+        against the schema node found there (with the generated node validator when
+        the schema is compiled) and any keys inside it are checked for unknown
+        parameters. Used to validate converter writes as they happen.
+        
+        Args:
+            path (str): Path within the Settings object, e.g. "OutputGroups[0].Outputs[1].VideoDescription"
+            value: Value written at that path
+            
+        Returns:
+            list: Error messages, empty if the value is valid at that path
+        """
+        location = self.key_index.location_for(path)
+        if location is None:
+            key = re.split(r'[.\[]', path)[-1] if path else path
+            return [f"Unknown parameter '{key}' at {path}"]
+        
+        if self.compiled_validator is not None:
+            issues = self.compiled_validator.validate_node(location.location, value)
+        else:
+            node_validator = self._node_validators.get(location.location)
+            if node_validator is None:
+                node_validator = self._node_validators[location.location] = Draft7Validator(location.schema)
+            issues = node_validator.iter_errors(value)
+        
+        errors = []
+        for issue in issues:
+            error_path = path + "".join(f"[{part}]" if isinstance(part, int) else f".{part}" for part in issue.path)
+            errors.append(f"Schema error at {error_path}: {issue.message}")
+        errors.extend(self.key_index.find_unknown(value, path, location))
+        return errors
+
     def _check_unknown_parameters(self, config, path="", schema=None):
         """
-        Recursively check for parameters in the config that are not defined in the schema.
+        Check for parameters in the config that are not defined in the schema.
+        
+        The allowed keys of every schema location are indexed once when the
+        validator is created, so this is a single walk over the configuration.
         
         Args:
             config (dict): The configuration object or sub-object
@@ -145,64 +289,200 @@ class MediaConvertConfigValidator:
         Returns:
             list: List of error messages for unknown parameters
         """
-        errors = []
+        if schema is None or schema is self.schema:
+            key_index = self.key_index
+        else:
+            key_index = SchemaKeyIndex(schema)
+        return key_index.find_unknown(config, path)
+
+
+def normalize_error_path(path):
+    """
+    Normalize an error path for grouping, replacing list indices with [*].
+    
+    Args:
+        path: Path as a sequence of keys and indices, or as a dotted string
         
-        if schema is None:
-            schema = self.schema
-        
-        if isinstance(config, dict):
-            # For objects, check each property against the schema
-            for key, value in config.items():
-                current_path = f"{path}.{key}" if path else key
-                
-                # Check if this is a property defined in the schema
-                if 'properties' in schema and key in schema['properties']:
-                    # Recursively check this property's value against its schema
-                    sub_schema = schema['properties'][key]
-                    errors.extend(self._check_unknown_parameters(value, current_path, sub_schema))
-                elif 'additionalProperties' in schema and schema['additionalProperties'] is not False:
-                    # If additionalProperties is allowed, check against that schema
-                    if isinstance(schema['additionalProperties'], dict):
-                        errors.extend(self._check_unknown_parameters(value, current_path, schema['additionalProperties']))
-                elif 'patternProperties' in schema:
-                    # Handle pattern properties (for dynamic keys)
-                    pattern_matched = False
-                    for pattern, pattern_schema in schema['patternProperties'].items():
-                        import re
-                        if re.match(pattern, key):
-                            pattern_matched = True
-                            errors.extend(self._check_unknown_parameters(value, current_path, pattern_schema))
-                    
-                    if not pattern_matched and key not in ['type', 'properties', 'items', 'additionalProperties', 'required', 'enum', 'patternProperties']:
-                        # List valid properties if available
-                        valid_props = []
-                        if 'properties' in schema:
-                            valid_props = list(schema['properties'].keys())
-                        
-                        if valid_props:
-                            errors.append(f"Unknown parameter '{key}' at {current_path}. Valid parameters are: {', '.join(valid_props)}")
-                        else:
-                            errors.append(f"Unknown parameter '{key}' at {current_path}")
-                elif key not in ['type', 'properties', 'items', 'additionalProperties', 'required', 'enum', 'patternProperties']:
-                    # This is an unknown property
-                    # List valid properties if available
-                    valid_props = []
-                    if 'properties' in schema:
-                        valid_props = list(schema['properties'].keys())
-                    
-                    if valid_props:
-                        errors.append(f"Unknown parameter '{key}' at {current_path}. Valid parameters are: {', '.join(valid_props)}")
-                    else:
-                        errors.append(f"Unknown parameter '{key}' at {current_path}")
-                
-        elif isinstance(config, list):
-            # For arrays, check each item against the items schema
-            if 'items' in schema:
-                for i, item in enumerate(config):
-                    current_path = f"{path}[{i}]"
-                    errors.extend(self._check_unknown_parameters(item, current_path, schema['items']))
+    Returns:
+        str: Normalized path, or "root" for an empty path
+    """
+    if isinstance(path, str):
+        normalized = re.sub(r'\[\d+\]', '[*]', path)
+    else:
+        normalized = ""
+        for part in path:
+            if isinstance(part, int):
+                normalized += "[*]"
+            else:
+                normalized = f"{normalized}.{part}" if normalized else str(part)
+    return normalized or "root"
+
+
+def iter_bulk_items(directory=None, jsonl_path=None):
+    """
+    Yield the configurations to validate in bulk mode.
+    
+    Args:
+        directory (str): Directory searched recursively for *.json files
+        jsonl_path (str): JSONL file with one job configuration per line, or "-" for stdin
         
-        return errors
+    Yields:
+        tuple: (name, kind, payload) where kind is "file" (payload is a path) or
+        "json" (payload is the JSON text)
+    """
+    if directory:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.endswith('.json'):
+                    path = os.path.join(root, filename)
+                    yield path, 'file', path
+    
+    if jsonl_path:
+        with _open_lines(jsonl_path) as stream:
+            for line_number, line in enumerate(stream, 1):
+                if line.strip():
+                    yield f"{jsonl_path}:{line_number}", 'json', line
+
+
+@contextmanager
+def _open_lines(path):
+    """Open a text file for reading, or use standard input (left open) for '-'"""
+    if path == '-':
+        yield sys.stdin
+    else:
+        with open(path, 'r') as stream:
+            yield stream
+
+
+# Validator of the current bulk worker process, created once by _init_bulk_worker()
+_bulk_validator = None
+
+
+def _init_bulk_worker(schema_path, use_compiled):
+    """Create the validator of a bulk worker; the compiled schema is loaded once per process"""
+    global _bulk_validator
+    _bulk_validator = MediaConvertConfigValidator(schema_path, use_compiled=use_compiled)
+
+
+def _validate_bulk_item(kind, payload, fail_fast):
+    """Return the error records of one bulk item"""
+    try:
+        if kind == 'file':
+            with open(payload, 'r') as config_file:
+                config = json.load(config_file)
+        else:
+            config = json.loads(payload)
+    except OSError as e:
+        return [("root", 'io_error', str(e))]
+    except ValueError as e:
+        return [("root", 'invalid_json', f"Invalid JSON: {e}")]
+    
+    if not isinstance(config, dict) or 'Settings' not in config:
+        return [("root", 'missing_settings', "Configuration is missing the 'Settings' object")]
+    return _bulk_validator.error_records(config['Settings'], fail_fast)
+
+
+def _validate_bulk_batch(batch, fail_fast):
+    """Validate a batch of bulk items, returning (name, records) for each"""
+    return [(name, _validate_bulk_item(kind, payload, fail_fast)) for name, kind, payload in batch]
+
+
+def _iter_batches(items, batch_size):
+    """Group an iterable into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def validate_bulk(schema_path, directory=None, jsonl_path=None, workers=None, use_compiled=True,
+                  fail_fast=False, batch_size=32, max_examples=3):
+    """
+    Validate many configurations across a process pool and summarize the errors.
+    
+    Each worker process builds its own validator once (so the compiled schema is
+    loaded once per worker) and validates batches of configurations. Only a
+    bounded number of batches is in flight, so large JSONL streams are not
+    read into memory up front.
+    
+    Args:
+        schema_path (str): Path to the JSON schema file
+        directory (str): Directory searched recursively for *.json files
+        jsonl_path (str): JSONL file with one job configuration per line, or "-" for stdin
+        workers (int): Number of worker processes (default: CPU count); 1 validates in-process
+        use_compiled (bool): Use the generated validator instead of jsonschema
+        fail_fast (bool): Report only the first error of each configuration
+        batch_size (int): Number of configurations sent to a worker at a time
+        max_examples (int): Number of example messages kept per error group
+        
+    Returns:
+        dict: Summary with totals, error groups (by normalized path and error type,
+        most frequent first) and the invalid configurations
+    """
+    workers = workers or os.cpu_count() or 1
+    start_time = time.perf_counter()
+    
+    totals = {'total': 0, 'valid': 0, 'invalid': 0, 'error_count': 0}
+    groups = {}
+    invalid_configs = []
+    
+    def add_results(results):
+        for name, records in results:
+            totals['total'] += 1
+            if not records:
+                totals['valid'] += 1
+                continue
+            totals['invalid'] += 1
+            totals['error_count'] += len(records)
+            invalid_configs.append({'config': name, 'errors': len(records)})
+            for path, error_type, message in records:
+                group = groups.get((path, error_type))
+                if group is None:
+                    group = groups[(path, error_type)] = {
+                        'path': path, 'type': error_type, 'count': 0, 'configs': 0, 'examples': [], 'last': None
+                    }
+                group['count'] += 1
+                # Records of a configuration arrive together, so this counts distinct configurations
+                if group['last'] != name:
+                    group['last'] = name
+                    group['configs'] += 1
+                if len(group['examples']) < max_examples:
+                    group['examples'].append({'config': name, 'message': message})
+    
+    batches = _iter_batches(iter_bulk_items(directory, jsonl_path), batch_size)
+    if workers == 1:
+        _init_bulk_worker(schema_path, use_compiled)
+        for batch in batches:
+            add_results(_validate_bulk_batch(batch, fail_fast))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_bulk_worker,
+                                 initargs=(schema_path, use_compiled)) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(_validate_bulk_batch, batch, fail_fast))
+                if len(pending) >= workers * 2:
+                    add_results(pending.popleft().result())
+            while pending:
+                add_results(pending.popleft().result())
+    
+    for group in groups.values():
+        del group['last']
+    
+    summary = {
+        'schema': schema_path,
+        'sources': {'directory': directory, 'jsonl': jsonl_path},
+        'workers': workers,
+        'elapsed_seconds': round(time.perf_counter() - start_time, 3),
+    }
+    summary.update(totals)
+    summary['groups'] = sorted(groups.values(), key=lambda g: (-g['count'], g['path'], g['type']))
+    summary['invalid_configs'] = invalid_configs
+    return summary
 
 
 def main():
@@ -214,8 +494,36 @@ def main():
     )
     parser.add_argument(
         '--config-path',
-        required=True,
-        help='Path to the MediaConvert job configuration file'
+        help='Path to the MediaConvert job configuration file (required unless --bulk or --jsonl is used)'
+    )
+    parser.add_argument(
+        '--bulk',
+        metavar='DIR',
+        help='Validate every *.json file under DIR and print a JSON error summary'
+    )
+    parser.add_argument(
+        '--jsonl',
+        metavar='FILE',
+        help='Validate a JSONL file with one job configuration per line ("-" for stdin) and print a JSON error summary'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Number of worker processes for --bulk/--jsonl (default: CPU count)'
+    )
+    parser.add_argument(
+        '--summary-out',
+        help='Write the bulk summary to this file instead of stdout'
+    )
+    parser.add_argument(
+        '--fail-fast',
+        action='store_true',
+        help='Stop at the first error (pass/fail gating)'
+    )
+    parser.add_argument(
+        '--no-compile',
+        action='store_true',
+        help='Interpret the schema with jsonschema instead of the generated validator'
     )
     parser.add_argument(
         '--schema',
@@ -225,8 +533,32 @@ def main():
     
     args = parser.parse_args()
     
-    validator = MediaConvertConfigValidator(args.schema)
-    is_valid = validator.validate_config(args.config_path)
+    if args.bulk or args.jsonl:
+        summary = validate_bulk(
+            args.schema,
+            directory=args.bulk,
+            jsonl_path=args.jsonl,
+            workers=args.workers,
+            use_compiled=not args.no_compile,
+            fail_fast=args.fail_fast
+        )
+        output = json.dumps(summary, indent=2)
+        if args.summary_out:
+            with open(args.summary_out, 'w') as summary_file:
+                summary_file.write(output + "\n")
+        else:
+            print(output)
+        logging.getLogger('ConfigValidator').info(
+            f"Validated {summary['total']} configurations in {summary['elapsed_seconds']}s: "
+            f"{summary['valid']} valid, {summary['invalid']} invalid, {len(summary['groups'])} error groups"
+        )
+        sys.exit(0 if summary['invalid'] == 0 else 1)
+    
+    if not args.config_path:
+        parser.error('--config-path is required unless --bulk or --jsonl is used')
+    
+    validator = MediaConvertConfigValidator(args.schema, use_compiled=not args.no_compile)
+    is_valid = validator.validate_config(args.config_path, fail_fast=args.fail_fast)
     
     sys.exit(0 if is_valid else 1)
 